@@ -0,0 +1,44 @@
+"""posting_day
+
+Revision ID: 0b6e4d1f9a52
+Revises: f3c8b2d6a417
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b6e4d1f9a52'
+down_revision: Union[str, None] = 'f3c8b2d6a417'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Days since 1970-01-01 of posting_date, falling back to scraped_date (existing
+# rows only know their last scraped_date; new rows get their first one)
+BACKFILL = {
+    'postgresql': "UPDATE job_listings SET posting_day = "
+                  "CAST(CAST(COALESCE(posting_date, scraped_date) AS DATE) - DATE '1970-01-01' AS INTEGER)",
+    'sqlite': "UPDATE job_listings SET posting_day = "
+              "CAST(julianday(date(COALESCE(posting_date, scraped_date))) - 2440587.5 AS INTEGER)",
+}
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('job_listings') as batch_op:
+        batch_op.add_column(sa.Column('posting_day', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_job_listings_posting_day', ['posting_day'])
+
+    op.execute(BACKFILL[op.get_bind().dialect.name])
+
+    # Facts were keyed by the day of COALESCE(posting_date, scraped_date); rebuild them by posting_day
+    op.execute("DELETE FROM refresh_watermarks WHERE name = 'daily_facts'")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('job_listings') as batch_op:
+        batch_op.drop_index('ix_job_listings_posting_day')
+        batch_op.drop_column('posting_day')
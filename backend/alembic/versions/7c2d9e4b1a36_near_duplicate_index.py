@@ -0,0 +1,55 @@
+"""near_duplicate_index
+
+Revision ID: 7c2d9e4b1a36
+Revises: 1e43760c65ea
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2d9e4b1a36'
+down_revision: Union[str, None] = '1e43760c65ea'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('job_listings') as batch_op:
+        batch_op.add_column(sa.Column('canonical_job_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_job_listings_canonical_job_id', 'job_listings', ['canonical_job_id'], ['id'])
+        batch_op.create_index('ix_job_listings_canonical_job_id', ['canonical_job_id'])
+
+    op.create_table(
+        'job_signatures',
+        sa.Column('job_id', sa.Integer(), sa.ForeignKey('job_listings.id'), primary_key=True),
+        sa.Column('signature', sa.LargeBinary(), nullable=False),
+    )
+    op.create_table(
+        'job_lsh_buckets',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('band', sa.Integer(), nullable=False),
+        sa.Column('bucket', sa.BigInteger(), nullable=False),
+        sa.Column('job_id', sa.Integer(), sa.ForeignKey('job_listings.id'), nullable=False),
+        sa.UniqueConstraint('job_id', 'band', name='uq_job_lsh_band'),
+    )
+    op.create_index('ix_job_lsh_buckets_id', 'job_lsh_buckets', ['id'])
+    op.create_index('ix_job_lsh_buckets_job_id', 'job_lsh_buckets', ['job_id'])
+    op.create_index('idx_lsh_band_bucket', 'job_lsh_buckets', ['band', 'bucket'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_lsh_band_bucket', table_name='job_lsh_buckets')
+    op.drop_index('ix_job_lsh_buckets_job_id', table_name='job_lsh_buckets')
+    op.drop_index('ix_job_lsh_buckets_id', table_name='job_lsh_buckets')
+    op.drop_table('job_lsh_buckets')
+    op.drop_table('job_signatures')
+
+    with op.batch_alter_table('job_listings') as batch_op:
+        batch_op.drop_index('ix_job_listings_canonical_job_id')
+        batch_op.drop_constraint('fk_job_listings_canonical_job_id', type_='foreignkey')
+        batch_op.drop_column('canonical_job_id')
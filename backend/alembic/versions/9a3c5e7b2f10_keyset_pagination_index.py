@@ -0,0 +1,34 @@
+"""keyset_pagination_index
+
+Revision ID: 9a3c5e7b2f10
+Revises: f7d2a8c1b364
+Create Date: 2026-10-21 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a3c5e7b2f10'
+down_revision: Union[str, None] = 'f7d2a8c1b364'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # (posting_date, id), scanned backwards: the ORDER BY and keyset of cursor
+    # pagination over live postings (dated jobs, then undated ones by id)
+    active = sa.text('is_active != 0')
+    op.drop_index('idx_active_posting_date', table_name='job_listings')
+    op.create_index('idx_active_posting_date', 'job_listings', ['posting_date', 'id'],
+                    postgresql_where=active, sqlite_where=active)
+
+
+def downgrade() -> None:
+    active = sa.text('is_active != 0')
+    op.drop_index('idx_active_posting_date', table_name='job_listings')
+    op.create_index('idx_active_posting_date', 'job_listings', ['posting_date'],
+                    postgresql_where=active, sqlite_where=active)
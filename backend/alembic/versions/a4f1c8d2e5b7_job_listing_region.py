@@ -0,0 +1,34 @@
+"""job_listing_region
+
+Revision ID: a4f1c8d2e5b7
+Revises: 7c2d9e4b1a36
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4f1c8d2e5b7'
+down_revision: Union[str, None] = '7c2d9e4b1a36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('job_listings') as batch_op:
+        batch_op.add_column(sa.Column('region', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('nation', sa.String(), nullable=True))
+        batch_op.create_index('ix_job_listings_region', ['region'])
+        batch_op.create_index('ix_job_listings_nation', ['nation'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('job_listings') as batch_op:
+        batch_op.drop_index('ix_job_listings_nation')
+        batch_op.drop_index('ix_job_listings_region')
+        batch_op.drop_column('nation')
+        batch_op.drop_column('region')
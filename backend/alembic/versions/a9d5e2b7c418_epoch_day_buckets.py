@@ -0,0 +1,106 @@
+"""epoch_day_buckets
+
+Revision ID: a9d5e2b7c418
+Revises: d8a4f2c6e073
+Create Date: 2026-10-24 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d5e2b7c418'
+down_revision: Union[str, None] = 'd8a4f2c6e073'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months since January 1970 of posting_date, falling back to scraped_date like posting_day
+BACKFILL = {
+    'postgresql': "UPDATE job_listings SET posting_month = "
+                  "(CAST(EXTRACT(YEAR FROM COALESCE(posting_date, scraped_date)) AS INTEGER) - 1970) * 12 + "
+                  "CAST(EXTRACT(MONTH FROM COALESCE(posting_date, scraped_date)) AS INTEGER) - 1",
+    'sqlite': "UPDATE job_listings SET posting_month = "
+              "(CAST(strftime('%Y', COALESCE(posting_date, scraped_date)) AS INTEGER) - 1970) * 12 + "
+              "CAST(strftime('%m', COALESCE(posting_date, scraped_date)) AS INTEGER) - 1",
+}
+
+
+def _create_fact_tables(day_type: sa.types.TypeEngine, with_month: bool) -> None:
+    op.create_table(
+        'keyword_daily_facts',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('day', day_type, nullable=False),
+        *([sa.Column('month', sa.Integer(), nullable=False)] if with_month else []),
+        sa.Column('keyword_id', sa.Integer(), sa.ForeignKey('keywords.id'), nullable=False),
+        sa.Column('region', sa.String(), nullable=False),
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('job_count', sa.Integer(), nullable=False),
+        sa.Column('occurrences', sa.Integer(), nullable=False),
+        sa.UniqueConstraint('day', 'keyword_id', 'region', 'source', name='uq_keyword_daily_fact'),
+    )
+    op.create_index('ix_keyword_daily_facts_id', 'keyword_daily_facts', ['id'])
+    op.create_index('idx_keyword_fact_keyword_day', 'keyword_daily_facts', ['keyword_id', 'day'])
+
+    op.create_table(
+        'job_daily_facts',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('day', day_type, nullable=False),
+        sa.Column('region', sa.String(), nullable=False),
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('job_count', sa.Integer(), nullable=False),
+        sa.UniqueConstraint('day', 'region', 'source', name='uq_job_daily_fact'),
+    )
+    op.create_index('ix_job_daily_facts_id', 'job_daily_facts', ['id'])
+
+
+def _drop_fact_tables() -> None:
+    op.drop_index('ix_job_daily_facts_id', table_name='job_daily_facts')
+    op.drop_table('job_daily_facts')
+    op.drop_index('idx_keyword_fact_keyword_day', table_name='keyword_daily_facts')
+    op.drop_index('ix_keyword_daily_facts_id', table_name='keyword_daily_facts')
+    op.drop_table('keyword_daily_facts')
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('job_listings') as batch_op:
+        batch_op.add_column(sa.Column('posting_month', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_job_listings_posting_month', ['posting_month'])
+        batch_op.create_index('idx_location_month', ['location', 'posting_month'])
+
+    op.execute(BACKFILL[op.get_bind().dialect.name])
+
+    # Fact days become epoch days (as JobListing.posting_day) with the posting month alongside;
+    # the next refreshes have no watermark and rebuild both rollups from scratch
+    _drop_fact_tables()
+    _create_fact_tables(sa.Integer(), with_month=True)
+
+    op.drop_table('stale_summary_partitions')
+    op.create_table(
+        'stale_summary_partitions',
+        sa.Column('region', sa.String(), primary_key=True),
+        sa.Column('month', sa.Integer(), primary_key=True),
+        sa.Column('marked_at', sa.DateTime(), nullable=False),
+    )
+    op.execute("DELETE FROM refresh_watermarks WHERE name IN ('daily_facts', 'regional_summary')")
+
+
+def downgrade() -> None:
+    op.drop_table('stale_summary_partitions')
+    op.create_table(
+        'stale_summary_partitions',
+        sa.Column('region', sa.String(), primary_key=True),
+        sa.Column('date', sa.DateTime(), primary_key=True),
+        sa.Column('marked_at', sa.DateTime(), nullable=False),
+    )
+
+    _drop_fact_tables()
+    _create_fact_tables(sa.Date(), with_month=False)
+    op.execute("DELETE FROM refresh_watermarks WHERE name IN ('daily_facts', 'regional_summary')")
+
+    with op.batch_alter_table('job_listings') as batch_op:
+        batch_op.drop_index('idx_location_month')
+        batch_op.drop_index('ix_job_listings_posting_month')
+        batch_op.drop_column('posting_month')
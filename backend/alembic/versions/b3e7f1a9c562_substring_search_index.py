@@ -0,0 +1,47 @@
+"""substring_search_index
+
+Revision ID: b3e7f1a9c562
+Revises: a9d5e2b7c418
+Create Date: 2026-10-25 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e7f1a9c562'
+down_revision: Union[str, None] = 'a9d5e2b7c418'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _recreate_sqlite_fts(tokenize: str) -> None:
+    # The triggers only name the table, so they carry over
+    op.execute("DROP TABLE job_listings_fts")
+    op.execute(
+        "CREATE VIRTUAL TABLE job_listings_fts USING fts5("
+        f"title, description, content='job_listings', content_rowid='id', tokenize='{tokenize}')"
+    )
+    op.execute("INSERT INTO job_listings_fts(job_listings_fts) VALUES ('rebuild')")
+
+
+def upgrade() -> None:
+    # Keyword search matches substrings, as the ILIKE filter did (see app/search.py)
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE INDEX idx_job_listings_title_trgm ON job_listings USING GIN (title gin_trgm_ops)")
+        op.execute("CREATE INDEX idx_job_listings_description_trgm ON job_listings USING GIN (description gin_trgm_ops)")
+        return
+
+    _recreate_sqlite_fts('trigram')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP INDEX idx_job_listings_description_trgm")
+        op.execute("DROP INDEX idx_job_listings_title_trgm")
+        return
+
+    _recreate_sqlite_fts('unicode61')
@@ -0,0 +1,52 @@
+"""scraper_run_spiders
+
+Revision ID: b8e3f0a6c921
+Revises: a4f1c8d2e5b7
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e3f0a6c921'
+down_revision: Union[str, None] = 'a4f1c8d2e5b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'scraper_run_spiders',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('run_id', sa.Integer(), sa.ForeignKey('scraper_runs.id'), nullable=True),
+        sa.Column('spider', sa.String(), nullable=False),
+        sa.Column('start_time', sa.DateTime(), nullable=True),
+        sa.Column('end_time', sa.DateTime(), nullable=True),
+        sa.Column('finish_reason', sa.String(), nullable=True),
+        sa.Column('items_scraped', sa.Integer(), nullable=True),
+        sa.Column('items_dropped', sa.Integer(), nullable=True),
+        sa.Column('items_saved', sa.Integer(), nullable=True),
+        sa.Column('items_updated', sa.Integer(), nullable=True),
+        sa.Column('near_duplicates', sa.Integer(), nullable=True),
+        sa.Column('requests', sa.Integer(), nullable=True),
+        sa.Column('response_bytes', sa.Integer(), nullable=True),
+        sa.Column('errors_count', sa.Integer(), nullable=True),
+        sa.Column('pipeline_seconds', sa.Float(), nullable=True),
+        sa.Column('extraction_seconds', sa.Float(), nullable=True),
+    )
+    op.create_index('ix_scraper_run_spiders_id', 'scraper_run_spiders', ['id'])
+    op.create_index('ix_scraper_run_spiders_run_id', 'scraper_run_spiders', ['run_id'])
+    op.create_index('ix_scraper_run_spiders_spider', 'scraper_run_spiders', ['spider'])
+    op.create_index('idx_spider_start_time', 'scraper_run_spiders', ['spider', 'start_time'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_spider_start_time', table_name='scraper_run_spiders')
+    op.drop_index('ix_scraper_run_spiders_spider', table_name='scraper_run_spiders')
+    op.drop_index('ix_scraper_run_spiders_run_id', table_name='scraper_run_spiders')
+    op.drop_index('ix_scraper_run_spiders_id', table_name='scraper_run_spiders')
+    op.drop_table('scraper_run_spiders')
@@ -0,0 +1,31 @@
+"""stale_fact_days
+
+Revision ID: c6e9d3a7b145
+Revises: 9a3c5e7b2f10
+Create Date: 2026-10-22 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6e9d3a7b145'
+down_revision: Union[str, None] = '9a3c5e7b2f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Days vacated by refreshed jobs whose posting_day changed, until populate_daily_facts recomputes them
+    op.create_table(
+        'stale_fact_days',
+        sa.Column('day', sa.Integer(), primary_key=True),
+        sa.Column('marked_at', sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('stale_fact_days')
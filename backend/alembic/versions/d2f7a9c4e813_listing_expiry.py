@@ -0,0 +1,41 @@
+"""listing_expiry
+
+Revision ID: d2f7a9c4e813
+Revises: b8e3f0a6c921
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f7a9c4e813'
+down_revision: Union[str, None] = 'b8e3f0a6c921'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('scraper_run_spiders') as batch_op:
+        batch_op.add_column(sa.Column('source_website', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('full_crawl', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_scraper_run_spiders_source_website', ['source_website'])
+
+    # Partial indexes over live postings (PostgreSQL and SQLite support WHERE on indexes)
+    active = sa.text('is_active != 0')
+    op.create_index('idx_active_source_scraped', 'job_listings', ['source_website', 'scraped_date'],
+                    postgresql_where=active, sqlite_where=active)
+    op.create_index('idx_active_posting_date', 'job_listings', ['posting_date'],
+                    postgresql_where=active, sqlite_where=active)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_active_posting_date', table_name='job_listings')
+    op.drop_index('idx_active_source_scraped', table_name='job_listings')
+    with op.batch_alter_table('scraper_run_spiders') as batch_op:
+        batch_op.drop_index('ix_scraper_run_spiders_source_website')
+        batch_op.drop_column('full_crawl')
+        batch_op.drop_column('source_website')
@@ -0,0 +1,32 @@
+"""stale_summary_partitions
+
+Revision ID: d8a4f2c6e073
+Revises: c6e9d3a7b145
+Create Date: 2026-10-23 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8a4f2c6e073'
+down_revision: Union[str, None] = 'c6e9d3a7b145'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # (location, month) partitions vacated by refreshed jobs, until populate_regional_summary recomputes them
+    op.create_table(
+        'stale_summary_partitions',
+        sa.Column('region', sa.String(), primary_key=True),
+        sa.Column('date', sa.DateTime(), primary_key=True),
+        sa.Column('marked_at', sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('stale_summary_partitions')
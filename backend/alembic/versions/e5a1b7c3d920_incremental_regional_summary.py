@@ -0,0 +1,38 @@
+"""incremental_regional_summary
+
+Revision ID: e5a1b7c3d920
+Revises: d2f7a9c4e813
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a1b7c3d920'
+down_revision: Union[str, None] = 'd2f7a9c4e813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('job_listings') as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_job_listings_updated_at', ['updated_at'])
+
+    # No watermark yet: the first refresh recomputes every partition
+    op.create_table(
+        'refresh_watermarks',
+        sa.Column('name', sa.String(), primary_key=True),
+        sa.Column('value', sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('refresh_watermarks')
+    with op.batch_alter_table('job_listings') as batch_op:
+        batch_op.drop_index('ix_job_listings_updated_at')
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,54 @@
+"""daily_facts
+
+Revision ID: f3c8b2d6a417
+Revises: e5a1b7c3d920
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c8b2d6a417'
+down_revision: Union[str, None] = 'e5a1b7c3d920'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Empty until the first populate_daily_facts run, which has no watermark and recomputes every day
+    op.create_table(
+        'keyword_daily_facts',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('keyword_id', sa.Integer(), sa.ForeignKey('keywords.id'), nullable=False),
+        sa.Column('region', sa.String(), nullable=False),
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('job_count', sa.Integer(), nullable=False),
+        sa.Column('occurrences', sa.Integer(), nullable=False),
+        sa.UniqueConstraint('day', 'keyword_id', 'region', 'source', name='uq_keyword_daily_fact'),
+    )
+    op.create_index('ix_keyword_daily_facts_id', 'keyword_daily_facts', ['id'])
+    op.create_index('idx_keyword_fact_keyword_day', 'keyword_daily_facts', ['keyword_id', 'day'])
+
+    op.create_table(
+        'job_daily_facts',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('region', sa.String(), nullable=False),
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('job_count', sa.Integer(), nullable=False),
+        sa.UniqueConstraint('day', 'region', 'source', name='uq_job_daily_fact'),
+    )
+    op.create_index('ix_job_daily_facts_id', 'job_daily_facts', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_job_daily_facts_id', table_name='job_daily_facts')
+    op.drop_table('job_daily_facts')
+    op.drop_index('idx_keyword_fact_keyword_day', table_name='keyword_daily_facts')
+    op.drop_index('ix_keyword_daily_facts_id', table_name='keyword_daily_facts')
+    op.drop_table('keyword_daily_facts')
@@ -0,0 +1,62 @@
+"""job_search_index
+
+Revision ID: f7d2a8c1b364
+Revises: 0b6e4d1f9a52
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7d2a8c1b364'
+down_revision: Union[str, None] = '0b6e4d1f9a52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Full-text index over job titles and descriptions (see app/search.py)
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            "ALTER TABLE job_listings ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')) STORED"
+        )
+        op.execute("CREATE INDEX idx_job_listings_search ON job_listings USING GIN (search_vector)")
+        return
+
+    op.execute(
+        "CREATE VIRTUAL TABLE job_listings_fts USING fts5("
+        "title, description, content='job_listings', content_rowid='id', tokenize='unicode61')"
+    )
+    op.execute(
+        "CREATE TRIGGER job_listings_fts_insert AFTER INSERT ON job_listings BEGIN "
+        "INSERT INTO job_listings_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END"
+    )
+    op.execute(
+        "CREATE TRIGGER job_listings_fts_delete AFTER DELETE ON job_listings BEGIN "
+        "INSERT INTO job_listings_fts(job_listings_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); END"
+    )
+    op.execute(
+        "CREATE TRIGGER job_listings_fts_update AFTER UPDATE OF title, description ON job_listings BEGIN "
+        "INSERT INTO job_listings_fts(job_listings_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); "
+        "INSERT INTO job_listings_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END"
+    )
+    op.execute("INSERT INTO job_listings_fts(job_listings_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP INDEX idx_job_listings_search")
+        op.execute("ALTER TABLE job_listings DROP COLUMN search_vector")
+        return
+
+    op.execute("DROP TRIGGER job_listings_fts_update")
+    op.execute("DROP TRIGGER job_listings_fts_delete")
+    op.execute("DROP TRIGGER job_listings_fts_insert")
+    op.execute("DROP TABLE job_listings_fts")
@@ -10,9 +10,10 @@ from sqlalchemy import func, or_
 from datetime import datetime
 
 from app.database import get_db
-from app.models import ScraperRun, JobListing, Keyword, KeywordOccurrence
+from app.models import ScraperRun, ScraperRunSpider, JobListing, Keyword, KeywordOccurrence
 from logging_config import get_logger
 from app.services.scraper_service import run_all_uk_spiders
+from app.services.scheduler import expire_stale_listings, populate_daily_facts
 
 router = APIRouter()
 logger = get_logger("api")
@@ -39,6 +40,9 @@ async def trigger_scrape(
     db.refresh(scraper_run)
 
     background_tasks.add_task(run_all_uk_spiders, scraper_run.id)
+    # Background tasks run in order: expiry only starts once the crawl is over
+    background_tasks.add_task(expire_stale_listings, scraper_run.id)
+    background_tasks.add_task(populate_daily_facts)
 
     return {
         "message": "UK Scrape job queued successfully",
@@ -50,7 +54,7 @@ async def trigger_scrape(
 @router.get("/scraper-status")
 async def get_scraper_status(db: Session = Depends(get_db)):
     """
-    Get status of recent scraper runs.
+    Get status of recent scraper runs, with per-spider throughput metrics.
     """
     recent_runs = (
         db.query(ScraperRun)
@@ -59,6 +63,17 @@ async def get_scraper_status(db: Session = Depends(get_db)):
         .all()
     )
 
+    spiders_by_run = {}
+    if recent_runs:
+        spider_rows = (
+            db.query(ScraperRunSpider)
+            .filter(ScraperRunSpider.run_id.in_([run.id for run in recent_runs]))
+            .order_by(ScraperRunSpider.spider)
+            .all()
+        )
+        for row in spider_rows:
+            spiders_by_run.setdefault(row.run_id, []).append(_spider_metrics(row))
+
     runs = [
         {
             "id": run.id,
@@ -68,7 +83,8 @@ async def get_scraper_status(db: Session = Depends(get_db)):
             "jobs_scraped": run.jobs_scraped,
             "duplicates_found": run.duplicates_found,
             "errors_count": run.errors_count,
-            "status": run.status
+            "status": run.status,
+            "spiders": spiders_by_run.get(run.id, [])
         }
         for run in recent_runs
     ]
@@ -76,6 +92,32 @@ async def get_scraper_status(db: Session = Depends(get_db)):
     return {"recent_runs": runs}
 
 
+def _spider_metrics(row: ScraperRunSpider) -> dict:
+    """Serialize one spider's metrics, with throughput derived from its duration."""
+    duration = (
+        (row.end_time - row.start_time).total_seconds()
+        if row.start_time and row.end_time else None
+    )
+    return {
+        "spider": row.spider,
+        "finish_reason": row.finish_reason,
+        "start_time": row.start_time.isoformat() if row.start_time else None,
+        "end_time": row.end_time.isoformat() if row.end_time else None,
+        "duration_seconds": round(duration, 1) if duration is not None else None,
+        "items_scraped": row.items_scraped,
+        "items_dropped": row.items_dropped,
+        "items_saved": row.items_saved,
+        "items_updated": row.items_updated,
+        "near_duplicates": row.near_duplicates,
+        "requests": row.requests,
+        "response_bytes": row.response_bytes,
+        "errors_count": row.errors_count,
+        "pipeline_seconds": round(row.pipeline_seconds or 0.0, 3),
+        "extraction_seconds": round(row.extraction_seconds or 0.0, 3),
+        "items_per_minute": round(row.items_scraped * 60 / duration, 1) if duration else None,
+    }
+
+
 @router.get("/stats")
 async def get_system_stats(db: Session = Depends(get_db)):
     """
@@ -14,6 +14,7 @@ from datetime import datetime
 
 from app.database import get_db
 from app.models import JobListing, Keyword, KeywordOccurrence
+from app.search import search
 from logging_config import get_logger
 
 router = APIRouter()
@@ -39,10 +40,7 @@ async def export_jobs_csv(
     if company:
         query = query.filter(JobListing.company.ilike(f"%{company}%"))
     if keyword:
-        query = query.filter(
-            (JobListing.title.ilike(f"%{keyword}%")) |
-            (JobListing.description.ilike(f"%{keyword}%"))
-        )
+        query, _ = search(db, query, keyword)
     if start_date:
         query = query.filter(JobListing.posting_date >= start_date)
     if end_date:
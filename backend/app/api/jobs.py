@@ -3,13 +3,15 @@ Jobs API endpoints.
 Provides job listing queries with filtering and pagination.
 """
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from datetime import datetime
 
 from app.database import get_db
 from app.models import JobListing
+from app.pagination import count_rows, keyset_page
+from app.search import search
 from app.schemas import JobListingResponse, PaginatedResponse
 from logging_config import get_logger
 
@@ -27,10 +29,23 @@ async def get_jobs(
     keyword: Optional[str] = Query(None, description="Filter by keyword in title/description"),
     start_date: Optional[datetime] = Query(None, description="Filter jobs posted after this date"),
     end_date: Optional[datetime] = Query(None, description="Filter jobs posted before this date"),
+    sort: str = Query("date", pattern="^(date|relevance)$",
+                      description="Order by posting date (newest first) or by search relevance"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (replaces page)"),
+    total: str = Query("exact", pattern="^(exact|estimate|none)$",
+                       description="exact count, estimate (PostgreSQL planner estimate; a count cached "
+                                   "for a minute on SQLite) or none"),
 ):
     """
     Get paginated list of job listings with optional filters.
+    keyword matches a case-insensitive substring of the title or description,
+    looked up in the trigram search index (app.search).
+    Follow next_cursor to page through the list at constant cost (app.pagination);
+    relevance-sorted results only support page numbers.
     """
+    if cursor and sort == "relevance":
+        raise HTTPException(status_code=400, detail="cursor cannot be combined with sort=relevance; use page")
+
     query = db.query(JobListing).filter(JobListing.is_active != 0)
     
     # Apply filters
@@ -40,11 +55,9 @@ async def get_jobs(
     if company:
         query = query.filter(JobListing.company.ilike(f"%{company}%"))
     
+    rank = None
     if keyword:
-        query = query.filter(
-            (JobListing.title.ilike(f"%{keyword}%")) |
-            (JobListing.description.ilike(f"%{keyword}%"))
-        )
+        query, rank = search(db, query, keyword)
     
     if start_date:
         query = query.filter(JobListing.posting_date >= start_date)
@@ -52,21 +65,26 @@ async def get_jobs(
     if end_date:
         query = query.filter(JobListing.posting_date <= end_date)
     
-    # Get total count
-    total = query.count()
-    
-    # Apply pagination
-    offset = (page - 1) * page_size
-    jobs = query.order_by(JobListing.posting_date.desc()).offset(offset).limit(page_size).all()
+    total_count = count_rows(db, query, total)
+    try:
+        if sort == "relevance" and rank is not None:
+            offset = (page - 1) * page_size
+            jobs = query.order_by(rank, JobListing.posting_date.desc()).offset(offset).limit(page_size).all()
+            next_cursor = None
+        else:
+            jobs, next_cursor = keyset_page(query, page_size, cursor=cursor, page=page)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     logger.info(f"Retrieved {len(jobs)} jobs (page {page}, filters: location={location}, company={company})")
     
     return {
         "items": jobs,
-        "total": total,
+        "total": total_count,
         "page": page,
         "page_size": page_size,
-        "total_pages": (total + page_size - 1) // page_size
+        "total_pages": (total_count + page_size - 1) // page_size if total_count is not None else None,
+        "next_cursor": next_cursor,
     }
 
 
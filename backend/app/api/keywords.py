@@ -3,39 +3,51 @@ Keywords API endpoints.
 Provides keyword analysis and frequency data.
 """
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
+from datetime import datetime
 from typing import Optional
 
 from app.database import get_db
-from app.models import Keyword, KeywordOccurrence, JobListing
+from app.dialects import to_epoch_day
+from app.models import Keyword, KeywordOccurrence, JobListing, KeywordDailyFact
+from app.pagination import count_rows, keyset_page
 from logging_config import get_logger
 
 router = APIRouter()
 logger = get_logger("api")
 
 
+def _posting_day(value: str, name: str) -> int:
+    """Epoch day of an ISO date or datetime query parameter (the time of day is ignored)."""
+    try:
+        return to_epoch_day(datetime.fromisoformat(value))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be an ISO date or datetime, got {value!r}")
+
+
 @router.get("/top")
 async def get_top_keywords(
     db: Session = Depends(get_db),
     limit: int = Query(20, ge=1, le=100, description="Number of keywords to return"),
     category: Optional[str] = Query(None, description="Filter by category (skill/software/experience)"),
-    start_date: Optional[str] = Query(None, description="Start date for analysis"),
-    end_date: Optional[str] = Query(None, description="End date for analysis"),
+    start_date: Optional[str] = Query(None, description="First posting day to include (ISO date or datetime)"),
+    end_date: Optional[str] = Query(None, description="Last posting day to include (ISO date or datetime)"),
 ):
     """
     Get top N keywords by frequency across all jobs.
+    Read from the KeywordDailyFact rollup (see scheduler.populate_daily_facts),
+    so start_date / end_date select whole posting days.
     """
     query = (
         db.query(
             Keyword.keyword,
             Keyword.category,
-            func.sum(KeywordOccurrence.frequency).label("total_frequency"),
-            func.count(KeywordOccurrence.job_id.distinct()).label("job_count")
+            func.sum(KeywordDailyFact.occurrences).label("total_frequency"),
+            func.sum(KeywordDailyFact.job_count).label("job_count")
         )
-        .join(KeywordOccurrence)
-        .join(JobListing)
+        .join(KeywordDailyFact, KeywordDailyFact.keyword_id == Keyword.id)
     )
     
     # Apply category filter
@@ -44,10 +56,10 @@ async def get_top_keywords(
     
     # Apply date filters
     if start_date:
-        query = query.filter(JobListing.posting_date >= start_date)
+        query = query.filter(KeywordDailyFact.day >= _posting_day(start_date, "start_date"))
     
     if end_date:
-        query = query.filter(JobListing.posting_date <= end_date)
+        query = query.filter(KeywordDailyFact.day <= _posting_day(end_date, "end_date"))
     
     # Group and order
     results = (
@@ -79,31 +91,39 @@ async def get_jobs_by_keyword(
     db: Session = Depends(get_db),
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (replaces page)"),
+    total: str = Query("exact", pattern="^(exact|estimate|none)$",
+                       description="exact count, estimate (PostgreSQL planner estimate; a count cached "
+                                   "for a minute on SQLite) or none"),
 ):
     """
-    Get all jobs that contain a specific keyword.
+    Get all jobs that contain a specific keyword, newest first.
+    Follow next_cursor to page through them at constant cost (app.pagination).
     """
     keyword_obj = db.query(Keyword).filter(Keyword.keyword.ilike(keyword)).first()
     
     if not keyword_obj:
-        return {"items": [], "total": 0, "page": page, "page_size": page_size}
+        return {"items": [], "total": 0, "page": page, "page_size": page_size, "next_cursor": None}
     
     query = (
         db.query(JobListing)
         .join(KeywordOccurrence)
         .filter(KeywordOccurrence.keyword_id == keyword_obj.id)
-        .filter(JobListing.is_active == 1)
+        .filter(JobListing.is_active != 0)
     )
     
-    total = query.count()
-    offset = (page - 1) * page_size
-    jobs = query.order_by(JobListing.posting_date.desc()).offset(offset).limit(page_size).all()
+    total_count = count_rows(db, query, total)
+    try:
+        jobs, next_cursor = keyset_page(query, page_size, cursor=cursor, page=page)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return {
         "items": jobs,
-        "total": total,
+        "total": total_count,
         "page": page,
         "page_size": page_size,
+        "next_cursor": next_cursor,
         "keyword": keyword_obj.keyword,
         "category": keyword_obj.category
     }
@@ -29,7 +29,7 @@ async def get_regional_distribution(
     query = db.query(
         JobListing.location,
         func.count(JobListing.id).label("job_count")
-    ).filter(JobListing.is_active == 1)
+    ).filter(JobListing.is_active == 1, JobListing.canonical_job_id == None)  # Count cross-posted jobs once
     
     # Join with keywords if filtering
     if keyword or category:
@@ -138,7 +138,8 @@ async def get_skills_region_heatmap(
     # 1. Get top regions by job count
     top_regions = (
         db.query(JobListing.location, func.count(JobListing.id).label("cnt"))
-        .filter(JobListing.is_active == 1, JobListing.location != None, JobListing.location != "")
+        .filter(JobListing.is_active == 1, JobListing.canonical_job_id == None,
+                JobListing.location != None, JobListing.location != "")
         .group_by(JobListing.location)
         .order_by(func.count(JobListing.id).desc())
         .limit(limit_regions)
@@ -2,6 +2,11 @@
 Trends API endpoints.
 Provides time-series data for keyword demand analysis.
 SQLite + PostgreSQL compatible.
+
+The keyword and job series are read from the daily fact tables
+(KeywordDailyFact, JobDailyFact; see scheduler.populate_daily_facts) and
+rolled up to weeks / months at query time, so their cost depends on the
+number of days and keywords rather than the number of jobs.
 """
 
 from fastapi import APIRouter, Depends, Query
@@ -11,7 +16,8 @@ from datetime import datetime, timedelta
 from typing import Optional
 
 from app.database import get_db
-from app.models import Keyword, KeywordOccurrence, JobListing
+from app.dialects import bucket_start, epoch_bucket, from_epoch_day, to_epoch_day
+from app.models import Keyword, JobListing, KeywordDailyFact, JobDailyFact
 from logging_config import get_logger
 
 router = APIRouter()
@@ -27,27 +33,29 @@ async def get_trends(
     interval: str = Query("week", description="Time interval (day/week/month)")
 ):
     """
-    Get time-series data showing keyword demand trends over time.
-    Uses strftime for SQLite compatibility (also works with PostgreSQL via SQLAlchemy).
+    Get time-series data showing keyword demand trends over time
+    (jobs mentioning each keyword, per posting period).
+    Periods are integer buckets of the facts' epoch day / month (app.dialects.epoch_bucket).
     """
     end_date = datetime.now()
     start_date = end_date - timedelta(days=days)
 
-    # SQLite-compatible date formatting
+    # Period labels: weeks start on Monday (%W)
     fmt_map = {"day": "%Y-%m-%d", "week": "%Y-%W", "month": "%Y-%m"}
-    date_format = fmt_map.get(interval, "%Y-%W")
+    if interval not in fmt_map:
+        interval = "week"
+    period = epoch_bucket(KeywordDailyFact.day, KeywordDailyFact.month, interval)
 
     query = (
         db.query(
-            func.strftime(date_format, JobListing.posting_date).label("period"),
+            period.label("period"),
             Keyword.keyword,
             Keyword.category,
-            func.count(KeywordOccurrence.id).label("count")
+            func.sum(KeywordDailyFact.job_count).label("count")
         )
-        .join(KeywordOccurrence, JobListing.id == KeywordOccurrence.job_id)
-        .join(Keyword, KeywordOccurrence.keyword_id == Keyword.id)
-        .filter(JobListing.posting_date >= start_date)
-        .filter(JobListing.posting_date <= end_date)
+        .join(Keyword, KeywordDailyFact.keyword_id == Keyword.id)
+        .filter(KeywordDailyFact.day >= to_epoch_day(start_date))
+        .filter(KeywordDailyFact.day <= to_epoch_day(end_date))
     )
 
     if keyword:
@@ -57,14 +65,14 @@ async def get_trends(
 
     results = (
         query
-        .group_by("period", Keyword.keyword, Keyword.category)
-        .order_by("period")
+        .group_by(period, Keyword.keyword, Keyword.category)
+        .order_by(period)
         .all()
     )
 
     trends = {}
     for r in results:
-        period_str = str(r.period) if r.period else "unknown"
+        period_str = bucket_start(r.period, interval).strftime(fmt_map[interval])
         if period_str not in trends:
             trends[period_str] = []
         trends[period_str].append({
@@ -95,17 +103,17 @@ async def get_job_trends(
 
     query = (
         db.query(
-            func.strftime("%Y-%m-%d", JobListing.posting_date).label("date"),
-            func.count(JobListing.id).label("count")
+            JobDailyFact.day.label("date"),
+            func.sum(JobDailyFact.job_count).label("count")
         )
-        .filter(JobListing.posting_date >= start_date)
-        .filter(JobListing.posting_date <= end_date)
-        .group_by("date")
-        .order_by("date")
+        .filter(JobDailyFact.day >= to_epoch_day(start_date))
+        .filter(JobDailyFact.day <= to_epoch_day(end_date))
+        .group_by(JobDailyFact.day)
+        .order_by(JobDailyFact.day)
         .all()
     )
 
-    data = [{"date": row.date, "count": row.count} for row in query]
+    data = [{"date": from_epoch_day(row.date).isoformat(), "count": row.count} for row in query]
     return {"data": data}
 
 
@@ -116,7 +124,8 @@ async def get_emerging_skills(
     limit: int = Query(10, ge=1, le=50, description="Number of results")
 ):
     """
-    Identify emerging / fast-growing skills by comparing this week vs last week.
+    Identify emerging / fast-growing skills by comparing this week vs last week
+    (the last 7 posting days, today included, vs the 7 before).
     Returns keywords sorted by growth rate (pct change over prior week).
     """
     now = datetime.now()
@@ -128,12 +137,11 @@ async def get_emerging_skills(
             db.query(
                 Keyword.keyword,
                 Keyword.category,
-                func.count(KeywordOccurrence.id).label("count")
+                func.sum(KeywordDailyFact.job_count).label("count")
             )
-            .join(KeywordOccurrence)
-            .join(JobListing)
-            .filter(JobListing.posting_date >= start)
-            .filter(JobListing.posting_date < end)
+            .join(KeywordDailyFact, KeywordDailyFact.keyword_id == Keyword.id)
+            .filter(KeywordDailyFact.day > to_epoch_day(start))
+            .filter(KeywordDailyFact.day <= to_epoch_day(end))
         )
         if category:
             q = q.filter(Keyword.category == category)
@@ -166,15 +174,17 @@ async def get_experience_breakdown(db: Session = Depends(get_db)):
     """
     Returns count of jobs per experience level keyword (Junior, Senior, Lead, etc.).
     """
+    # A job has a single posting day, region and source, so summing facts counts distinct jobs
+    job_count = func.sum(KeywordDailyFact.job_count)
     results = (
         db.query(
             Keyword.keyword,
-            func.count(KeywordOccurrence.job_id.distinct()).label("job_count")
+            job_count.label("job_count")
         )
-        .join(KeywordOccurrence)
+        .join(KeywordDailyFact, KeywordDailyFact.keyword_id == Keyword.id)
         .filter(Keyword.category == "experience")
         .group_by(Keyword.id, Keyword.keyword)
-        .order_by(func.count(KeywordOccurrence.job_id.distinct()).desc())
+        .order_by(job_count.desc())
         .all()
     )
 
@@ -47,6 +47,11 @@ class Settings(BaseSettings):
     scraper_user_agent: str = "Mozilla/5.0"
     scraper_delay: int = 2
     scraper_concurrent_requests: int = 16
+    # Jobs not seen for this long before a full crawl of their source are marked inactive
+    listing_expiry_grace_hours: int = 48
+    # Weekday (0 = Monday) of the scheduled scrape that runs as a full crawl, with the
+    # incremental shortcuts off, so expire_stale_listings can act; -1 never does
+    full_crawl_weekday: int = 6
     
     class Config:
         env_file = ".env"
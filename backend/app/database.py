@@ -7,6 +7,7 @@ from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
 from app.config import get_settings
 from app.models import Base
+from app import search
 from logging_config import get_logger
 
 settings = get_settings()
@@ -42,6 +43,7 @@ def init_db():
     """Initialize database tables."""
     logger.info("Initializing database tables...")
     Base.metadata.create_all(bind=engine)
+    search.install(engine)
     logger.info("Database tables created successfully")
 
 
@@ -0,0 +1,93 @@
+"""
+Helpers for SQL that differs between the supported databases (SQLite, PostgreSQL).
+Kept free of app.config / app.database so the scraper can import it.
+"""
+
+
+from datetime import date, datetime, timedelta
+from typing import Union
+
+from sqlalchemy import DateTime, func, type_coerce
+
+EPOCH = date(1970, 1, 1)
+
+
+def _dialect_name(bind):
+    return bind.get_bind().dialect.name if hasattr(bind, "get_bind") else bind.dialect.name
+
+
+def dialect_insert(bind):
+    """
+    Return the dialect-specific insert() construct for a Session, Connection or Engine.
+    Both variants support .on_conflict_do_update() / .on_conflict_do_nothing().
+    """
+    name = _dialect_name(bind)
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Bulk upserts are not supported on '{name}'")
+    return insert
+
+
+BUCKET_INTERVALS = ("day", "week", "month")
+
+# 1970-01-01 was a Thursday: (day + 3) % 7 is the weekday, Monday = 0
+_EPOCH_WEEKDAY_OFFSET = 3
+
+
+def epoch_bucket(day, month, interval: str):
+    """
+    SQL expression for the day, week or month bucket of an epoch day /
+    epoch month column pair (see to_epoch_day, to_epoch_month): the day
+    itself, the epoch day of that week's Monday, or the month. Plain integer
+    arithmetic on the stored columns, the same on SQLite and PostgreSQL;
+    bucket_start turns a result back into a date.
+    """
+    if interval not in BUCKET_INTERVALS:
+        raise ValueError(f"Unknown date bucket interval '{interval}'")
+    if interval == "month":
+        return month
+    if interval == "week":
+        return day - (day + _EPOCH_WEEKDAY_OFFSET) % 7
+    return day
+
+
+def bucket_start(value: int, interval: str) -> date:
+    """First day of an epoch_bucket value."""
+    return from_epoch_month(value) if interval == "month" else from_epoch_day(value)
+
+
+def epoch_month_start(bind, column):
+    """SQL expression for the first instant of an epoch month column, comparable with DateTime columns."""
+    name = _dialect_name(bind)
+    year, month = EPOCH.year + column // 12, column % 12 + 1
+    if name == "postgresql":
+        return func.make_timestamp(year, month, 1, 0, 0, 0)
+    if name == "sqlite":
+        # SQLite stores DateTime as 'YYYY-MM-DD HH:MM:SS.ffffff' text
+        return type_coerce(func.printf("%04d-%02d-01 00:00:00.000000", year, month), DateTime)
+    raise NotImplementedError(f"epoch_month_start is not supported on '{name}'")
+
+
+def to_epoch_day(value: Union[date, datetime]) -> int:
+    """Days since 1970-01-01 of a date or (naive, local) datetime, as stored in JobListing.posting_day."""
+    if isinstance(value, datetime):
+        value = value.date()
+    return (value - EPOCH).days
+
+
+def from_epoch_day(day: int) -> date:
+    """Inverse of to_epoch_day."""
+    return EPOCH + timedelta(days=day)
+
+
+def to_epoch_month(value: Union[date, datetime]) -> int:
+    """Months since January 1970 of a date or datetime, as stored in JobListing.posting_month."""
+    return (value.year - EPOCH.year) * 12 + value.month - 1
+
+
+def from_epoch_month(month: int) -> date:
+    """First day of an epoch month (inverse of to_epoch_month)."""
+    return date(EPOCH.year + month // 12, month % 12 + 1, 1)
@@ -3,13 +3,25 @@ Database models for the Games Industry Jobs Dashboard.
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, Index, UniqueConstraint
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, ForeignKey, Float, Index, UniqueConstraint, LargeBinary
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.sql import func
 
+from app.dialects import to_epoch_day, to_epoch_month
+
 Base = declarative_base()
 
 
+def _default_posting_day(context):
+    params = context.get_current_parameters()
+    return to_epoch_day(params.get("posting_date") or params.get("scraped_date") or datetime.now())
+
+
+def _default_posting_month(context):
+    params = context.get_current_parameters()
+    return to_epoch_month(params.get("posting_date") or params.get("scraped_date") or datetime.now())
+
+
 class JobListing(Base):
     """Job listing model."""
     
@@ -20,13 +32,24 @@ class JobListing(Base):
     title = Column(String, nullable=False, index=True)
     company = Column(String, nullable=False, index=True)
     location = Column(String, index=True)
+    region = Column(String, nullable=True, index=True)  # Gazetteer region slug, e.g. "south-west"
+    nation = Column(String, nullable=True, index=True)  # Gazetteer nation slug, e.g. "wales"
     description = Column(Text)
     salary = Column(String, nullable=True)
     posting_date = Column(DateTime, index=True)
+    # posting_date (first scraped_date if unknown) as days / months since 1970-01-01, so
+    # day, week and month buckets are integer arithmetic on an index
+    # (app.dialects.to_epoch_day, to_epoch_month, epoch_bucket)
+    posting_day = Column(Integer, default=_default_posting_day, index=True)
+    posting_month = Column(Integer, default=_default_posting_month, index=True)
     scraped_date = Column(DateTime, default=func.now(), index=True)
     source_website = Column(String, index=True)
     content_hash = Column(String(64), index=True)  # For duplicate detection
     is_active = Column(Integer, default=1)  # 1 = active, 0 = removed/expired
+    # Last change to aggregated data (description / keywords, is_active), for incremental refreshes
+    updated_at = Column(DateTime, default=datetime.now, nullable=True, index=True)
+    # Set when this posting is a near-duplicate (e.g. cross-posted on another site)
+    canonical_job_id = Column(Integer, ForeignKey("job_listings.id"), nullable=True, index=True)
     
     # Relationships
     keyword_occurrences = relationship("KeywordOccurrence", back_populates="job")
@@ -36,13 +59,51 @@ class JobListing(Base):
         UniqueConstraint('url', 'company', 'title', name='uq_job_listing'),
         Index('idx_posting_date', 'posting_date'),
         Index('idx_location_date', 'location', 'posting_date'),
+        Index('idx_location_month', 'location', 'posting_month'),  # RegionalSummary partitions
         Index('idx_company_date', 'company', 'posting_date'),
+        # Partial indexes over live postings only (PostgreSQL and SQLite)
+        Index('idx_active_source_scraped', 'source_website', 'scraped_date',
+              postgresql_where=is_active != 0, sqlite_where=is_active != 0),
+        # Also the keyset for cursor pagination, read backwards (app.pagination)
+        Index('idx_active_posting_date', 'posting_date', 'id',
+              postgresql_where=is_active != 0, sqlite_where=is_active != 0),
     )
     
     def __repr__(self):
         return f"<JobListing(id={self.id}, title='{self.title}', company='{self.company}')>"
 
 
+class JobSignature(Base):
+    """MinHash signature of a canonical job listing, for near-duplicate detection."""
+    
+    __tablename__ = "job_signatures"
+    
+    job_id = Column(Integer, ForeignKey("job_listings.id"), primary_key=True)
+    signature = Column(LargeBinary, nullable=False)  # app.nlp.minhash signature bytes
+    
+    def __repr__(self):
+        return f"<JobSignature(job_id={self.job_id})>"
+
+
+class JobLshBucket(Base):
+    """LSH band buckets of a job's MinHash signature; jobs sharing a bucket are duplicate candidates."""
+    
+    __tablename__ = "job_lsh_buckets"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    band = Column(Integer, nullable=False)
+    bucket = Column(BigInteger, nullable=False)
+    job_id = Column(Integer, ForeignKey("job_listings.id"), nullable=False, index=True)
+    
+    __table_args__ = (
+        UniqueConstraint('job_id', 'band', name='uq_job_lsh_band'),
+        Index('idx_lsh_band_bucket', 'band', 'bucket'),
+    )
+    
+    def __repr__(self):
+        return f"<JobLshBucket(band={self.band}, bucket={self.bucket}, job_id={self.job_id})>"
+
+
 class Keyword(Base):
     """Keyword model for skills, software, and experience tracking."""
     
@@ -88,6 +149,18 @@ class KeywordOccurrence(Base):
         return f"<KeywordOccurrence(job_id={self.job_id}, keyword_id={self.keyword_id}, frequency={self.frequency})>"
 
 
+class RefreshWatermark(Base):
+    """High-water mark of an incremental refresh job: job_listings.updated_at already processed."""
+    
+    __tablename__ = "refresh_watermarks"
+    
+    name = Column(String, primary_key=True)  # e.g. "regional_summary"
+    value = Column(DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f"<RefreshWatermark(name='{self.name}', value={self.value})>"
+
+
 class RegionalSummary(Base):
     """Pre-aggregated regional data for faster dashboard queries."""
     
@@ -112,6 +185,83 @@ class RegionalSummary(Base):
         return f"<RegionalSummary(region='{self.region}', date={self.date}, count={self.count})>"
 
 
+class KeywordDailyFact(Base):
+    """
+    Daily keyword rollup: jobs mentioning a keyword per posting day, region and
+    source (see app.services.scheduler.populate_daily_facts). Near-duplicates are counted once.
+    """
+    
+    __tablename__ = "keyword_daily_facts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Integer, nullable=False)  # JobListing.posting_day
+    month = Column(Integer, nullable=False)  # JobListing.posting_month, for monthly buckets
+    keyword_id = Column(Integer, ForeignKey("keywords.id"), nullable=False)
+    region = Column(String, nullable=False, default="")  # Gazetteer region slug, "" if unknown
+    source = Column(String, nullable=False, default="")  # source_website, "" if unknown
+    job_count = Column(Integer, nullable=False, default=0)  # Distinct jobs
+    occurrences = Column(Integer, nullable=False, default=0)  # Sum of keyword frequencies
+    
+    __table_args__ = (
+        UniqueConstraint('day', 'keyword_id', 'region', 'source', name='uq_keyword_daily_fact'),
+        Index('idx_keyword_fact_keyword_day', 'keyword_id', 'day'),
+    )
+    
+    def __repr__(self):
+        return f"<KeywordDailyFact(day={self.day}, keyword_id={self.keyword_id}, job_count={self.job_count})>"
+
+
+class JobDailyFact(Base):
+    """Daily job rollup: jobs per posting day, region and source. Near-duplicates are counted once."""
+    
+    __tablename__ = "job_daily_facts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Integer, nullable=False)  # JobListing.posting_day
+    region = Column(String, nullable=False, default="")
+    source = Column(String, nullable=False, default="")
+    job_count = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        UniqueConstraint('day', 'region', 'source', name='uq_job_daily_fact'),
+    )
+    
+    def __repr__(self):
+        return f"<JobDailyFact(day={self.day}, region='{self.region}', job_count={self.job_count})>"
+
+
+class StaleFactDay(Base):
+    """
+    Posting day a job moved away from (JobIngestor refresh changed its posting_day).
+    The next populate_daily_facts recomputes it along with the days of updated jobs.
+    """
+
+    __tablename__ = "stale_fact_days"
+
+    day = Column(Integer, primary_key=True)  # JobListing.posting_day
+    marked_at = Column(DateTime, nullable=False)  # Compared with the refresh start, like RefreshWatermark
+
+    def __repr__(self):
+        return f"<StaleFactDay(day={self.day}, marked_at={self.marked_at})>"
+
+
+class StaleSummaryPartition(Base):
+    """
+    RegionalSummary (region, month) partition a job moved away from (JobIngestor
+    refresh changed its location or posting_month). The next populate_regional_summary
+    recomputes it along with the partitions of updated jobs.
+    """
+
+    __tablename__ = "stale_summary_partitions"
+
+    region = Column(String, primary_key=True)  # JobListing.location
+    month = Column(Integer, primary_key=True)  # JobListing.posting_month
+    marked_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<StaleSummaryPartition(region='{self.region}', month={self.month})>"
+
+
 class ScraperRun(Base):
     """Tracks scraper execution history."""
     
@@ -126,6 +276,9 @@ class ScraperRun(Base):
     errors_count = Column(Integer, default=0)
     status = Column(String, default="running")  # running, completed, failed
     
+    # Relationships
+    spiders = relationship("ScraperRunSpider", back_populates="run")
+    
     __table_args__ = (
         Index('idx_start_time', 'start_time'),
         Index('idx_source_status', 'source_website', 'status'),
@@ -133,3 +286,39 @@ class ScraperRun(Base):
     
     def __repr__(self):
         return f"<ScraperRun(id={self.id}, source='{self.source_website}', status='{self.status}')>"
+
+
+class ScraperRunSpider(Base):
+    """Per-spider metrics of a scraper run, collected from Scrapy stats at spider close."""
+    
+    __tablename__ = "scraper_run_spiders"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(Integer, ForeignKey("scraper_runs.id"), nullable=True, index=True)  # None for ad-hoc crawls
+    spider = Column(String, nullable=False, index=True)
+    start_time = Column(DateTime, nullable=True)
+    end_time = Column(DateTime, nullable=True)
+    finish_reason = Column(String, nullable=True)  # finished, shutdown, closespider_*, ...
+    source_website = Column(String, nullable=True, index=True)  # source_website of the scraped items
+    # 1 if the crawl saw (or touched) every live job of its source, so unseen jobs can be expired
+    full_crawl = Column(Integer, default=0)
+    items_scraped = Column(Integer, default=0)
+    items_dropped = Column(Integer, default=0)
+    items_saved = Column(Integer, default=0)
+    items_updated = Column(Integer, default=0)
+    near_duplicates = Column(Integer, default=0)
+    requests = Column(Integer, default=0)
+    response_bytes = Column(Integer, default=0)
+    errors_count = Column(Integer, default=0)
+    pipeline_seconds = Column(Float, default=0.0)  # Time spent writing batches to the database
+    extraction_seconds = Column(Float, default=0.0)  # Time spent in keyword extraction
+    
+    # Relationships
+    run = relationship("ScraperRun", back_populates="spiders")
+    
+    __table_args__ = (
+        Index('idx_spider_start_time', 'spider', 'start_time'),
+    )
+    
+    def __repr__(self):
+        return f"<ScraperRunSpider(run_id={self.run_id}, spider='{self.spider}', items_scraped={self.items_scraped})>"
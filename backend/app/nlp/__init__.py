@@ -0,0 +1,36 @@
+"""
+Keyword extraction backends.
+
+Use create_extractor() to build the backend selected in configuration; spaCy is
+only imported when a spaCy engine is requested.
+"""
+
+import os
+
+# "model"/"blank" are spaCy engines (see keyword_extractor.ENGINES);
+# "aho_corasick" is the pure-Python automaton backend.
+EXTRACTOR_ENGINES = ("model", "blank", "aho_corasick")
+
+
+def create_extractor(config_path: str = "config/keywords.yaml", engine: str = None):
+    """
+    Build a keyword extractor.
+
+    Args:
+        config_path: Path to the keywords configuration YAML file
+        engine: One of EXTRACTOR_ENGINES; defaults to the KEYWORD_EXTRACTOR_ENGINE
+                environment variable, then "blank"
+
+    Returns:
+        An extractor exposing extract / extract_with_counts / extract_many
+    """
+    engine = engine or os.getenv("KEYWORD_EXTRACTOR_ENGINE", "blank")
+    if engine not in EXTRACTOR_ENGINES:
+        raise ValueError(f"Unknown extraction engine '{engine}', expected one of {EXTRACTOR_ENGINES}")
+
+    if engine == "aho_corasick":
+        from app.nlp.aho_corasick import AhoCorasickExtractor
+        return AhoCorasickExtractor(config_path)
+
+    from app.nlp.keyword_extractor import KeywordExtractor
+    return KeywordExtractor(config_path, engine=engine)
@@ -0,0 +1,208 @@
+"""
+spaCy-free keyword extraction backend built on an Aho-Corasick automaton.
+
+All configured keywords (every category) are compiled into a single automaton,
+so each description is scanned in one linear, case-insensitive pass. A match
+only counts when it lines up with spaCy's tokens the way the keyword does
+(app.nlp.token_boundaries), as the spaCy engines' PhraseMatcher requires: "C"
+does not match inside "C++", nor "Unity" inside "Unity.net" or a URL, while
+"C++/C#" still yields both. See token_boundaries for the few tokenizer rules
+that are not reproduced.
+"""
+
+from collections import Counter, deque
+from itertools import product
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Tuple
+import logging
+
+from app.nlp.keywords_config import (
+    load_keywords_config, keywords_config_version, build_keyword_index, counts_by_category
+)
+from app.nlp.token_boundaries import token_edges
+
+logger = logging.getLogger(__name__)
+
+
+def _fold_case(text: str) -> str:
+    """
+    Lowercase text without changing its length, so match offsets stay valid
+    for the original text. Characters whose lowercase form is longer (e.g.
+    "İ" -> "i̇") are kept as they are.
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(char if len(char.lower()) != 1 else char.lower() for char in text)
+
+
+class AhoCorasickMatcher:
+    """
+    Case-insensitive multi-pattern matcher aligned on spaCy tokens.
+
+    Patterns are added with an arbitrary payload, then compiled once with
+    build(). find_all() reports every (start, end, payload) occurrence,
+    including overlapping ones, whose token edges are exactly those of the
+    pattern, i.e. where PhraseMatcher would match the same tokens.
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[Tuple[int, FrozenSet[int], object]]] = [[]]
+        self._built = False
+
+    def add(self, pattern: str, payload) -> None:
+        """
+        Add a pattern; matching is done on its lowercased form. As with
+        PhraseMatcher, which compares token sequences, the pattern's tokens may
+        be separated by a single space or none ("C #" matches "C#").
+        """
+        edges = sorted(token_edges(pattern))
+        tokens = [_fold_case(pattern[start:end]) for start, end in zip(edges, edges[1:])
+                  if not pattern[start:end].isspace()]
+        for separators in product(("", " "), repeat=max(len(tokens) - 1, 0)):
+            variant = tokens[0] if tokens else ""
+            variant_edges = {0, len(variant)}
+            for separator, token in zip(separators, tokens[1:]):
+                variant += separator
+                variant_edges.add(len(variant))
+                variant += token
+                variant_edges.add(len(variant))
+            self._add_variant(variant, frozenset(variant_edges), payload)
+
+    def _add_variant(self, variant: str, edges: FrozenSet[int], payload) -> None:
+        if not variant:
+            return
+        node = 0
+        for char in variant:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+                self._goto[node][char] = next_node
+            node = next_node
+        self._outputs[node].append((len(variant), edges, payload))
+        self._built = False
+
+    def build(self) -> None:
+        """Compute failure links (breadth-first) and merge suffix outputs."""
+        queue = deque()
+        for node in self._goto[0].values():
+            self._fail[node] = 0
+            queue.append(node)
+
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+
+        self._built = True
+
+    def find_all(self, text: str) -> Iterator[Tuple[int, int, object]]:
+        """
+        Scan text once and yield (start, end, payload) for every match.
+        Offsets refer to text.
+        """
+        if not self._built:
+            self.build()
+
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        folded = _fold_case(text)
+        length = len(folded)
+        node = 0
+
+        for index, char in enumerate(folded):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+
+            if not outputs[node]:
+                continue
+
+            end = index + 1
+            # Cheap rejection first: the tokenizer never splits between two letters
+            if end < length and text[end].isalpha() and text[index].isalpha():
+                continue
+            for pattern_length, pattern_edges, payload in outputs[node]:
+                start = end - pattern_length
+                if start > 0 and text[start - 1].isalpha() and text[start].isalpha():
+                    continue
+                if token_edges(text, start, end) == {start + edge for edge in pattern_edges}:
+                    yield start, end, payload
+
+
+class AhoCorasickExtractor:
+    """
+    Extracts games industry related keywords from text without spaCy.
+    Drop-in alternative to KeywordExtractor with the same output contract.
+    """
+
+    def __init__(self, config_path: str = "config/keywords.yaml"):
+        """
+        Initialize the extractor.
+
+        Args:
+            config_path: Path to the keywords configuration YAML file
+        """
+        self.config_path = config_path
+        self.keywords_config = load_keywords_config(config_path)
+        self.config_version = keywords_config_version(self.keywords_config, "aho_corasick")
+        # keyword ID -> (canonical keyword, categories)
+        self.keyword_index = build_keyword_index(self.keywords_config)
+        self.matcher = self._build_matcher()
+
+    def _build_matcher(self) -> AhoCorasickMatcher:
+        """Compile every keyword of the config into one automaton, keyed by keyword ID."""
+        matcher = AhoCorasickMatcher()
+        for keyword_id, (keyword, _) in self.keyword_index.items():
+            matcher.add(keyword, keyword_id)
+        matcher.build()
+        return matcher
+
+    def _count_ids(self, text: str) -> Dict[int, int]:
+        """Count the matches of one text by keyword ID."""
+        if not text:
+            return {}
+        return dict(Counter(keyword_id for _, _, keyword_id in self.matcher.find_all(text)))
+
+    def extract(self, text: str) -> Dict[str, List[str]]:
+        """
+        Extract keywords from text.
+
+        Args:
+            text: Job description or text to analyze
+
+        Returns:
+            Dictionary with categories as keys and lists of found keywords as values
+        """
+        counts = self.extract_with_counts(text)
+        return {category: sorted(keywords) for category, keywords in counts.items()}
+
+    def extract_with_counts(self, text: str) -> Dict[str, Dict[str, int]]:
+        """
+        Extract keywords and their occurrence counts.
+        """
+        return counts_by_category(self.keyword_index, self._count_ids(text))
+
+    def extract_many(self, texts: Iterable[str], batch_size: int = 256) -> Iterator[Dict[str, Dict[str, int]]]:
+        """
+        Extract keyword counts from many texts, one result per text in input order.
+        batch_size is accepted for API compatibility with KeywordExtractor.
+        """
+        for text in texts:
+            yield self.extract_with_counts(text)
+
+    def extract_ids_many(self, texts: Iterable[str], batch_size: int = 256) -> Iterator[Dict[int, int]]:
+        """
+        Count keyword matches by keyword ID (see keywords_config.keyword_id),
+        one {keyword ID: count} dictionary per text in input order.
+        """
+        for text in texts:
+            yield self._count_ids(text)
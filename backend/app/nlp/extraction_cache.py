@@ -0,0 +1,244 @@
+"""
+Content-hash keyed cache for keyword extraction results.
+
+Results are keyed by (sha256 of the description, keyword-config version), so an
+unchanged description is never re-extracted while the keyword config and
+engine stay the same. Two tiers:
+  - an in-process LRU with a bounded number of entries
+  - an optional SQLite sidecar file shared by every spider process, bounded
+    by max_disk_entries and written once per batch of results
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import logging
+
+from app.nlp.keywords_config import counts_by_category
+
+logger = logging.getLogger(__name__)
+
+# Digests per SELECT ... IN (...), below SQLite's bind parameter limit
+_SQL_CHUNK_SIZE = 500
+
+
+def text_digest(text: str) -> str:
+    """Return the sha256 hex digest used as the cache key for a description."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """Two-tier (memory LRU + SQLite) store of JSON-serializable extraction results."""
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 10000, max_disk_entries: int = 500000):
+        """
+        Args:
+            path: SQLite sidecar file for the persistent tier (None = memory only)
+            max_entries: Maximum number of results kept in the in-process LRU
+            max_disk_entries: Maximum number of results kept in the SQLite tier;
+                beyond it, results of other config versions and then the oldest
+                ones are evicted
+        """
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[tuple, List]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._disk_entries = 0  # Upper bound: replaced rows and other processes' evictions are not tracked
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if path:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(extraction_cache)")]
+            if columns and "stored_at" not in columns:
+                # Layout without eviction timestamps: it is only a cache, start over
+                self._conn.execute("DROP TABLE extraction_cache")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS extraction_cache ("
+                " digest TEXT NOT NULL,"
+                " config_version TEXT NOT NULL,"
+                " result TEXT NOT NULL,"
+                " stored_at REAL NOT NULL,"
+                " PRIMARY KEY (digest, config_version))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_extraction_cache_stored_at ON extraction_cache (stored_at)")
+            self._conn.commit()
+            self._disk_entries = self._conn.execute("SELECT COUNT(*) FROM extraction_cache").fetchone()[0]
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters since the cache was opened, suitable for the scrapy stats collector."""
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
+
+    def get(self, digest: str, config_version: str) -> Optional[List]:
+        """Look up a result, promoting disk hits into the memory tier."""
+        found, _ = self.get_many([digest], config_version)
+        return found.get(digest)
+
+    def get_many(self, digests: Iterable[str], config_version: str) -> Tuple[Dict[str, List], Dict[str, int]]:
+        """
+        Look up several results, promoting disk hits into the memory tier.
+
+        Returns:
+            ({digest: result} of the cached digests, hit/miss counters of this lookup)
+        """
+        found = {}
+        counts = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0}
+        with self._lock:
+            on_disk = []
+            for digest in dict.fromkeys(digests):
+                key = (digest, config_version)
+                result = self._memory.get(key)
+                if result is None:
+                    on_disk.append(digest)
+                    continue
+                self._memory.move_to_end(key)
+                found[digest] = result
+                counts["memory_hits"] += 1
+
+            if self._conn is not None:
+                for start in range(0, len(on_disk), _SQL_CHUNK_SIZE):
+                    chunk = on_disk[start:start + _SQL_CHUNK_SIZE]
+                    rows = self._conn.execute(
+                        "SELECT digest, result FROM extraction_cache"
+                        f" WHERE config_version = ? AND digest IN ({', '.join('?' * len(chunk))})",
+                        (config_version, *chunk)
+                    )
+                    for digest, result in rows:
+                        found[digest] = json.loads(result)
+                        self._remember((digest, config_version), found[digest])
+                        counts["disk_hits"] += 1
+
+            counts["hits"] = counts["memory_hits"] + counts["disk_hits"]
+            counts["misses"] = len(on_disk) - counts["disk_hits"]
+            self.memory_hits += counts["memory_hits"]
+            self.disk_hits += counts["disk_hits"]
+            self.misses += counts["misses"]
+        return found, counts
+
+    def put(self, digest: str, config_version: str, result: List) -> None:
+        """Store a result in both tiers."""
+        self.put_many({digest: result}, config_version)
+
+    def put_many(self, results: Dict[str, List], config_version: str) -> None:
+        """Store {digest: result} in both tiers, with a single SQLite commit."""
+        if not results:
+            return
+        with self._lock:
+            for digest, result in results.items():
+                self._remember((digest, config_version), result)
+            if self._conn is None:
+                return
+            stored_at = time.time()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO extraction_cache (digest, config_version, result, stored_at)"
+                " VALUES (?, ?, ?, ?)",
+                [(digest, config_version, json.dumps(result), stored_at) for digest, result in results.items()]
+            )
+            self._disk_entries += len(results)
+            if self._disk_entries > self.max_disk_entries:
+                self._evict(config_version)
+            self._conn.commit()
+
+    def _evict(self, config_version: str) -> None:
+        """Trim the SQLite tier to 90% of max_disk_entries: other config versions first, then the oldest."""
+        self._disk_entries = self._conn.execute("SELECT COUNT(*) FROM extraction_cache").fetchone()[0]
+        excess = self._disk_entries - int(self.max_disk_entries * 0.9)
+        if excess <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM extraction_cache WHERE rowid IN ("
+            " SELECT rowid FROM extraction_cache ORDER BY config_version = ?, stored_at LIMIT ?)",
+            (config_version, excess)
+        )
+        self._disk_entries -= excess
+        logger.info(f"Evicted {excess} extraction cache entries")
+
+    def _remember(self, key: tuple, result: List) -> None:
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def close(self) -> None:
+        """Close the persistent tier."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class CachedExtractor:
+    """
+    Wraps any extractor backend (see app.nlp.create_extractor) and serves
+    extract_with_counts / extract_many / extract_ids_many results from an
+    ExtractionCache. The cache holds {keyword ID: count} per description, as
+    [[id, count], ...] pairs (JSON object keys would turn the IDs into strings).
+    """
+
+    def __init__(self, extractor, cache: ExtractionCache):
+        self.extractor = extractor
+        self.cache = cache
+        self.config_version = extractor.config_version
+        self.keyword_index = extractor.keyword_index
+
+    def extract(self, text: str):
+        return self.extractor.extract(text)
+
+    def extract_with_counts(self, text: str) -> Dict[str, Dict[str, int]]:
+        if not text:
+            return {}
+        return next(self.extract_many([text], batch_size=1))
+
+    def extract_many(self, texts: Iterable[str], batch_size: int = 256) -> Iterator[Dict[str, Dict[str, int]]]:
+        for id_counts in self.extract_ids_many(texts, batch_size=batch_size):
+            yield counts_by_category(self.keyword_index, id_counts)
+
+    def extract_ids_many(self, texts: Iterable[str], batch_size: int = 256,
+                         cache_stats: Optional[Dict[str, int]] = None) -> Iterator[Dict[int, int]]:
+        """
+        Serve cached results and only run the wrapped extractor on misses.
+
+        Args:
+            cache_stats: Optional dict incremented with this call's hit/miss counters
+                (the cache may be shared, so its own totals mix several callers)
+        """
+        texts = [text or "" for text in texts]
+        digests = [text_digest(text) for text in texts]
+
+        # Look up (and, on a miss, extract) each distinct text once
+        cached, counts = self.cache.get_many([digest for text, digest in zip(texts, digests) if text],
+                                             self.config_version)
+        if cache_stats is not None:
+            for key, value in counts.items():
+                cache_stats[key] = cache_stats.get(key, 0) + value
+        found = {digest: dict(result) for digest, result in cached.items()}
+        missing = {digest: text for text, digest in zip(texts, digests) if text and digest not in found}
+
+        if missing:
+            extracted = list(self.extractor.extract_ids_many(missing.values(), batch_size=batch_size))
+            found.update(zip(missing, extracted))
+            self.cache.put_many({digest: sorted(result.items()) for digest, result in zip(missing, extracted)},
+                                self.config_version)
+
+        for text, digest in zip(texts, digests):
+            yield found[digest] if text else {}
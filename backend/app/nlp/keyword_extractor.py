@@ -1,32 +1,48 @@
 import spacy
-import yaml
-from pathlib import Path
-from typing import List, Dict, Set, Tuple
+from typing import List, Dict, Set, Tuple, Iterable, Iterator
 from collections import Counter
 import logging
 
+from app.nlp.keywords_config import (
+    load_keywords_config, keywords_config_version, build_keyword_index, counts_by_category
+)
+
 # Configure logger
 logger = logging.getLogger(__name__)
 
+# "model" loads en_core_web_sm; "blank" only builds the English tokenizer/vocab.
+# Matching uses LOWER token attributes only, so both engines find the same keywords.
+ENGINES = ("model", "blank")
+
 class KeywordExtractor:
     """
     Extracts games industry related keywords from text using spaCy and a configuration file.
     """
     
-    def __init__(self, config_path: str = "config/keywords.yaml"):
+    def __init__(self, config_path: str = "config/keywords.yaml", engine: str = "model"):
         """
         Initialize the extractor.
         
         Args:
             config_path: Path to the keywords configuration YAML file
+            engine: "model" to load en_core_web_sm, or "blank" for a tokenizer-only
+                    spacy.blank("en") pipeline (no model load or download)
         """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown extraction engine '{engine}', expected one of {ENGINES}")
         self.config_path = config_path
+        self.engine = engine
         self.nlp = self._load_spacy_model()
         self.keywords_config = self._load_config()
+        self.config_version = keywords_config_version(self.keywords_config, engine)
+        # keyword ID -> (canonical keyword, categories)
+        self.keyword_index = build_keyword_index(self.keywords_config)
         self.matcher = self._build_matcher()
         
     def _load_spacy_model(self):
-        """Load spaCy model (en_core_web_sm)."""
+        """Load spaCy model (en_core_web_sm), or a blank English pipeline for the "blank" engine."""
+        if self.engine == "blank":
+            return spacy.blank("en")
         try:
             return spacy.load("en_core_web_sm")
         except OSError:
@@ -37,47 +53,28 @@ class KeywordExtractor:
 
     def _load_config(self) -> Dict:
         """Load keywords from YAML configuration."""
-        try:
-            # Adjust path if running from different contexts
-            path = Path(self.config_path)
-            if not path.exists():
-                # Try finding it relative to project root if not found
-                # Assuming this runs from backend/ or scraper/
-                possible_paths = [
-                    Path("config/keywords.yaml"),
-                    Path("../config/keywords.yaml"),
-                    Path("../../config/keywords.yaml"),
-                     Path("c:/Users/kabil/OneDrive/Desktop/Gaming_industry/config/keywords.yaml")
-                ]
-                for p in possible_paths:
-                    if p.exists():
-                        path = p
-                        break
-            
-            with open(path, "r", encoding="utf-8") as f:
-                return yaml.safe_load(f)
-        except Exception as e:
-            logger.error(f"Failed to load keywords config: {e}")
-            return {"skills": [], "software": [], "experience": []}
+        return load_keywords_config(self.config_path)
 
     def _build_matcher(self):
-        """Build spaCy PhraseMatcher for efficient keyword matching."""
+        """
+        Build spaCy PhraseMatcher for efficient keyword matching.
+        Each keyword gets its own match key, mapped back to its keyword ID.
+        """
         from spacy.matcher import PhraseMatcher
         matcher = PhraseMatcher(self.nlp.vocab, attr="LOWER")
+        self._match_keyword_ids = {}
         
-        # Iterate through categories in config
-        for category, items in self.keywords_config.items():
-            if not items:
-                continue
-                
-            # Create patterns for each keyword
-            patterns = [self.nlp.make_doc(str(item)) for item in items if item]
-            
-            # Add to matcher with category as ID
-            matcher.add(category, patterns)
+        for keyword_id, (keyword, _) in self.keyword_index.items():
+            match_key = f"keyword:{keyword_id}"
+            matcher.add(match_key, [self.nlp.make_doc(keyword)])
+            self._match_keyword_ids[self.nlp.vocab.strings[match_key]] = keyword_id
             
         return matcher
 
+    def _match_keyword_id_counts(self, doc) -> Counter:
+        """Count matches in a tokenized doc by keyword ID."""
+        return Counter(self._match_keyword_ids[match_id] for match_id, _, _ in self.matcher(doc))
+
     def extract(self, text: str) -> Dict[str, List[str]]:
         """
         Extract keywords from text.
@@ -92,29 +89,10 @@ class KeywordExtractor:
         if not text:
             return {}
             
-        doc = self.nlp(text)
-        matches = self.matcher(doc)
-        
-        found_keywords = {
-            "skills": set(),
-            "software": set(),
-            "experience": set()
-        }
-        
-        # Process matches
-        for match_id, start, end in matches:
-            category = self.nlp.vocab.strings[match_id]
-            span = doc[start:end]
-            keyword = span.text
-            
-            # Add to appropriate category
-            if category in found_keywords:
-                # Store original casing from config is hard, for now store matches
-                # We could map back to canonical form if needed
-                found_keywords[category].add(keyword)
-                
-        # Convert sets to sorted lists
-        return {k: sorted(list(v)) for k, v in found_keywords.items() if v}
+        # Matching only needs tokens, so skip the rest of the pipeline
+        doc = self.nlp.make_doc(text)
+        counts = counts_by_category(self.keyword_index, self._match_keyword_id_counts(doc))
+        return {category: sorted(keywords) for category, keywords in counts.items()}
 
     def extract_with_counts(self, text: str) -> Dict[str, Dict[str, int]]:
         """
@@ -122,25 +100,41 @@ class KeywordExtractor:
         """
         if not text:
             return {}
-            
-        doc = self.nlp(text)
-        matches = self.matcher(doc)
-        
-        counts = {
-            "skills": Counter(),
-            "software": Counter(),
-            "experience": Counter()
-        }
-        
-        for match_id, start, end in matches:
-            category = self.nlp.vocab.strings[match_id]
-            span = doc[start:end]
-            keyword = span.text
-            
-            if category in counts:
-                counts[category][keyword] += 1
-                
-        return {k: dict(v) for k, v in counts.items() if v}
+
+        return next(self.extract_many([text], batch_size=1))
+
+    def extract_many(self, texts: Iterable[str], batch_size: int = 256) -> Iterator[Dict[str, Dict[str, int]]]:
+        """
+        Extract keyword counts from many texts in one streamed pass.
+
+        Args:
+            texts: Iterable of job descriptions (None/empty entries are allowed)
+            batch_size: Number of texts buffered per nlp.pipe batch
+
+        Yields:
+            One extract_with_counts-style dictionary per input text, in input order
+        """
+        for id_counts in self.extract_ids_many(texts, batch_size=batch_size):
+            yield counts_by_category(self.keyword_index, id_counts)
+
+    def extract_ids_many(self, texts: Iterable[str], batch_size: int = 256) -> Iterator[Dict[int, int]]:
+        """
+        Count keyword matches by keyword ID (see keywords_config.keyword_id).
+
+        The PhraseMatcher only compares the LOWER attribute of tokens, so every
+        pipeline component (tagger, parser, NER, lemmatizer) is disabled and the
+        texts only go through the tokenizer.
+
+        Yields:
+            One {keyword ID: count} dictionary per input text, in input order
+        """
+        docs = self.nlp.pipe(
+            (text or "" for text in texts),
+            batch_size=batch_size,
+            disable=self.nlp.pipe_names,
+        )
+        for doc in docs:
+            yield dict(self._match_keyword_id_counts(doc))
 
 # Singleton instance for easy import
 # extractor = KeywordExtractor()
@@ -0,0 +1,116 @@
+"""
+Loading of the client keyword configuration (config/keywords.yaml).
+Shared by every extraction backend, and free of any spaCy import.
+"""
+
+import hashlib
+import json
+import yaml
+from pathlib import Path
+from typing import Dict, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the shape of extraction results changes (cached results are keyed on it)
+KEYWORD_RESULT_FORMAT = 3
+
+# Categories reported by the extractors (other config sections, e.g. roles, are not matched)
+EXTRACTED_CATEGORIES = ("skills", "software", "experience")
+
+
+def load_keywords_config(config_path: str = "config/keywords.yaml") -> Dict:
+    """Load keywords from YAML configuration."""
+    try:
+        # Adjust path if running from different contexts
+        path = Path(config_path)
+        if not path.exists():
+            # Try finding it relative to project root if not found
+            # Assuming this runs from backend/ or scraper/
+            possible_paths = [
+                Path("config/keywords.yaml"),
+                Path("../config/keywords.yaml"),
+                Path("../../config/keywords.yaml"),
+                 Path("c:/Users/kabil/OneDrive/Desktop/Gaming_industry/config/keywords.yaml")
+            ]
+            for p in possible_paths:
+                if p.exists():
+                    path = p
+                    break
+        
+        with open(path, "r", encoding="utf-8") as f:
+            return yaml.safe_load(f)
+    except Exception as e:
+        logger.error(f"Failed to load keywords config: {e}")
+        return {"skills": [], "software": [], "experience": []}
+
+
+def keywords_config_version(keywords_config: Dict, engine: str) -> str:
+    """
+    Fingerprint of a loaded keyword config and the engine matching it.
+    Used to key cached extraction results, so editing keywords.yaml or
+    switching engines invalidates them.
+    """
+    payload = json.dumps(
+        {"engine": engine, "keywords": keywords_config, "format": KEYWORD_RESULT_FORMAT},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def keyword_slug(keyword: str) -> str:
+    """Canonical form of a keyword: lowercased, whitespace collapsed."""
+    return " ".join(str(keyword).lower().split())
+
+
+def keyword_id(keyword: str) -> int:
+    """
+    Stable integer ID of a keyword: the first 48 bits of the sha1 of its slug.
+    Depends only on the keyword itself, not on its position in keywords.yaml,
+    so adding or reordering keywords never renumbers the others.
+    """
+    return int.from_bytes(hashlib.sha1(keyword_slug(keyword).encode("utf-8")).digest()[:6], "big")
+
+
+def build_keyword_index(keywords_config: Dict) -> Dict[int, Tuple[str, Tuple[str, ...]]]:
+    """
+    Assign every configured keyword of EXTRACTED_CATEGORIES its stable ID
+    (see keyword_id).
+
+    A keyword listed more than once (ignoring case and spacing) gets a single
+    ID, with the first configured spelling as its canonical form, and is
+    reported under every category that lists it.
+
+    Returns:
+        Mapping of keyword ID -> (canonical keyword, categories listing it)
+    """
+    index = {}
+    for category, items in keywords_config.items():
+        if category not in EXTRACTED_CATEGORIES or not items:
+            continue
+        for item in items:
+            if not item:
+                continue
+            keyword = str(item)
+            entry_id = keyword_id(keyword)
+            canonical, categories = index.get(entry_id, (keyword, ()))
+            if keyword_slug(canonical) != keyword_slug(keyword):
+                raise ValueError(f"Keyword ID collision between '{canonical}' and '{keyword}'")
+            if category not in categories:
+                categories += (category,)
+            index[entry_id] = (canonical, categories)
+    return index
+
+
+def counts_by_category(keyword_index: Dict[int, Tuple[str, Tuple[str, ...]]],
+                       id_counts: Dict[int, int]) -> Dict[str, Dict[str, int]]:
+    """
+    Turn {keyword ID: count} into the extract_with_counts shape,
+    {category: {canonical keyword: count}}.
+    """
+    counts = {category: {} for category in EXTRACTED_CATEGORIES}
+    for entry_id, count in id_counts.items():
+        keyword, categories = keyword_index[entry_id]
+        for category in categories:
+            counts[category][keyword] = count
+    return {k: v for k, v in counts.items() if v}
@@ -0,0 +1,208 @@
+"""
+Token boundaries of spaCy's English tokenizer, without spaCy.
+
+The spaCy engines match keywords with a PhraseMatcher, i.e. on whole tokens,
+so "C" does not match inside "C++" and "Python" does not match inside
+"Python.net". The Aho-Corasick backend finds raw substrings; it keeps a match
+only when the token edges inside it (and at both ends) are exactly those of
+the keyword, computed here with the same rules spacy.blank("en") applies to
+each whitespace-separated chunk:
+
+  1. strip prefixes (opening punctuation and quotes, currency, "+" not
+     followed by a digit, ...) and suffixes (closing punctuation, "'s",
+     "." after a lowercase letter, a digit or punctuation, units after a
+     digit, ...) from the chunk's ends, alternately, until none are left
+  2. keep what remains whole if it looks like a URL (unity.com/careers)
+  3. otherwise split it on infixes: hyphens and ":<>=/" between letters or
+     digits and a letter, "," between letters, "." between a lowercase and
+     an uppercase letter, arithmetic signs between digits, ellipses
+
+Known differences from spaCy:
+  - tokenizer exceptions are not applied. Abbreviations ("e.g.") and
+    contractions ("don't") get different inner edges, which never changes a
+    keyword match. Emoticons that contain a digit or letter (":3", "<3", ":P")
+    are the exception: spaCy keeps them whole, so it finds no "3+ years" in
+    ":3+ years", but this module does
+  - spaCy's letter classes are approximated with str.isalpha / islower /
+    isupper, and its icon ranges with the "So" Unicode category
+  - spaCy skips private IP addresses in URLs; any dotted quad counts here
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import FrozenSet
+
+_PUNCT = frozenset("…,:;!?¿؟¡()[]{}<>_#*&。？！，、；：～·।،۔؛٪")
+_QUOTES = frozenset("'\"”“`‘´’‚,„»«「」『』（）〔〕【】《》〈〉〈〉⟦⟧")
+_CURRENCY = frozenset("$£€¥฿₽﷼₴₠₡₢₣₤₥₦₧₨₩₪₫₭₮₯₰₱₲₳₵₶₷₸₹₺₻₼₾₿")
+_MULTI_CURRENCY = ("US$", "C$", "A$")
+_UNITS = frozenset((
+    "km km² km³ m m² m³ dm dm² dm³ cm cm² cm³ mm mm² mm³ ha µm nm yd in ft kg g mg µg t lb oz "
+    "m/s km/h kmh mph hPa Pa mbar mb MB kb KB gb GB tb TB T G M K % "
+    "км км² км³ м м² м³ дм дм² дм³ см см² см³ мм мм² мм³ нм кг г мг м/с км/ч кПа Па мбар "
+    "Кб КБ кб Мб МБ мб Гб ГБ гб Тб ТБ"
+).split())
+_MAX_UNIT = max(len(unit) for unit in _UNITS)
+
+_PREFIX_CHARS = frozenset("§%=—–") | _PUNCT | _QUOTES | _CURRENCY
+_SUFFIX_CHARS = frozenset("—–") | _PUNCT | _QUOTES
+# Characters after which "." is split off as a suffix (besides digits and lowercase letters)
+_PERIOD_SUFFIX_AFTER = frozenset("%²-+|") | _PUNCT | _QUOTES
+_HYPHENS = ("-", "–", "—", "--", "---", "——", "~")
+
+_URL_RE = re.compile(
+    r"^(?:[\w+\-.]{2,}://)?"
+    r"(?:\S+(?::\S*)?@)?"
+    r"(?:\d{1,3}(?:\.\d{1,3}){3}"
+    r"|(?:(?:[A-Za-z0-9¡-￿][A-Za-z0-9¡-￿_-]{0,62})?[A-Za-z0-9¡-￿]\.)+"
+    r"[a-zß-öø-ÿ]{2,63})"
+    r"(?::\d{2,5})?(?:[/?#]\S*)?$"
+)
+
+
+def _is_digit(char: str) -> bool:
+    return "0" <= char <= "9"
+
+
+def _is_icon(char: str) -> bool:
+    return unicodedata.category(char) == "So"
+
+
+def _find_prefix(string: str) -> int:
+    """Length of the prefix spaCy splits off the start of string (0 if none)."""
+    first = string[0]
+    if first in _PREFIX_CHARS or _is_icon(first):
+        return 1
+    if first == "+":
+        return 0 if len(string) > 1 and _is_digit(string[1]) else 1
+    if string.startswith(".."):
+        return len(string) - len(string.lstrip("."))
+    for currency in _MULTI_CURRENCY:
+        if string.startswith(currency):
+            return len(currency)
+    return 0
+
+
+def _suffix_at(string: str, start: int) -> bool:
+    """Whether string[start:] is one of the suffixes (its lookbehind may see string[:start])."""
+    tail = string[start:]
+    before = string[start - 1] if start else ""
+    if len(tail) == 1:
+        if tail in _SUFFIX_CHARS or _is_icon(tail):
+            return True
+        if tail == "+":
+            return _is_digit(before)
+        if tail == ".":
+            if _is_digit(before) or before.islower() or before in _PERIOD_SUFFIX_AFTER:
+                return True
+            if start >= 2 and string[start - 2] == "°" and before in "FfCcKk":
+                return True
+            return start >= 2 and before.isupper() and string[start - 2].isupper()
+    if tail == "……" or tail in ("'s", "'S", "’s", "’S"):
+        return True
+    if _is_digit(before) and (tail in _CURRENCY or tail in _MULTI_CURRENCY or tail in _UNITS):
+        return True
+    return False
+
+
+def _find_suffix(string: str) -> int:
+    """Length of the suffix spaCy splits off the end of string (0 if none): the leftmost match wins."""
+    length = len(string)
+    if string.endswith(".."):
+        # A run of dots is the longest suffix that can end a string with two dots
+        return length - len(string.rstrip("."))
+    for start in range(max(length - _MAX_UNIT, 0), length):
+        if _suffix_at(string, start):
+            return length - start
+    return 0
+
+
+def _infix_at(string: str, index: int) -> int:
+    """Length of the infix starting at string[index] (0 if none)."""
+    char = string[index]
+    before = string[index - 1] if index else ""
+    after = string[index + 1] if index + 1 < len(string) else ""
+    if string.startswith("..", index):
+        return len(string[index:]) - len(string[index:].lstrip("."))
+    if char == "…" or _is_icon(char):
+        return 1
+    if char in "+-*^" and _is_digit(before) and (_is_digit(after) or after == "-"):
+        return 1
+    if char == "." and (before.islower() or before in _QUOTES) and (after.isupper() or after in _QUOTES):
+        return 1
+    if char == "," and before.isalpha() and after.isalpha():
+        return 1
+    if before.isalpha() or _is_digit(before):
+        for hyphen in _HYPHENS:
+            end = index + len(hyphen)
+            if string.startswith(hyphen, index) and end < len(string) and string[end].isalpha():
+                return len(hyphen)
+        if char in ":<>=/" and after.isalpha():
+            return 1
+    return 0
+
+
+@lru_cache(maxsize=65536)
+def chunk_token_edges(chunk: str) -> FrozenSet[int]:
+    """
+    Offsets at which tokens start or end in a whitespace-free chunk of text,
+    as tokenized by spacy.blank("en") (see the module docstring).
+    """
+    edges = {0, len(chunk)}
+    start, end = 0, len(chunk)
+    last_size = None
+    while start < end and end - start != last_size:
+        last_size = end - start
+        string = chunk[start:end]
+        prefix = _find_prefix(string)
+        suffix = _find_suffix(string[prefix:]) if prefix < len(string) else 0
+        if prefix and suffix and prefix + suffix <= len(string):
+            start, end = start + prefix, end - suffix
+        elif prefix:
+            start += prefix
+        elif suffix:
+            end -= suffix
+        edges.update((start, end))
+
+    middle = chunk[start:end]
+    if middle and not _URL_RE.match(middle):
+        index = 0
+        while index < len(middle):
+            length = _infix_at(middle, index)
+            if not length:
+                index += 1
+                continue
+            # An infix at the very start does not split (spaCy skips it)
+            if index:
+                edges.update((start + index, start + index + length))
+            index += length
+    return frozenset(edges)
+
+
+def token_edges(text: str, start: int = 0, end: int = None) -> FrozenSet[int]:
+    """
+    Token edges of text (offsets into text) that fall within [start, end].
+    Only the whitespace-separated chunks overlapping that range are tokenized.
+    """
+    end = len(text) if end is None else end
+    # Back up to the start of the chunk containing start
+    chunk_start = start
+    while chunk_start > 0 and not text[chunk_start - 1].isspace():
+        chunk_start -= 1
+
+    edges = set()
+    position = chunk_start
+    while position < end:
+        if text[position].isspace():
+            position += 1
+            continue
+        chunk_end = position
+        while chunk_end < len(text) and not text[chunk_end].isspace():
+            chunk_end += 1
+        edges.update(
+            position + offset for offset in chunk_token_edges(text[position:chunk_end])
+            if start <= position + offset <= end
+        )
+        position = chunk_end
+    return frozenset(edges)
@@ -0,0 +1,142 @@
+"""
+Keyset (cursor) pagination and optional totals for job listing endpoints.
+
+Job lists are ordered newest first by (posting_date, id), jobs without a
+posting date last. A page carries an opaque next_cursor encoding the last
+row's (posting_date, id); passing it back fetches the rows after it with a
+range condition on the (posting_date, id) index, so every page costs the
+same however deep the client scrolls. page=N (OFFSET) is still accepted
+for clients that jump to a page. Cursors only follow the date order, not
+search relevance.
+
+Totals are optional:
+  - exact: COUNT(*) of the filtered query (the old behaviour)
+  - estimate: the planner's row estimate on PostgreSQL (EXPLAIN). SQLite
+    keeps no such statistics, so there it is an exact COUNT(*) cached for
+    COUNT_CACHE_SECONDS: exact when computed, possibly stale afterwards
+  - none: no count at all
+"""
+
+import base64
+import json
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import tuple_
+
+from app.models import JobListing
+
+TOTAL_MODES = ("exact", "estimate", "none")
+COUNT_CACHE_SECONDS = 60
+_COUNT_CACHE_SIZE = 1000
+
+_count_cache = {}  # (database, sql, params) -> (expires_at, count)
+_count_lock = threading.Lock()
+
+
+def encode_cursor(job) -> str:
+    """Opaque cursor for the page following this job."""
+    posting_date = job.posting_date.isoformat() if job.posting_date else None
+    raw = json.dumps([posting_date, job.id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """(posting_date, id) from a cursor; raises ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        posting_date, job_id = json.loads(raw)
+        return (datetime.fromisoformat(posting_date) if posting_date else None), int(job_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def order_newest_first(query):
+    """Full list order, for OFFSET pages: dated jobs newest first, then undated ones."""
+    return query.order_by(JobListing.posting_date.desc().nulls_last(), JobListing.id.desc())
+
+
+def _dated_after(query, cursor_key):
+    query = query.filter(JobListing.posting_date != None)
+    if cursor_key:
+        query = query.filter(tuple_(JobListing.posting_date, JobListing.id) < tuple_(*cursor_key))
+    return query.order_by(JobListing.posting_date.desc(), JobListing.id.desc())
+
+
+def _undated_after(query, job_id):
+    query = query.filter(JobListing.posting_date == None)
+    if job_id is not None:
+        query = query.filter(JobListing.id < job_id)
+    return query.order_by(JobListing.id.desc())
+
+
+def keyset_page(query, page_size: int, cursor: Optional[str] = None, page: int = 1) -> Tuple[List, Optional[str]]:
+    """
+    One page of a JobListing query, newest first.
+
+    Cursor pages (and page 1) walk the list in two phases, each a plain
+    range scan of the (posting_date, id) index read backwards: dated jobs
+    by (posting_date, id) DESC, then undated jobs by id DESC. No NULLS LAST
+    ordering or OR in the condition, which would make the database sort
+    the whole result on every page.
+
+    Args:
+        query: Filtered, unordered JobListing query
+        page_size: Rows per page
+        cursor: next_cursor of the previous page (takes precedence over page)
+        page: 1-based page number, for OFFSET pagination without a cursor
+
+    Returns:
+        (rows, next_cursor); next_cursor is None on the last page
+    """
+    # One extra row tells whether there is a next page
+    limit = page_size + 1
+    if cursor:
+        posting_date, job_id = decode_cursor(cursor)
+        if posting_date is None:
+            rows = _undated_after(query, job_id).limit(limit).all()
+        else:
+            rows = _dated_after(query, (posting_date, job_id)).limit(limit).all()
+            if len(rows) < limit:
+                rows += _undated_after(query, None).limit(limit - len(rows)).all()
+    elif page == 1:
+        rows = _dated_after(query, None).limit(limit).all()
+        if len(rows) < limit:
+            rows += _undated_after(query, None).limit(limit - len(rows)).all()
+    else:
+        rows = order_newest_first(query).offset((page - 1) * page_size).limit(limit).all()
+
+    if len(rows) > page_size:
+        return rows[:page_size], encode_cursor(rows[page_size - 1])
+    return rows, None
+
+
+def count_rows(db, query, mode: str = "exact") -> Optional[int]:
+    """Total rows of a query according to mode (see TOTAL_MODES)."""
+    if mode == "none":
+        return None
+    query = query.order_by(None)
+    if mode == "exact":
+        return query.count()
+
+    bind = db.get_bind()
+    if bind.dialect.name == "postgresql":
+        compiled = query.statement.compile(dialect=bind.dialect)
+        plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    compiled = query.statement.compile(dialect=bind.dialect)
+    key = (str(bind.url), str(compiled), tuple(sorted((name, repr(value)) for name, value in compiled.params.items())))
+    now = time.monotonic()
+    with _count_lock:
+        cached = _count_cache.get(key)
+    if cached and cached[0] > now:
+        return cached[1]
+    total = query.count()
+    with _count_lock:
+        if len(_count_cache) >= _COUNT_CACHE_SIZE:
+            _count_cache.clear()
+        _count_cache[key] = (now + COUNT_CACHE_SECONDS, total)
+    return total
@@ -13,6 +13,8 @@ class JobListingBase(BaseModel):
     title: str
     company: str
     location: Optional[str] = None
+    region: Optional[str] = None
+    nation: Optional[str] = None
     description: Optional[str] = None
     salary: Optional[str] = None
     posting_date: Optional[datetime] = None
@@ -32,10 +34,11 @@ class JobListingResponse(JobListingBase):
 class PaginatedResponse(BaseModel, Generic[T]):
     """Generic paginated response."""
     items: List[T]
-    total: int
+    total: Optional[int] = None  # None with total=none
     page: int
     page_size: int
     total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # Pass as cursor= for the next page; None on the last page
 
 
 class KeywordResponse(BaseModel):
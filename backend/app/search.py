@@ -0,0 +1,202 @@
+"""
+Indexed keyword search over job titles and descriptions.
+
+The keyword matches as a case-insensitive substring of the title or the
+description, exactly like the ILIKE '%keyword%' filter it replaces ("gram"
+finds "programmer", "C++ p" finds "C++ programmer"); only the cost changes.
+
+SQLite: an external-content FTS5 table (job_listings_fts) with the trigram
+tokenizer, kept in sync with job_listings by triggers. A quoted keyword is a
+run of consecutive trigrams, i.e. a substring; results are ranked with bm25().
+PostgreSQL: the ILIKE filter itself, served by pg_trgm GIN indexes on title
+and description, ranked with ts_rank() over a stored generated tsvector
+column (job_listings.search_vector) when the keyword is made of plain words.
+Titles weigh more than descriptions in both.
+
+They are created by the f7d2a8c1b364 and b3e7f1a9c562 migrations, or by
+install() for databases set up with create_all (init_db). A later
+batch_alter_table on job_listings under SQLite recreates the table and drops
+the triggers; install() puts them back (it runs in init_db at startup).
+Keywords shorter than a trigram or holding LIKE wildcards (% and _), and
+SQLite builds without FTS5 trigram support, use a plain ILIKE scan.
+"""
+
+import logging
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import column, func, literal_column, select, table, text
+
+from app.models import JobListing
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "job_listings_fts"
+SEARCH_VECTOR = "search_vector"
+# Text search configuration (stemming) used on PostgreSQL
+TS_CONFIG = "english"
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+# Keywords ts_rank can score: words separated by spaces
+_PLAIN_RE = re.compile(r"^[\w\s]+$", re.UNICODE)
+# Shortest keyword the trigram index can look up
+MIN_TRIGRAM_LENGTH = 3
+
+_SQLITE_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "title, description, content='job_listings', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS job_listings_fts_insert AFTER INSERT ON job_listings BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS job_listings_fts_delete AFTER DELETE ON job_listings BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    # Only title / description changes touch the index, not the scraped_date bumps of every crawl
+    f"CREATE TRIGGER IF NOT EXISTS job_listings_fts_update AFTER UPDATE OF title, description ON job_listings BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+)
+
+_POSTGRES_DDL = (
+    f"ALTER TABLE job_listings ADD COLUMN IF NOT EXISTS {SEARCH_VECTOR} tsvector GENERATED ALWAYS AS ("
+    f"setweight(to_tsvector('{TS_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{TS_CONFIG}', coalesce(description, '')), 'B')) STORED",
+    f"CREATE INDEX IF NOT EXISTS idx_job_listings_search ON job_listings USING GIN ({SEARCH_VECTOR})",
+)
+# Indexes behind the ILIKE filter; needs the pg_trgm extension, so installed separately
+_POSTGRES_TRIGRAM_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS idx_job_listings_title_trgm ON job_listings USING GIN (title gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_job_listings_description_trgm "
+    "ON job_listings USING GIN (description gin_trgm_ops)",
+)
+
+# Engine -> whether the full-text index exists
+_available = {}
+
+
+def _engine(bind):
+    return bind.get_bind() if hasattr(bind, "get_bind") else bind
+
+
+def _dialect_name(bind):
+    return _engine(bind).dialect.name
+
+
+def install(bind) -> bool:
+    """
+    Create the full-text index if missing (and fill it, on SQLite).
+    Returns False when the database cannot provide one.
+    """
+    engine = _engine(bind)
+    name = _dialect_name(bind)
+    try:
+        with engine.begin() as connection:
+            if name == "sqlite":
+                existing = _sqlite_fts_sql(connection)
+                if existing is not None and "trigram" not in existing:
+                    # Word-tokenized index from before substring matching
+                    connection.execute(text(f"DROP TABLE {FTS_TABLE}"))
+                for statement in _SQLITE_DDL:
+                    connection.execute(text(statement))
+                if existing is None or "trigram" not in existing:
+                    connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+            elif name == "postgresql":
+                for statement in _POSTGRES_DDL:
+                    connection.execute(text(statement))
+            else:
+                return False
+    except Exception as e:
+        logger.warning(f"Search index unavailable, falling back to ILIKE scans: {e}")
+        _available[engine] = False
+        return False
+    if name == "postgresql":
+        try:
+            with engine.begin() as connection:
+                for statement in _POSTGRES_TRIGRAM_DDL:
+                    connection.execute(text(statement))
+        except Exception as e:
+            logger.warning(f"pg_trgm indexes unavailable, keyword filters will scan job_listings: {e}")
+    _available[engine] = True
+    return True
+
+
+def _sqlite_fts_sql(connection) -> Optional[str]:
+    """CREATE statement of the SQLite FTS table, None if it doesn't exist."""
+    return connection.execute(
+        text("SELECT sql FROM sqlite_master WHERE name = :name"), {"name": FTS_TABLE}
+    ).scalar()
+
+
+def available(bind) -> bool:
+    """Whether the search index exists (checked once per engine)."""
+    engine = _engine(bind)
+    if engine not in _available:
+        name = _dialect_name(bind)
+        with engine.connect() as connection:
+            if name == "sqlite":
+                _available[engine] = "trigram" in (_sqlite_fts_sql(connection) or "")
+            elif name == "postgresql":
+                _available[engine] = connection.execute(
+                    text("SELECT 1 FROM information_schema.columns "
+                         "WHERE table_name = 'job_listings' AND column_name = :name"),
+                    {"name": SEARCH_VECTOR},
+                ).first() is not None
+            else:
+                return False
+    return _available[engine]
+
+
+def search_terms(keyword: str) -> List[str]:
+    """
+    Lowercased words of a search string, or [] when it holds anything but
+    words and spaces (the PostgreSQL tokenizer would turn "C++" into "c").
+    """
+    if not keyword or not _PLAIN_RE.match(keyword):
+        return []
+    return [term.lower() for term in _TERM_RE.findall(keyword)]
+
+
+def _ilike(query, keyword: str):
+    return query.filter(
+        (JobListing.title.ilike(f"%{keyword}%")) |
+        (JobListing.description.ilike(f"%{keyword}%"))
+    )
+
+
+def search(db, query, keyword: str) -> Tuple[object, Optional[object]]:
+    """
+    Restrict a JobListing query to jobs whose title or description contains
+    keyword (case-insensitive).
+
+    Returns:
+        (filtered query, rank expression for ORDER BY or None). The rank
+        sorts the best matches first when used as the sole ORDER BY term;
+        it is None when the keyword can't be ranked.
+    """
+    if not available(db):
+        return _ilike(query, keyword), None
+
+    if _dialect_name(db) == "postgresql":
+        # pg_trgm indexes serve the ILIKE itself
+        terms = search_terms(keyword)
+        if not terms:
+            return _ilike(query, keyword), None
+        # Rank phrase: each word directly follows the previous one; the last is a prefix
+        ts_query = func.to_tsquery(TS_CONFIG, " <-> ".join(terms) + ":*")
+        vector = literal_column(f"job_listings.{SEARCH_VECTOR}")
+        return _ilike(query, keyword), func.ts_rank(vector, ts_query).desc()
+
+    if len(keyword) < MIN_TRIGRAM_LENGTH or "%" in keyword or "_" in keyword:
+        return _ilike(query, keyword), None
+    # A quoted string is a phrase of consecutive trigrams: a substring match
+    match = '"' + keyword.replace('"', '""') + '"'
+    fts = table(FTS_TABLE, column("rowid"))
+    # bm25: lower is better; title matches count ten times as much as description matches
+    matches = (
+        select(fts.c.rowid.label("job_id"), func.bm25(literal_column(FTS_TABLE), 10.0, 1.0).label("rank"))
+        .where(literal_column(FTS_TABLE).op("MATCH")(match))
+        .subquery()
+    )
+    query = query.join(matches, matches.c.job_id == JobListing.id)
+    return query, matches.c.rank.asc()
@@ -0,0 +1,372 @@
+"""
+Bulk ingestion of scraped job items.
+
+JobIngestor writes a whole batch of items in one transaction:
+  - one query to find which items already exist (by URL or content hash)
+  - one executemany UPDATE for existing jobs (scraped_date, changed descriptions);
+    on refresh, the posting days and (location, month) partitions jobs moved
+    away from are marked stale for the rollups in app.services.scheduler
+  - one INSERT ... ON CONFLICT for new jobs, after near-duplicate detection
+    (app.services.near_duplicates); duplicates are linked to their canonical
+    job and skip keyword extraction
+  - one batched keyword extraction pass over new/changed descriptions, run
+    before the first write so no write lock is held during the NLP
+  - one DELETE of the re-extracted jobs' previous keyword occurrences and one
+    INSERT ... ON CONFLICT for the new ones
+Used by the scrapy DatabasePipeline, which may call ingest() from several
+worker threads at once.
+reextract() replaces the keywords of already stored jobs the same way
+(reextract_keywords.py).
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Mapping, Tuple
+import logging
+import threading
+import time
+
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.orm import sessionmaker
+
+from app.dialects import dialect_insert, to_epoch_day, to_epoch_month
+from app.models import JobListing, Keyword, KeywordOccurrence, StaleFactDay, StaleSummaryPartition
+from app.nlp.keywords_config import counts_by_category, keyword_id
+from app.services.near_duplicates import NearDuplicateIndex
+
+logger = logging.getLogger(__name__)
+
+# Rows per multi-row INSERT / IN (...) lookup, to stay well below bind parameter limits
+CHUNK_SIZE = 500
+
+JOB_FIELDS = (
+    "url", "title", "company", "location", "region", "nation", "description", "salary",
+    "posting_date", "source_website", "scraped_date", "content_hash",
+)
+# Parsed fields overwritten on existing jobs by ingest(refresh=True)
+REFRESH_FIELDS = tuple(field for field in JOB_FIELDS if field not in ("url", "scraped_date"))
+
+
+def _chunks(rows: List, size: int = CHUNK_SIZE) -> Iterable[List]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _summary_partition(location, posting_date, posting_month):
+    """RegionalSummary (region, posting_month) partition of a job, None if it is not summarized."""
+    if not location or not posting_date:
+        return None
+    return location, posting_month
+
+
+class JobIngestor:
+    """Writes batches of job items (and their keywords) with bulk upserts."""
+
+    def __init__(self, engine, extractor=None):
+        """
+        Args:
+            engine: SQLAlchemy engine (SQLite or PostgreSQL)
+            extractor: Optional keyword extractor (see app.nlp.create_extractor)
+        """
+        self.engine = engine
+        self.Session = sessionmaker(bind=engine)
+        self.extractor = extractor
+        self.keyword_rows: Dict[int, int] = {}  # keyword ID (keywords_config.keyword_id) -> keywords.id
+        # ingest() may run on several worker threads; spaCy pipelines are not thread-safe
+        self._extract_lock = threading.Lock()
+
+    def load_keyword_rows(self) -> int:
+        """Load all keyword rows into memory; returns the number loaded."""
+        with self.Session() as session:
+            self.keyword_rows = {
+                keyword_id(keyword): row_id
+                for row_id, keyword in session.execute(select(Keyword.id, Keyword.keyword))
+            }
+        return len(self.keyword_rows)
+
+    def ingest(self, items: List[Mapping], refresh: bool = False) -> Dict[str, float]:
+        """
+        Save a batch of cleaned job items in a single transaction.
+
+        Extracted keywords are stored back on each item under 'keywords'.
+
+        Args:
+            items: Cleaned job items
+            refresh: Items were re-parsed from archived pages (scrapy reparse):
+                overwrite the parsed fields of existing jobs and re-extract their
+                keywords, but keep their scraped_date
+
+        Returns:
+            Counters: saved (new jobs), updated (existing jobs), extracted,
+            skipped_unchanged (existing jobs whose description did not change),
+            near_duplicates (new jobs linked to a canonical job),
+            extraction_seconds (time spent in keyword extraction), and with a
+            caching extractor, extraction_cache (this batch's hit/miss counters)
+        """
+        counts = {"saved": 0, "updated": 0, "extracted": 0, "skipped_unchanged": 0, "near_duplicates": 0,
+                  "extraction_seconds": 0.0}
+
+        # Last occurrence of a URL in the batch wins
+        batch = list({item["url"]: item for item in items}.values())
+        if not batch:
+            return counts
+
+        session = self.Session()
+        new_keyword_rows = {}
+        # updated_at marks jobs whose aggregated data (keywords, active flag) changed,
+        # for the incremental summary refreshes in app.services.scheduler
+        now = datetime.now()
+        try:
+            insert = dialect_insert(session)
+            existing = self._find_existing(session, batch)
+
+            to_extract = []  # (existing job id, item)
+            updates = []
+            vacated_days = set()  # Old posting days of refreshed jobs, for populate_daily_facts
+            vacated_partitions = set()  # Old (location, month) of refreshed jobs, for populate_regional_summary
+            new_items = []
+            for item in batch:
+                row = existing["url"].get(item["url"]) or existing["content_hash"].get(item.get("content_hash"))
+                if row is None:
+                    new_items.append(item)
+                    continue
+
+                description = item.get("description")
+                if refresh:
+                    posting_date = item.get("posting_date")
+                    posting_day = to_epoch_day(posting_date) if posting_date else row.posting_day
+                    posting_month = to_epoch_month(posting_date) if posting_date else row.posting_month
+                    if row.posting_day is not None and posting_day != row.posting_day:
+                        vacated_days.add(row.posting_day)
+                    partition = _summary_partition(row.location, row.posting_date, row.posting_month)
+                    if partition and partition != _summary_partition(item.get("location"), posting_date, posting_month):
+                        vacated_partitions.add(partition)
+                    updates.append({"id": row.id, "is_active": 1, "updated_at": now,
+                                    "posting_day": posting_day, "posting_month": posting_month,
+                                    **{field: item.get(field) for field in REFRESH_FIELDS}})
+                    if description:
+                        to_extract.append((row.id, item))
+                    continue
+
+                changed = bool(description) and row.description != description
+                updates.append({
+                    "id": row.id,
+                    "is_active": 1,
+                    "scraped_date": item["scraped_date"],
+                    "description": description if changed else row.description,
+                    "updated_at": now if changed or not row.is_active else row.updated_at,
+                })
+                if changed:
+                    to_extract.append((row.id, item))
+                elif description:
+                    counts["skipped_unchanged"] += 1
+
+            # New jobs: find near-duplicates (linked to their canonical job, no keyword extraction)
+            duplicates = NearDuplicateIndex(session)
+            canonical = duplicates.match([
+                (item["url"], item.get("title"), item.get("description"), item.get("source_website"))
+                for item in new_items
+            ])
+            new_to_extract = [item for item in new_items
+                              if canonical[item["url"]] == (None, None) and item.get("description")]
+
+            # Keywords for new and changed descriptions, extracted in one batch before
+            # any write: the write transaction (SQLite's database lock, PostgreSQL's
+            # row locks) is never held while the NLP runs, so concurrent batches from
+            # other pipeline threads only wait for each other's short writes
+            session.commit()  # Ends the read transaction; nothing has been written
+            extracted = {}
+            if self.extractor:
+                extract_items = [item for _, item in to_extract] + new_to_extract
+                if extract_items:
+                    extracted = self._extract(extract_items, counts)
+
+            # 1. Existing jobs: mark as still active, reviving expired ones (and store changed descriptions)
+            if updates:
+                session.execute(update(JobListing), updates)
+                counts["updated"] = len(updates)
+            if vacated_days:
+                stmt = insert(StaleFactDay).values([{"day": day, "marked_at": now} for day in vacated_days])
+                session.execute(stmt.on_conflict_do_update(
+                    index_elements=["day"], set_={"marked_at": stmt.excluded.marked_at},
+                ))
+            if vacated_partitions:
+                stmt = insert(StaleSummaryPartition).values([
+                    {"region": region, "month": month, "marked_at": now} for region, month in vacated_partitions
+                ])
+                session.execute(stmt.on_conflict_do_update(
+                    index_elements=["region", "month"], set_={"marked_at": stmt.excluded.marked_at},
+                ))
+
+            # 2. New jobs: multi-row upsert on the (url, company, title) unique constraint.
+            #    Duplicates of other new jobs in this batch go in a second pass, once those have ids.
+            job_ids = {}
+            first_pass = [item for item in new_items if canonical[item["url"]][1] is None]
+            second_pass = [item for item in new_items if canonical[item["url"]][1] is not None]
+            for items_pass in (first_pass, second_pass):
+                for chunk in _chunks(items_pass):
+                    job_ids.update(self._insert_jobs(session, insert, chunk, canonical, job_ids, now))
+
+            for item in new_items:
+                canonical_job_id, canonical_url = canonical[item["url"]]
+                item["canonical_job_id"] = canonical_job_id or job_ids.get(canonical_url)
+                if item["canonical_job_id"]:
+                    counts["near_duplicates"] += 1
+            to_extract += [(job_ids[item["url"]], item) for item in new_to_extract]
+            counts["saved"] = len(new_items)
+            duplicates.save(job_ids)
+
+            # 3. Keyword occurrences
+            if self.extractor and to_extract:
+                job_counts = []
+                for job_id, item in to_extract:
+                    id_counts = extracted[item["url"]]
+                    item["keywords"] = counts_by_category(self.extractor.keyword_index, id_counts)
+                    job_counts.append((job_id, id_counts))
+                self._replace_keywords(session, insert, job_counts, new_keyword_rows)
+                counts["extracted"] = len(to_extract)
+
+            session.commit()
+            self.keyword_rows.update(new_keyword_rows)
+            return counts
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _insert_jobs(self, session, insert, chunk: List[Mapping], canonical: Dict, job_ids: Dict[str, int],
+                     now: datetime) -> Dict[str, int]:
+        """Upsert new jobs; returns url -> job id."""
+        rows = []
+        for item in chunk:
+            canonical_job_id, canonical_url = canonical[item["url"]]
+            rows.append({
+                **{field: item.get(field) for field in JOB_FIELDS},
+                "posting_day": to_epoch_day(item.get("posting_date") or item.get("scraped_date") or now),
+                "posting_month": to_epoch_month(item.get("posting_date") or item.get("scraped_date") or now),
+                "is_active": 1,
+                "canonical_job_id": canonical_job_id or job_ids.get(canonical_url),
+                "updated_at": now,
+            })
+        stmt = insert(JobListing).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["url", "company", "title"],
+            set_={"scraped_date": stmt.excluded.scraped_date, "is_active": 1, "updated_at": stmt.excluded.updated_at},
+        ).returning(JobListing.id, JobListing.url)
+        return {url: job_id for job_id, url in session.execute(stmt)}
+
+    def _find_existing(self, session, batch: List[Mapping]) -> Dict[str, Dict]:
+        """Look up existing jobs matching the batch by URL or content hash."""
+        found = {"url": {}, "content_hash": {}}
+        for chunk in _chunks(batch):
+            urls = [item["url"] for item in chunk]
+            hashes = [item["content_hash"] for item in chunk if item.get("content_hash")]
+            rows = session.execute(
+                select(JobListing.id, JobListing.url, JobListing.content_hash, JobListing.description,
+                       JobListing.is_active, JobListing.updated_at, JobListing.posting_day,
+                       JobListing.posting_month, JobListing.location, JobListing.posting_date)
+                .where(or_(JobListing.url.in_(urls), JobListing.content_hash.in_(hashes)))
+            )
+            for row in rows:
+                found["url"].setdefault(row.url, row)
+                if row.content_hash:
+                    found["content_hash"].setdefault(row.content_hash, row)
+        return found
+
+    def reextract(self, jobs: List[Tuple[int, str]]) -> Dict[str, float]:
+        """
+        Re-extract the keywords of stored jobs and replace their occurrences,
+        in one transaction (e.g. after config/keywords.yaml changes).
+
+        Args:
+            jobs: (job id, description) pairs; jobs without a description lose their keywords
+
+        Returns:
+            Counters: extracted (jobs), extraction_seconds, extraction_cache (as for ingest)
+        """
+        counts = {"extracted": 0, "extraction_seconds": 0.0}
+        if not jobs:
+            return counts
+        results = self._extract_ids([description for _, description in jobs], counts)
+
+        session = self.Session()
+        new_keyword_rows = {}
+        try:
+            job_ids = [job_id for job_id, _ in jobs]
+            self._replace_keywords(session, dialect_insert(session), list(zip(job_ids, results)), new_keyword_rows)
+            # Picked up by the next incremental summary refresh
+            for chunk in _chunks(job_ids):
+                session.execute(update(JobListing).where(JobListing.id.in_(chunk)).values(updated_at=datetime.now()))
+            session.commit()
+            self.keyword_rows.update(new_keyword_rows)
+            counts["extracted"] = len(jobs)
+            return counts
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _extract_ids(self, descriptions: List[str], counts: Dict) -> List[Dict[int, int]]:
+        """
+        Count keywords in descriptions; returns [{keyword ID: count}, ...].
+        Adds extraction_seconds (and extraction_cache, see CachedExtractor) to counts.
+        """
+        options = {}
+        if getattr(self.extractor, "cache", None) is not None:
+            options["cache_stats"] = counts.setdefault("extraction_cache", {})
+        with self._extract_lock:
+            started = time.perf_counter()
+            results = list(self.extractor.extract_ids_many(descriptions, **options))
+            counts["extraction_seconds"] += time.perf_counter() - started
+        return results
+
+    def _extract(self, items: List[Mapping], counts: Dict) -> Dict[str, Dict[int, int]]:
+        """Count keywords in the items' descriptions; returns {url: {keyword ID: count}}."""
+        results = self._extract_ids([item["description"] for item in items], counts)
+        return {item["url"]: extracted_data for item, extracted_data in zip(items, results)}
+
+    def _replace_keywords(self, session, insert, job_counts: List[Tuple[int, Dict[int, int]]],
+                          new_keyword_rows: Dict[int, int]) -> None:
+        """
+        Replace the keyword occurrences of (job_id, {keyword ID: count}) pairs,
+        adding the keywords rows that do not exist yet.
+        """
+        keyword_index = self.extractor.keyword_index
+        # Keywords dropped from the description (or the config) must not linger
+        for chunk in _chunks([job_id for job_id, _ in job_counts]):
+            session.execute(delete(KeywordOccurrence).where(KeywordOccurrence.job_id.in_(chunk)))
+
+        frequencies = {}  # (job_id, keyword ID) -> count
+        for job_id, id_counts in job_counts:
+            for entry_id, count in id_counts.items():
+                frequencies[(job_id, entry_id)] = count
+
+        missing = {entry_id for _, entry_id in frequencies if entry_id not in self.keyword_rows}
+        if missing:
+            session.execute(
+                insert(Keyword).values([
+                    # Assuming all matches are from our client list; a keyword listed
+                    # under several categories is stored under the first one
+                    {"keyword": keyword_index[entry_id][0], "category": keyword_index[entry_id][1][0],
+                     "client_provided": 1}
+                    for entry_id in missing
+                ]).on_conflict_do_nothing(index_elements=["keyword"])
+            )
+            rows = session.execute(
+                select(Keyword.id, Keyword.keyword)
+                .where(func.lower(Keyword.keyword).in_([keyword_index[entry_id][0].lower() for entry_id in missing]))
+            )
+            new_keyword_rows.update({keyword_id(keyword): row_id for row_id, keyword in rows})
+
+        keyword_rows = {**self.keyword_rows, **new_keyword_rows}
+        occurrences = [
+            {"job_id": job_id, "keyword_id": keyword_rows[entry_id], "frequency": count}
+            for (job_id, entry_id), count in frequencies.items()
+        ]
+        for chunk in _chunks(occurrences):
+            stmt = insert(KeywordOccurrence).values(chunk)
+            session.execute(stmt.on_conflict_do_update(
+                index_elements=["job_id", "keyword_id"],
+                set_={"frequency": stmt.excluded.frequency},
+            ))
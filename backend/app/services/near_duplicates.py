@@ -0,0 +1,222 @@
+"""
+Near-duplicate detection for new job postings.
+
+The same role is often cross-posted on several job boards with differently
+formatted company and location strings, which the exact content_hash misses.
+NearDuplicateIndex compares MinHash signatures (app.nlp.minhash) of new
+postings against the canonical jobs stored in job_signatures / job_lsh_buckets,
+looking up only the jobs that share an LSH bucket. A candidate is a duplicate
+when it comes from another source website and its estimated similarity and
+title similarity both pass a threshold (postings on the same site are already
+deduplicated by URL / content hash, and similar openings there are usually
+genuinely different jobs).
+
+Only active canonical jobs are matched. When expire_stale_listings deactivates
+a canonical job that still has active duplicates, promote_duplicates makes the
+oldest active duplicate canonical in its place. Jobs stored before the index
+existed are indexed by backfill_signatures.py.
+"""
+
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import Levenshtein
+from sqlalchemy import delete, select, tuple_, update
+from sqlalchemy.orm import aliased
+
+from app.dialects import dialect_insert
+from app.models import JobListing, JobLshBucket, JobSignature, KeywordOccurrence
+from app.nlp.minhash import (
+    band_buckets, estimated_similarity, minhash_signature, posting_text, signature_from_bytes,
+)
+
+logger = logging.getLogger(__name__)
+
+# Estimated Jaccard similarity of title + description shingles
+SIMILARITY_THRESHOLD = 0.7
+# Levenshtein ratio of the lowercased titles
+TITLE_SIMILARITY_THRESHOLD = 0.8
+
+# (band, bucket) pairs per IN (...) lookup
+LOOKUP_CHUNK_SIZE = 400
+
+
+class _Posting:
+    __slots__ = ("key", "title", "source", "signature", "buckets")
+
+    def __init__(self, key, title, source, signature, buckets):
+        self.key = key
+        self.title = title
+        self.source = source
+        self.signature = signature
+        self.buckets = buckets
+
+
+class NearDuplicateIndex:
+    """
+    Matches a batch of new postings against stored canonical jobs and against
+    each other. Usage within one transaction:
+
+        index = NearDuplicateIndex(session)
+        canonical = index.match(postings)   # {key: (canonical job id, canonical key)}
+        ...insert jobs...
+        index.save(job_ids)                 # index the postings that are canonical
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self._unique: List[_Posting] = []
+
+    def match(self, postings: List[Tuple[str, str, str, str]]) -> Dict[str, Tuple[Optional[int], Optional[str]]]:
+        """
+        Args:
+            postings: (key, title, description, source website) for each new posting, in batch order
+
+        Returns:
+            key -> (canonical job id, canonical key). The job id is set when the
+            posting duplicates a stored job, the key when it duplicates an earlier
+            posting of the same batch; both are None for new canonical postings.
+        """
+        batch = []
+        for key, title, description, source in postings:
+            signature = minhash_signature(posting_text(title, description))
+            batch.append(_Posting(key, (title or "").lower(), source, signature, band_buckets(signature)))
+        stored = self._load_candidates(batch)
+
+        result = {}
+        batch_buckets: Dict[Tuple[int, int], List[_Posting]] = {}
+        for posting in batch:
+            match = self._best_match(posting, stored)
+            if match is not None:
+                result[posting.key] = (match, None)
+                continue
+
+            earlier = {id(other): other for bucket in posting.buckets for other in batch_buckets.get(bucket, ())}
+            match_key = self._most_similar(posting, earlier.values())
+            if match_key is not None:
+                result[posting.key] = (None, match_key)
+                continue
+
+            result[posting.key] = (None, None)
+            self._unique.append(posting)
+            for bucket in posting.buckets:
+                batch_buckets.setdefault(bucket, []).append(posting)
+        return result
+
+    def index(self, jobs: List[Tuple[int, str, str]]) -> None:
+        """Store signatures and buckets of existing canonical jobs, given (job id, title, description)."""
+        for job_id, title, description in jobs:
+            signature = minhash_signature(posting_text(title, description))
+            self._unique.append(_Posting(job_id, (title or "").lower(), None, signature, band_buckets(signature)))
+        self.save({job_id: job_id for job_id, _, _ in jobs})
+
+    def save(self, job_ids: Dict[str, int]) -> None:
+        """Store signatures and buckets of the canonical postings, given key -> job id."""
+        insert = dialect_insert(self.session)
+        postings = [posting for posting in self._unique if posting.key in job_ids]
+        if not postings:
+            return
+        self.session.execute(
+            insert(JobSignature).values([
+                {"job_id": job_ids[posting.key], "signature": posting.signature.tobytes()}
+                for posting in postings
+            ]).on_conflict_do_nothing(index_elements=["job_id"])
+        )
+        rows = [
+            {"job_id": job_ids[posting.key], "band": band, "bucket": bucket}
+            for posting in postings
+            for band, bucket in posting.buckets
+        ]
+        for start in range(0, len(rows), LOOKUP_CHUNK_SIZE):
+            self.session.execute(
+                insert(JobLshBucket).values(rows[start:start + LOOKUP_CHUNK_SIZE])
+                .on_conflict_do_nothing(index_elements=["job_id", "band"])
+            )
+        self._unique = []
+
+    def _load_candidates(self, batch: List[_Posting]) -> Dict[int, _Posting]:
+        """Stored jobs sharing at least one bucket with the batch, by job id."""
+        wanted = sorted({bucket for posting in batch for bucket in posting.buckets})
+        buckets_by_job: Dict[int, set] = {}
+        for start in range(0, len(wanted), LOOKUP_CHUNK_SIZE):
+            rows = self.session.execute(
+                select(JobLshBucket.job_id, JobLshBucket.band, JobLshBucket.bucket)
+                .where(tuple_(JobLshBucket.band, JobLshBucket.bucket).in_(wanted[start:start + LOOKUP_CHUNK_SIZE]))
+            )
+            for job_id, band, bucket in rows:
+                buckets_by_job.setdefault(job_id, set()).add((band, bucket))
+
+        if not buckets_by_job:
+            return {}
+        rows = self.session.execute(
+            select(JobSignature.job_id, JobSignature.signature, JobListing.title, JobListing.source_website)
+            .join(JobListing, JobListing.id == JobSignature.job_id)
+            .where(JobSignature.job_id.in_(list(buckets_by_job)))
+            .where(JobListing.is_active != 0)  # New postings of an expired job are not its duplicates
+        )
+        return {
+            job_id: _Posting(job_id, (title or "").lower(), source, signature_from_bytes(signature), buckets_by_job[job_id])
+            for job_id, signature, title, source in rows
+        }
+
+    def _best_match(self, posting: _Posting, stored: Dict[int, _Posting]) -> Optional[int]:
+        buckets = set(posting.buckets)
+        return self._most_similar(posting, (job for job in stored.values() if buckets & job.buckets))
+
+    def _most_similar(self, posting: _Posting, others) -> Optional[object]:
+        """Key of the most similar duplicate among others, if any."""
+        best, best_score = None, SIMILARITY_THRESHOLD
+        for other in others:
+            if posting.source and posting.source == other.source:
+                continue
+            score = estimated_similarity(posting.signature, other.signature)
+            if score >= best_score and Levenshtein.ratio(posting.title, other.title) >= TITLE_SIMILARITY_THRESHOLD:
+                best, best_score = other.key, score
+        return best
+
+
+def promote_duplicates(session, now) -> int:
+    """
+    Give every inactive canonical job that still has active duplicates a new
+    canonical job: its oldest active duplicate. The other duplicates, and the
+    expired job itself, are re-pointed to it, and it takes over the expired
+    job's keyword occurrences (unless it already has its own) and its
+    signature, so the posting stays counted once in every rollup and new
+    cross-posts still match. updated_at is bumped for the incremental refreshes.
+
+    Returns:
+        Number of duplicates promoted
+    """
+    canonical = aliased(JobListing)
+    rows = session.execute(
+        select(JobListing.canonical_job_id, JobListing.id)
+        .join(canonical, canonical.id == JobListing.canonical_job_id)
+        .where(JobListing.is_active != 0)
+        .where(canonical.is_active == 0)
+        .order_by(JobListing.canonical_job_id, JobListing.id)
+    )
+    promoted = {}  # expired canonical job id -> promoted duplicate id
+    for old_id, job_id in rows:
+        promoted.setdefault(old_id, job_id)
+    if not promoted:
+        return 0
+
+    for old_id, new_id in promoted.items():
+        session.execute(
+            update(JobListing)
+            .where((JobListing.canonical_job_id == old_id) | (JobListing.id == old_id))
+            .where(JobListing.id != new_id)
+            .values(canonical_job_id=new_id, updated_at=now)
+        )
+        session.execute(update(JobListing).where(JobListing.id == new_id).values(canonical_job_id=None, updated_at=now))
+        for table in (KeywordOccurrence, JobSignature, JobLshBucket):
+            own = aliased(table)
+            session.execute(
+                update(table)
+                .where(table.job_id == old_id)
+                .where(~select(own.job_id).where(own.job_id == new_id).exists())
+                .values(job_id=new_id)
+            )
+            session.execute(delete(table).where(table.job_id == old_id))
+    logger.info(f"Promoted {len(promoted)} duplicates of expired canonical jobs")
+    return len(promoted)
@@ -1,68 +1,163 @@
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from app.services.near_duplicates import promote_duplicates
 from app.services.scraper_service import run_all_uk_spiders
+from app.config import get_settings
 from app.database import SessionLocal
-from app.models import ScraperRun, JobListing, Keyword, KeywordOccurrence, RegionalSummary
-from datetime import datetime
-from sqlalchemy import func
+from app.dialects import dialect_insert, epoch_month_start
+from app.models import (
+    ScraperRun, ScraperRunSpider, JobListing, KeywordOccurrence, RefreshWatermark, RegionalSummary,
+    KeywordDailyFact, JobDailyFact, StaleFactDay, StaleSummaryPartition,
+)
+from datetime import datetime, timedelta
+from sqlalchemy import delete, func, literal, select, tuple_, update
 import logging
 
 logger = logging.getLogger("api")
 
+REGIONAL_SUMMARY_WATERMARK = "regional_summary"
+DAILY_FACTS_WATERMARK = "daily_facts"
+# Incremental refreshes re-read this much before the previous refresh started, to
+# cover ingest transactions that were still open at the time
+WATERMARK_SAFETY_MARGIN = timedelta(minutes=15)
 
-def populate_regional_summary():
+# Spiders that produced a source within this window must all crawl it fully before it is expired
+SOURCE_SPIDERS_WINDOW_DAYS = 30
+
+
+def expire_stale_listings(run_id: int):
     """
-    Refresh the pre-aggregated RegionalSummary table.
-    Groups keyword occurrences by location and date (month granularity).
+    Mark the jobs that have disappeared from their source as inactive.
+
+    A source is only expired when every spider that produced it recently did a
+    full crawl in this run (ScraperRunSpider.full_crawl). A full crawl saves or
+    touches every job it still lists, so jobs whose scraped_date is older than
+    the run start minus the grace period are gone. One set-based UPDATE per source;
+    expired canonical jobs with live duplicates then hand over to one of them
+    (app.services.near_duplicates.promote_duplicates).
+
+    The daily incremental crawls (pagination stopped on known pages, sitemap
+    entries behind the watermark) are never full, so only the weekly full
+    crawl (settings.full_crawl_weekday, see scheduled_scrape_job) expires jobs.
+
+    Returns:
+        Number of jobs expired per source
+    """
+    db = SessionLocal()
+    try:
+        run = db.get(ScraperRun, run_id)
+        if not run or run.status not in ("completed", "partial_success") or not run.start_time:
+            return {}
+
+        full_crawls = dict(
+            db.query(ScraperRunSpider.spider, ScraperRunSpider.full_crawl)
+            .filter(ScraperRunSpider.run_id == run_id)
+        )
+        spiders_by_source = {}
+        recent = (
+            db.query(ScraperRunSpider.source_website, ScraperRunSpider.spider)
+            .filter(ScraperRunSpider.source_website != None)
+            .filter(ScraperRunSpider.start_time >= run.start_time - timedelta(days=SOURCE_SPIDERS_WINDOW_DAYS))
+            .distinct()
+        )
+        for source, spider in recent:
+            spiders_by_source.setdefault(source, set()).add(spider)
+
+        cutoff = run.start_time - timedelta(hours=get_settings().listing_expiry_grace_hours)
+        expired = {}
+        for source, spiders in sorted(spiders_by_source.items()):
+            if not all(full_crawls.get(spider) for spider in spiders):
+                continue
+            result = db.execute(
+                update(JobListing)
+                .where(JobListing.source_website == source)
+                .where(JobListing.is_active != 0)
+                .where(JobListing.scraped_date < cutoff)
+                .values(is_active=0, updated_at=datetime.now())
+            )
+            expired[source] = result.rowcount
+        if expired:
+            promote_duplicates(db, datetime.now())
+        db.commit()
+        logger.info(f"Expired stale listings after run {run_id}: {expired or 'no fully crawled sources'}")
+        return expired
+    except Exception as e:
+        logger.error(f"Failed to expire stale listings: {e}")
+        db.rollback()
+        return {}
+    finally:
+        db.close()
+
+
+def populate_regional_summary(full: bool = False):
+    """
+    Refresh the pre-aggregated RegionalSummary table (keyword occurrences by
+    location and month) incrementally.
+
+    Partitions are grouped by the indexed (location, posting_month) columns.
+    Only the (location, month) partitions of jobs whose updated_at is past the
+    "regional_summary" watermark, and those refreshed jobs moved away from
+    (StaleSummaryPartition), are recomputed, with one INSERT ... SELECT ...
+    ON CONFLICT DO UPDATE plus one DELETE for keywords that dropped to zero, so
+    a refresh costs time proportional to the jobs changed since the last one.
+    full=True (or a missing watermark) recomputes every partition.
     Called automatically after each scheduled scrape.
     """
     logger.info("Populating RegionalSummary table...")
     db = SessionLocal()
     try:
-        results = (
-            db.query(
-                JobListing.location,
-                func.strftime("%Y-%m-01", JobListing.posting_date).label("period"),
-                Keyword.id.label("keyword_id"),
-                func.count(KeywordOccurrence.id).label("count")
-            )
+        started = datetime.now()
+        watermark = None if full else db.get(RefreshWatermark, REGIONAL_SUMMARY_WATERMARK)
+        month = JobListing.posting_month  # Indexed with location: partitions are found by index lookups
+
+        touched = (
+            select(JobListing.location, month)
+            .where(JobListing.location != None)
+            .where(JobListing.posting_date != None)
+        )
+        if watermark:
+            touched = touched.where(JobListing.updated_at >= watermark.value)
+        # A job whose location or posting month changed leaves its old partition behind
+        touched = touched.union(select(StaleSummaryPartition.region, StaleSummaryPartition.month)).subquery()
+        touched_partitions = select(touched.c.location, epoch_month_start(db, touched.c.posting_month))
+
+        # RegionalSummary.date is the month start, computed from the grouped posting_month
+        aggregate_filter = (
+            select(JobListing.location, epoch_month_start(db, month), KeywordOccurrence.keyword_id)
             .join(KeywordOccurrence, JobListing.id == KeywordOccurrence.job_id)
-            .join(Keyword, KeywordOccurrence.keyword_id == Keyword.id)
-            .filter(JobListing.is_active != 0)
-            .filter(JobListing.location != None)
-            .group_by(JobListing.location, "period", Keyword.id)
-            .all()
+            .where(JobListing.is_active != 0)
+            .where(JobListing.canonical_job_id == None)  # Count cross-posted jobs once
+            .where(tuple_(JobListing.location, month).in_(select(touched)))
+        )
+        aggregate = (
+            aggregate_filter
+            .add_columns(func.count(KeywordOccurrence.id))
+            .group_by(JobListing.location, month, KeywordOccurrence.keyword_id)
         )
 
-        upserted = 0
-        for r in results:
-            try:
-                period_dt = datetime.strptime(r.period, "%Y-%m-%d") if r.period else None
-                if not period_dt:
-                    continue
-
-                existing = db.query(RegionalSummary).filter_by(
-                    region=r.location,
-                    date=period_dt,
-                    keyword_id=r.keyword_id
-                ).first()
-
-                if existing:
-                    existing.count = r.count
-                else:
-                    db.add(RegionalSummary(
-                        region=r.location,
-                        date=period_dt,
-                        keyword_id=r.keyword_id,
-                        count=r.count
-                    ))
-                upserted += 1
-            except Exception as row_err:
-                logger.warning(f"Row error in regional summary: {row_err}")
+        insert = dialect_insert(db)
+        stmt = insert(RegionalSummary).from_select(["region", "date", "keyword_id", "count"], aggregate)
+        upserted = db.execute(stmt.on_conflict_do_update(
+            index_elements=["region", "date", "keyword_id"],
+            set_={"count": stmt.excluded.count},
+        )).rowcount
 
+        # Keywords no longer found in a recomputed partition (jobs expired or re-extracted)
+        deleted = db.execute(
+            delete(RegionalSummary)
+            .where(tuple_(RegionalSummary.region, RegionalSummary.date).in_(touched_partitions))
+            .where(tuple_(RegionalSummary.region, RegionalSummary.date, RegionalSummary.keyword_id)
+                   .not_in(aggregate_filter))
+        ).rowcount
+
+        # Partitions marked by transactions that may still have been open are recomputed again next time
+        db.execute(delete(StaleSummaryPartition)
+                   .where(StaleSummaryPartition.marked_at < started - WATERMARK_SAFETY_MARGIN))
+        # Jobs committed during this refresh may carry an earlier updated_at
+        db.merge(RefreshWatermark(name=REGIONAL_SUMMARY_WATERMARK, value=started - WATERMARK_SAFETY_MARGIN))
         db.commit()
-        logger.info(f"RegionalSummary populated: {upserted} rows upserted.")
+        logger.info(f"RegionalSummary populated: {upserted} rows upserted, {deleted} removed.")
     except Exception as e:
         logger.error(f"Failed to populate RegionalSummary: {e}")
         db.rollback()
@@ -70,11 +165,98 @@ def populate_regional_summary():
         db.close()
 
 
+def populate_daily_facts(full: bool = False):
+    """
+    Refresh the KeywordDailyFact and JobDailyFact rollups behind the trend and
+    keyword endpoints, incrementally like populate_regional_summary.
+
+    Facts are keyed by JobListing.posting_day (first scraped day when the
+    posting date is unknown), region and source; KeywordDailyFact also keeps
+    posting_month, so every trend bucket is integer arithmetic on fact columns. Expired jobs stay counted on
+    the day they were posted; near-duplicates are counted once. Only the days of jobs whose
+    updated_at is past the "daily_facts" watermark are recomputed, plus the days refreshed
+    jobs moved away from (StaleFactDay, marked by JobIngestor).
+    full=True (or a missing watermark) recomputes every day.
+    """
+    logger.info("Populating daily fact tables...")
+    db = SessionLocal()
+    try:
+        started = datetime.now()
+        watermark = None if full else db.get(RefreshWatermark, DAILY_FACTS_WATERMARK)
+        day = JobListing.posting_day  # Indexed: touched days are found and aggregated by index range
+        region = func.coalesce(JobListing.region, literal(""))
+        source = func.coalesce(JobListing.source_website, literal(""))
+
+        touched = select(day).where(day != None)
+        if watermark:
+            touched = touched.where(JobListing.updated_at >= watermark.value)
+        # A job whose posting_day changed leaves its old day behind, possibly without any job left
+        touched = touched.union(select(StaleFactDay.day))
+
+        insert = dialect_insert(db)
+        counted = (
+            select(JobListing.id)
+            .where(JobListing.canonical_job_id == None)  # Count cross-posted jobs once
+            .where(day.in_(touched))
+        )
+
+        keyword_filter = (
+            select(day, KeywordOccurrence.keyword_id, region, source)
+            .join(KeywordOccurrence, JobListing.id == KeywordOccurrence.job_id)
+            .where(JobListing.id.in_(counted))
+        )
+        keyword_aggregate = (
+            keyword_filter
+            .add_columns(func.count(KeywordOccurrence.id), func.coalesce(func.sum(KeywordOccurrence.frequency), 0),
+                         func.max(JobListing.posting_month))  # One month per posting day
+            .group_by(day, KeywordOccurrence.keyword_id, region, source)
+        )
+        stmt = insert(KeywordDailyFact).from_select(
+            ["day", "keyword_id", "region", "source", "job_count", "occurrences", "month"], keyword_aggregate
+        )
+        keyword_rows = db.execute(stmt.on_conflict_do_update(
+            index_elements=["day", "keyword_id", "region", "source"],
+            set_={"job_count": stmt.excluded.job_count, "occurrences": stmt.excluded.occurrences},
+        )).rowcount
+        keyword_rows += db.execute(
+            delete(KeywordDailyFact)
+            .where(KeywordDailyFact.day.in_(touched))
+            .where(tuple_(KeywordDailyFact.day, KeywordDailyFact.keyword_id, KeywordDailyFact.region,
+                          KeywordDailyFact.source).not_in(keyword_filter))
+        ).rowcount
+
+        job_filter = select(day, region, source).where(JobListing.id.in_(counted))
+        job_aggregate = job_filter.add_columns(func.count(JobListing.id)).group_by(day, region, source)
+        stmt = insert(JobDailyFact).from_select(["day", "region", "source", "job_count"], job_aggregate)
+        job_rows = db.execute(stmt.on_conflict_do_update(
+            index_elements=["day", "region", "source"],
+            set_={"job_count": stmt.excluded.job_count},
+        )).rowcount
+        job_rows += db.execute(
+            delete(JobDailyFact)
+            .where(JobDailyFact.day.in_(touched))
+            .where(tuple_(JobDailyFact.day, JobDailyFact.region, JobDailyFact.source).not_in(job_filter))
+        ).rowcount
+
+        # Days marked by transactions that may still have been open are recomputed again next time
+        db.execute(delete(StaleFactDay).where(StaleFactDay.marked_at < started - WATERMARK_SAFETY_MARGIN))
+        db.merge(RefreshWatermark(name=DAILY_FACTS_WATERMARK, value=started - WATERMARK_SAFETY_MARGIN))
+        db.commit()
+        logger.info(f"Daily facts populated: {keyword_rows} keyword and {job_rows} job rows changed.")
+    except Exception as e:
+        logger.error(f"Failed to populate daily facts: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
 def scheduled_scrape_job():
     """
     Job to be run by the scheduler.
-    Creates a DB record and triggers the scraping logic,
-    then refreshes the RegionalSummary table.
+    Creates a DB record and triggers the scraping logic, expires the
+    listings that have disappeared, then refreshes the RegionalSummary table
+    and the daily fact tables. On settings.full_crawl_weekday the spiders run
+    without their incremental shortcuts, so the sources can be expired.
     """
     logger.info("Starting scheduled daily scrape...")
     db = SessionLocal()
@@ -88,21 +270,27 @@ def scheduled_scrape_job():
         db.commit()
         db.refresh(scraper_run)
 
-        run_all_uk_spiders(scraper_run.id)
+        full_crawl = datetime.now().weekday() == get_settings().full_crawl_weekday
+        run_all_uk_spiders(scraper_run.id, full_crawl=full_crawl)
+        expire_stale_listings(scraper_run.id)
 
     except Exception as e:
         logger.error(f"Scheduled scrape failed to start: {e}")
     finally:
         db.close()
 
-    # Refresh regional summary after scraping new data
+    # Refresh the rollups after scraping new data
     populate_regional_summary()
+    populate_daily_facts()
 
 
 def start_scheduler():
     """
     Initialize and start the background scheduler.
     Runs daily scrape at 03:00 AM and regional summary refresh at 04:00 AM.
+    The daily facts are refreshed every 15 minutes, so jobs loaded outside the
+    scheduled scrape (load_spool.py, reparse, manual runs) reach the trend
+    endpoints quickly; a refresh with nothing new is a few index lookups.
     """
     scheduler = BackgroundScheduler()
 
@@ -124,6 +312,14 @@ def start_scheduler():
         replace_existing=True
     )
 
+    scheduler.add_job(
+        populate_daily_facts,
+        CronTrigger(minute="*/15"),
+        id="daily_facts_refresh",
+        name="Daily Facts Refresh",
+        replace_existing=True
+    )
+
     scheduler.start()
-    logger.info("Scheduler started. Daily scrape: 03:00 AM | Regional refresh: 04:00 AM.")
+    logger.info("Scheduler started. Daily scrape: 03:00 AM | Regional refresh: 04:00 AM | Daily facts: every 15 min.")
     return scheduler
@@ -29,7 +29,8 @@ def run_spider(spider_name: str, run_id: int):
         # Run scrapy crawl
         # We assume the scraper directory has scrapy.cfg
         result = subprocess.run(
-            [python_exe, "-m", "scrapy", "crawl", spider_name, "-s", "LOG_LEVEL=INFO"],
+            [python_exe, "-m", "scrapy", "crawl", spider_name, "-s", "LOG_LEVEL=INFO",
+             "-s", f"SCRAPER_RUN_ID={run_id}", *(FULL_CRAWL_SETTINGS if full_crawl else [])],
             cwd=SCRAPER_DIR,
             capture_output=True,
             text=True,
@@ -47,9 +48,50 @@ def run_spider(spider_name: str, run_id: int):
         return False, str(e)
 
 
-def run_all_uk_spiders(run_id: int):
+# Exit codes of `scrapy crawlall` (see games_jobs_scraper/commands/crawlall.py)
+CRAWLALL_STATUSES = {0: "completed", 3: "partial_success"}
+
+# Scrapy settings for a full crawl: without them the pagination stop and the sitemap
+# watermark make every crawl partial, and expire_stale_listings never expires a source
+FULL_CRAWL_SETTINGS = ["-s", "KNOWN_URL_PAGINATION_STOP_PAGES=0", "-s", "SITEMAP_FULL_CRAWL=True"]
+
+
+def run_spiders_concurrently(spider_names, run_id: int, full_crawl: bool = False):
+    """
+    Run several spiders concurrently in a single scrapy process (`scrapy crawlall`),
+    so Scrapy, the keyword extractor and the DB engine are only loaded once.
+    full_crawl=True turns off the incremental shortcuts (FULL_CRAWL_SETTINGS).
+
+    Returns:
+        (status, output) where status is completed / partial_success / failed
+    """
+    logger.info(f"Starting spiders concurrently: {', '.join(spider_names)} (Run ID: {run_id})")
+
+    try:
+        result = subprocess.run(
+            [sys.executable, "-m", "scrapy", "crawlall", *spider_names, "-s", "LOG_LEVEL=INFO",
+             "-s", f"SCRAPER_RUN_ID={run_id}", *(FULL_CRAWL_SETTINGS if full_crawl else [])],
+            cwd=SCRAPER_DIR,
+            capture_output=True,
+            text=True
+        )
+    except Exception as e:
+        logger.error(f"Error running spiders: {str(e)}")
+        return "failed", str(e)
+
+    status = CRAWLALL_STATUSES.get(result.returncode, "failed")
+    if status == "failed":
+        logger.error(f"Spiders failed (exit code {result.returncode}): {result.stderr[-2000:]}")
+    else:
+        logger.info(f"Spiders finished with status: {status}")
+    # Scrapy logs to stderr
+    return status, result.stderr
+
+
+def run_all_uk_spiders(run_id: int, full_crawl: bool = False):
     """
-    Sequentially run all 4 UK spiders.
+    Run all UK spiders concurrently in one scrapy process.
+    With full_crawl=True every listing page and sitemap entry is crawled.
     This function is intended to be run in a background thread/task.
     """
     spiders = [
@@ -64,6 +106,7 @@ def run_all_uk_spiders(run_id: int):
     ]
     
     db = SessionLocal()
+    scraper_run = None
     try:
         scraper_run = db.query(ScraperRun).get(run_id)
         if not scraper_run:
@@ -74,29 +117,18 @@ def run_all_uk_spiders(run_id: int):
         scraper_run.start_time = datetime.now()
         db.commit()
 
-        success_count = 0
-        total_output = ""
-
-        for spider in spiders:
-            success, output = run_spider(spider, run_id)
-            if success:
-                success_count += 1
-            total_output += f"\n--- {spider} ---\n{output}\n"
+        status, _ = run_spiders_concurrently(spiders, run_id, full_crawl=full_crawl)
 
-        # Update run status
+        # Update run status; job, duplicate and error counts are added by the
+        # scraper's ScraperRunStatsExtension as each spider closes
         scraper_run.end_time = datetime.now()
-        if success_count == len(spiders):
-            scraper_run.status = "completed"
-        elif success_count > 0:
-            scraper_run.status = "partial_success"
-        else:
-            scraper_run.status = "failed"
-            
-        # We could parse output to get job counts, or rely on distinct counting in DB
-        # For now, we'll verify via DB stats later
-        
+        scraper_run.status = status
         db.commit()
-        logger.info(f"Scraper run {run_id} finished. Status: {scraper_run.status}")
+        db.refresh(scraper_run)
+        logger.info(
+            f"Scraper run {run_id} finished. Status: {scraper_run.status}, "
+            f"jobs scraped: {scraper_run.jobs_scraped}, errors: {scraper_run.errors_count}"
+        )
 
     except Exception as e:
         logger.error(f"Scraper run {run_id} crashed: {e}")
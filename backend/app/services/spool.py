@@ -0,0 +1,265 @@
+"""
+Local item spool between the scrapers and the database.
+
+With SPOOL_ENABLED, the scrapy SpoolPipeline appends cleaned job items to
+segment files in a spool directory instead of writing to the database, so the
+crawl never waits on the database and a database outage loses nothing.
+SpoolLoader (run by load_spool.py) ingests the segments in large batches
+through JobIngestor.
+
+Format: one JSON object per line ("\\n" framed; a line without its newline is
+still being written and is left for the next pass). A segment is written as
+<name>.jsonl.part and renamed to <name>.jsonl once complete. The loader keeps
+its byte offset per segment in a <name>.offset checkpoint next to it, written
+after each committed batch; a crash between commit and checkpoint re-ingests
+at most one batch, which the upserts make harmless. Fully loaded segments are
+moved to loaded/ and can be replayed by moving them back.
+
+Database errors (RETRYABLE_ERRORS) leave the items in the spool to be retried
+from the checkpoint. Lines that don't parse, and items the ingestor rejects
+for any other reason, are appended to quarantine/<name>.jsonl and skipped, so
+one bad item can't stall the loader; fix and move them back to replay them.
+"""
+
+import json
+import logging
+import os
+import time
+import zlib
+from datetime import datetime
+from typing import Dict, Iterator, List, Mapping, NamedTuple, Optional, Tuple, Union
+
+from sqlalchemy.exc import InterfaceError, OperationalError, ProgrammingError
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = ".jsonl"
+PART_SUFFIX = ".jsonl.part"
+OFFSET_SUFFIX = ".offset"
+LOADED_DIR = "loaded"
+QUARANTINE_DIR = "quarantine"
+
+# Failures of the database rather than of the items (server down, locked, schema not migrated)
+RETRYABLE_ERRORS = (OperationalError, InterfaceError, ProgrammingError)
+
+# Item fields stored as ISO strings and parsed back on load
+DATETIME_FIELDS = ("posting_date", "scraped_date")
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot spool {type(value).__name__}")
+
+
+class SpoolWriter:
+    """Appends items to segment files of one spider, rolling over at segment_bytes."""
+
+    def __init__(self, directory: str, prefix: str, segment_bytes: int = 64 * 1024 * 1024):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.prefix = prefix
+        self.segment_bytes = segment_bytes
+        self.count = 0
+        self._sequence = 0
+        self._file = None
+        self._name = None
+
+    def write(self, item: Mapping) -> None:
+        if self._file is None:
+            self._open()
+        # One write per line; line buffering flushes it for loaders tailing the segment
+        self._file.write(json.dumps(dict(item), default=_default, separators=(",", ":")) + "\n")
+        self.count += 1
+        if self._file.tell() >= self.segment_bytes:
+            self.seal()
+
+    def _open(self) -> None:
+        self._sequence += 1
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+        self._name = f"{self.prefix}-{stamp}-{os.getpid()}-{self._sequence:04d}"
+        self._file = open(os.path.join(self.directory, self._name + PART_SUFFIX), "w", encoding="utf-8", buffering=1)
+
+    def seal(self) -> None:
+        """Close the current segment and publish it as complete."""
+        if self._file is None:
+            return
+        self._file.close()
+        os.replace(os.path.join(self.directory, self._name + PART_SUFFIX),
+                   os.path.join(self.directory, self._name + SEGMENT_SUFFIX))
+        self._file = None
+
+
+def segment_names(directory: str) -> List[Tuple[str, bool]]:
+    """(name, sealed) of every segment in the spool, oldest first."""
+    segments = {}
+    for filename in os.listdir(directory):
+        if filename.endswith(PART_SUFFIX):
+            segments.setdefault(filename[:-len(PART_SUFFIX)], False)
+        elif filename.endswith(SEGMENT_SUFFIX):
+            segments[filename[:-len(SEGMENT_SUFFIX)]] = True
+    return sorted(segments.items(), key=lambda entry: entry[0].rsplit("-", 3)[1:])
+
+
+def parse_item(line: bytes) -> Dict:
+    """Decode one spool line; raises ValueError if it is not a spooled item."""
+    item = json.loads(line)
+    if not isinstance(item, dict):
+        raise ValueError(f"Expected a JSON object, got {type(item).__name__}")
+    for field in DATETIME_FIELDS:
+        if item.get(field):
+            item[field] = datetime.fromisoformat(item[field])
+    return item
+
+
+class BadLine(NamedTuple):
+    """A spool line that doesn't parse, as yielded by read_items(skip_bad=True)."""
+    line: bytes
+    error: Exception
+
+
+def read_items(path: str, offset: int, skip_bad: bool = False) -> Iterator[Tuple[Union[Dict, BadLine], int]]:
+    """
+    (item, offset after it) for every complete line from offset on. Lines
+    that don't parse raise, or come back as BadLine with skip_bad.
+    """
+    with open(path, "rb") as segment:
+        segment.seek(offset)
+        for line in segment:
+            if not line.endswith(b"\n"):
+                return  # still being written
+            offset += len(line)
+            if not line.strip():
+                continue
+            try:
+                item = parse_item(line)
+            except (ValueError, TypeError) as e:
+                if not skip_bad:
+                    raise
+                item = BadLine(line.rstrip(b"\n"), e)
+            yield item, offset
+
+
+class SpoolLoader:
+    """
+    Ingests spool segments with a JobIngestor, batch_size items per transaction.
+
+    Several loaders can share a spool: with shard=(index, count) a loader only
+    takes the segments whose name hashes to its index.
+    """
+
+    def __init__(self, ingestor, directory: str, batch_size: int = 1000, shard: Tuple[int, int] = (0, 1)):
+        self.ingestor = ingestor
+        self.directory = directory
+        self.batch_size = max(1, batch_size)
+        self.shard = shard
+
+    def run_once(self) -> Dict[str, int]:
+        """Ingest everything currently in the spool; returns totals."""
+        totals = {"segments": 0, "items": 0, "saved": 0, "updated": 0, "near_duplicates": 0, "quarantined": 0}
+        for name, sealed in segment_names(self.directory):
+            if zlib.crc32(name.encode("utf-8")) % self.shard[1] != self.shard[0]:
+                continue
+            loaded = self._load_segment(name, sealed, totals)
+            if loaded:
+                totals["segments"] += 1
+        return totals
+
+    def follow(self, interval: float = 5.0) -> None:
+        """Keep tailing the spool until interrupted."""
+        while True:
+            try:
+                totals = self.run_once()
+            except RETRYABLE_ERRORS as e:
+                # Database down: items stay in the spool, retry from the last checkpoint
+                logger.error(f"Database unavailable, retrying spool load in {interval}s: {e}")
+                time.sleep(interval)
+                continue
+            if totals["items"]:
+                logger.info(f"Spool: loaded {totals['items']} items from {totals['segments']} segments")
+            else:
+                time.sleep(interval)
+
+    def _load_segment(self, name: str, sealed: bool, totals: Dict[str, int]) -> bool:
+        path = os.path.join(self.directory, name + (SEGMENT_SUFFIX if sealed else PART_SUFFIX))
+        offset = self._checkpoint(name)
+        batch, bad_lines, end = [], [], offset
+        try:
+            for item, end in read_items(path, offset, skip_bad=True):
+                if isinstance(item, BadLine):
+                    bad_lines.append(item)
+                    continue
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    self._ingest(name, batch, bad_lines, end, totals)
+                    batch, bad_lines = [], []
+        except FileNotFoundError:
+            # The .part file was sealed while we read it; the next pass picks up the rest
+            pass
+        if batch or bad_lines:
+            self._ingest(name, batch, bad_lines, end, totals)
+
+        if sealed:
+            os.makedirs(os.path.join(self.directory, LOADED_DIR), exist_ok=True)
+            os.replace(path, os.path.join(self.directory, LOADED_DIR, name + SEGMENT_SUFFIX))
+            self._remove_checkpoint(name)
+        return end > offset
+
+    def _ingest(self, name: str, batch: List[Dict], bad_lines: List[BadLine], end: int,
+                totals: Dict[str, int]) -> None:
+        """Ingest a batch, quarantining what can't be loaded, then checkpoint past it."""
+        try:
+            counts = [self.ingestor.ingest(batch)] if batch else []
+        except RETRYABLE_ERRORS:
+            raise
+        except Exception:
+            # Some item is bad: ingest one by one to find it
+            counts = [count for count in (self._ingest_item(name, item, totals) for item in batch) if count]
+        for bad_line in bad_lines:
+            self._quarantine(name, bad_line.line, bad_line.error, totals)
+        self._save_checkpoint(name, end)
+        totals["items"] += len(batch)
+        for count in counts:
+            for key in ("saved", "updated", "near_duplicates"):
+                totals[key] += count[key]
+
+    def _ingest_item(self, name: str, item: Dict, totals: Dict[str, int]) -> Optional[Dict[str, int]]:
+        try:
+            return self.ingestor.ingest([item])
+        except RETRYABLE_ERRORS:
+            raise
+        except Exception as e:
+            line = json.dumps(item, default=_default, separators=(",", ":")).encode("utf-8")
+            self._quarantine(name, line, e, totals)
+            return None
+
+    def _quarantine(self, name: str, line: bytes, error: Exception, totals: Dict[str, int]) -> None:
+        """Set aside a line that can't be loaded, in quarantine/<segment>.jsonl."""
+        directory = os.path.join(self.directory, QUARANTINE_DIR)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, name + SEGMENT_SUFFIX), "ab") as quarantine:
+            quarantine.write(line + b"\n")
+        totals["quarantined"] += 1
+        logger.warning(f"Spool: quarantined a line of {name}: {error!r}")
+
+    def _checkpoint_path(self, name: str) -> str:
+        return os.path.join(self.directory, name + OFFSET_SUFFIX)
+
+    def _checkpoint(self, name: str) -> int:
+        try:
+            with open(self._checkpoint_path(name), encoding="utf-8") as checkpoint:
+                return int(checkpoint.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _save_checkpoint(self, name: str, offset: int) -> None:
+        temp_path = self._checkpoint_path(name) + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as checkpoint:
+            checkpoint.write(str(offset))
+        os.replace(temp_path, self._checkpoint_path(name))
+
+    def _remove_checkpoint(self, name: str) -> None:
+        try:
+            os.remove(self._checkpoint_path(name))
+        except FileNotFoundError:
+            pass
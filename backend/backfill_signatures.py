@@ -0,0 +1,67 @@
+"""
+Backfill MinHash signatures for job listings stored before near-duplicate detection.
+
+New postings are only matched against jobs in job_signatures / job_lsh_buckets
+(see app.services.near_duplicates), which JobIngestor fills as it saves new
+canonical jobs. This one-off script indexes the canonical jobs that have no
+signature yet, in id order, one transaction per batch. It does not link
+existing jobs to each other; rerunning it only picks up jobs still missing.
+
+Usage:
+    python backfill_signatures.py [--batch-size 1000]
+"""
+
+import argparse
+import os
+import sys
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from dotenv import load_dotenv
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+from app.models import JobListing, JobSignature
+from app.services.near_duplicates import NearDuplicateIndex
+from logging_config import get_logger
+
+load_dotenv()
+
+logger = get_logger("nlp")
+
+
+def backfill(batch_size: int = 1000) -> int:
+    """Index every canonical job without a signature; returns the number of jobs indexed."""
+    Session = sessionmaker(bind=create_engine(os.getenv('DATABASE_URL')))
+
+    logger.info("Backfilling near-duplicate signatures...")
+    indexed = 0
+    last_id = 0
+    while True:
+        with Session() as session:
+            jobs = session.execute(
+                select(JobListing.id, JobListing.title, JobListing.description)
+                .outerjoin(JobSignature, JobSignature.job_id == JobListing.id)
+                .where(JobSignature.job_id == None)
+                .where(JobListing.canonical_job_id == None)
+                .where(JobListing.id > last_id)
+                .order_by(JobListing.id)
+                .limit(batch_size)
+            ).all()
+            if not jobs:
+                break
+
+            NearDuplicateIndex(session).index([(job.id, job.title, job.description) for job in jobs])
+            session.commit()
+        indexed += len(jobs)
+        last_id = jobs[-1].id
+        logger.info(f"Indexed {indexed} jobs")
+
+    logger.info(f"Done. Backfilled signatures for {indexed} jobs.")
+    return indexed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill near-duplicate signatures for stored jobs.")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Jobs per batch/commit")
+    args = parser.parse_args()
+    backfill(args.batch_size)
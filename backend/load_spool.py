@@ -0,0 +1,72 @@
+"""
+Load spooled scraper items into the database.
+
+The scrapers write to a local spool when run with SPOOL_ENABLED (see
+app/services/spool.py); this ingests the spooled items in large batches,
+checkpointing its offset in each segment. Run it once after the crawl, or
+with --follow alongside the scrapers. Several loaders can run in parallel
+with --shard 0/2, --shard 1/2, ...
+
+Usage:
+    python load_spool.py [--spool-dir DIR] [--batch-size 1000] [--follow] [--shard I/N]
+"""
+
+import argparse
+import logging
+import os
+import sys
+from sqlalchemy import create_engine
+from dotenv import load_dotenv
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+from app.nlp import create_extractor
+from app.services.ingest import JobIngestor
+from app.services.spool import SpoolLoader
+
+load_dotenv()
+
+CONFIG_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'config', 'keywords.yaml'))
+# The scrapers' default SPOOL_DIR, relative to scraper/
+DEFAULT_SPOOL_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scraper', '.cache', 'spool'))
+
+
+def load(spool_dir: str, batch_size: int = 1000, follow: bool = False, shard=(0, 1), interval: float = 5.0):
+    engine = create_engine(os.getenv('DATABASE_URL'))
+    ingestor = JobIngestor(engine, create_extractor(CONFIG_PATH))
+    print(f"Loaded {ingestor.load_keyword_rows()} keyword rows")
+
+    loader = SpoolLoader(ingestor, spool_dir, batch_size=batch_size, shard=shard)
+    if follow:
+        print(f"Following spool {spool_dir} (Ctrl+C to stop)...")
+        try:
+            loader.follow(interval)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    totals = loader.run_once()
+    print(
+        f"Done. Loaded {totals['items']} items from {totals['segments']} segments: "
+        f"{totals['saved']} new, {totals['updated']} updated, {totals['near_duplicates']} near-duplicates, "
+        f"{totals['quarantined']} quarantined."
+    )
+
+
+def parse_shard(value: str):
+    index, count = (int(part) for part in value.split('/'))
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError("shard must be I/N with 0 <= I < N")
+    return index, count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load spooled scraper items into the database.")
+    parser.add_argument("--spool-dir", default=os.getenv('SPOOL_DIR') or DEFAULT_SPOOL_DIR, help="Spool directory")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Items per transaction")
+    parser.add_argument("--follow", action="store_true", help="Keep tailing the spool")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls with --follow")
+    parser.add_argument("--shard", type=parse_shard, default=(0, 1), help="Load only shard I of N (e.g. 0/2)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    load(args.spool_dir, args.batch_size, args.follow, args.shard, args.interval)
@@ -0,0 +1,69 @@
+"""
+Backfill keyword occurrences for every stored job listing.
+
+Re-runs keyword extraction over all job descriptions (e.g. after
+config/keywords.yaml changes) and rewrites the keyword_occurrences rows.
+Jobs are read in id order and handed to JobIngestor.reextract in batches:
+one extract_ids_many pass and one transaction per batch, with the engine
+selected by KEYWORD_EXTRACTOR_ENGINE (see app.nlp.create_extractor).
+
+Usage:
+    python reextract_keywords.py [--batch-size 500] [--engine blank]
+"""
+
+import argparse
+import os
+import sys
+from sqlalchemy import create_engine, select
+from dotenv import load_dotenv
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+from app.models import JobListing
+from app.nlp import EXTRACTOR_ENGINES, create_extractor
+from app.services.ingest import JobIngestor
+from logging_config import get_logger
+
+load_dotenv()
+
+CONFIG_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'config', 'keywords.yaml'))
+
+logger = get_logger("nlp")
+
+
+def reextract(batch_size: int = 500, engine: str = None) -> int:
+    """Re-extract the keywords of every stored job; returns the number of jobs processed."""
+    db_engine = create_engine(os.getenv('DATABASE_URL'))
+    ingestor = JobIngestor(db_engine, create_extractor(CONFIG_PATH, engine=engine))
+    ingestor.load_keyword_rows()
+
+    logger.info("Re-extracting keywords for all job listings...")
+    processed = 0
+    last_id = 0
+    while True:
+        with ingestor.Session() as session:
+            jobs = session.execute(
+                select(JobListing.id, JobListing.description)
+                .where(JobListing.id > last_id)
+                .order_by(JobListing.id)
+                .limit(batch_size)
+            ).all()
+        if not jobs:
+            break
+
+        counts = ingestor.reextract([(job.id, job.description) for job in jobs])
+        processed += counts["extracted"]
+        last_id = jobs[-1].id
+        logger.info(f"Processed {processed} jobs ({counts['extraction_seconds']:.2f}s extracting the last batch)")
+
+    logger.info(f"Done. Re-extracted keywords for {processed} jobs.")
+    return processed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-extract keywords for all stored jobs.")
+    parser.add_argument("--batch-size", type=int, default=500, help="Jobs per extraction batch/commit")
+    parser.add_argument("--engine", choices=EXTRACTOR_ENGINES, default=None,
+                        help="Extraction engine (default: KEYWORD_EXTRACTOR_ENGINE, then blank)")
+    args = parser.parse_args()
+    reextract(args.batch_size, args.engine)
@@ -0,0 +1,299 @@
+"""
+Tests for bulk job ingestion (app.services.ingest) against a throwaway SQLite database.
+"""
+
+import os
+import threading
+import time
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import create_engine, func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.dialects import from_epoch_day
+from app.models import Base, JobListing, JobSignature, Keyword, KeywordOccurrence
+from app.nlp import create_extractor
+from app.services.ingest import JobIngestor
+from app.services.spool import QUARANTINE_DIR, SpoolLoader, SpoolWriter
+import backfill_signatures
+import reextract_keywords
+
+
+def make_item(i, description="Senior C++ programmer, c++ and Unity. Git."):
+    return {
+        "url": f"https://example.com/job/{i}",
+        "title": f"Programmer {i}",
+        "company": "Example Studio",
+        "location": "London",
+        "description": description,
+        "salary": None,
+        "posting_date": datetime(2026, 2, 1 + i % 20),
+        "source_website": "example.com",
+        "scraped_date": datetime.now(),
+        "content_hash": f"hash-{i}",
+    }
+
+
+def without_timings(counts):
+    return {key: value for key, value in counts.items() if not key.endswith("_seconds")}
+
+
+def make_ingestor(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'ingest.db'}")
+    Base.metadata.create_all(engine)
+    ingestor = JobIngestor(engine, create_extractor(engine="aho_corasick"))
+    ingestor.load_keyword_rows()
+    return ingestor, sessionmaker(bind=engine)
+
+
+def test_ingest_batch(tmp_path):
+    ingestor, Session = make_ingestor(tmp_path)
+    items = [make_item(i) for i in range(5)]
+
+    counts = ingestor.ingest(items)
+    assert without_timings(counts) == {"saved": 5, "updated": 0, "extracted": 5, "skipped_unchanged": 0, "near_duplicates": 0}
+    assert items[0]["keywords"]["skills"] == {"C++": 2, "Git": 1}
+
+    with Session() as session:
+        assert session.query(func.count(JobListing.id)).scalar() == 5
+        assert sorted(k for (k,) in session.query(Keyword.keyword)) == ["C++", "Git", "Senior", "Unity"]
+        assert session.query(func.count(KeywordOccurrence.id)).scalar() == 20
+        # Git is listed under skills and software: one occurrence row, counted once
+        git = session.query(KeywordOccurrence.frequency).join(Keyword).filter(Keyword.keyword == "Git")
+        assert [frequency for (frequency,) in git] == [1] * 5
+
+    # Re-scraping the same jobs only bumps scraped_date
+    counts = ingestor.ingest([make_item(i) for i in range(5)])
+    assert without_timings(counts) == {"saved": 0, "updated": 5, "extracted": 0, "skipped_unchanged": 5, "near_duplicates": 0}
+
+
+def test_ingest_changed_description(tmp_path):
+    ingestor, Session = make_ingestor(tmp_path)
+    ingestor.ingest([make_item(1)])
+
+    counts = ingestor.ingest([make_item(1, description="C++ C++ C++ and Blender")])
+    assert without_timings(counts) == {"saved": 0, "updated": 1, "extracted": 1, "skipped_unchanged": 0, "near_duplicates": 0}
+
+    with Session() as session:
+        frequencies = dict(
+            session.query(Keyword.keyword, KeywordOccurrence.frequency)
+            .join(KeywordOccurrence)
+        )
+        # Senior, Unity and Git are no longer in the description
+        assert frequencies == {"C++": 3, "Blender": 1}
+        assert session.query(JobListing.description).scalar() == "C++ C++ C++ and Blender"
+
+
+class SlowExtractor:
+    """Wraps an extractor to make keyword extraction take a while, like the spaCy model engine."""
+
+    def __init__(self, extractor, seconds):
+        self.extractor = extractor
+        self.seconds = seconds
+
+    @property
+    def keyword_index(self):
+        return self.extractor.keyword_index
+
+    def extract_ids_many(self, texts):
+        time.sleep(self.seconds)
+        return self.extractor.extract_ids_many(texts)
+
+
+def test_ingest_concurrent_batches(tmp_path):
+    # Busy timeout well below the extraction time: a batch still holding the
+    # write lock while extracting would make the other fail with "database is locked"
+    engine = create_engine(f"sqlite:///{tmp_path / 'ingest.db'}", connect_args={"timeout": 0.3})
+    Base.metadata.create_all(engine)
+    ingestor = JobIngestor(engine, SlowExtractor(create_extractor(engine="aho_corasick"), 0.6))
+    ingestor.load_keyword_rows()
+    ingestor.ingest([make_item(0)])  # Existing job, re-scraped with a new description below
+
+    errors = []
+
+    def ingest(items):
+        try:
+            ingestor.ingest(items)
+        except Exception as e:
+            errors.append(e)
+
+    workers = [
+        threading.Thread(target=ingest, args=([make_item(i) for i in range(1, 4)],)),
+        threading.Thread(target=ingest, args=([make_item(0, "Lead Unity developer.")]
+                                               + [make_item(i) for i in range(4, 7)],)),
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert errors == []
+    with sessionmaker(bind=engine)() as session:
+        assert session.query(func.count(JobListing.id)).scalar() == 7
+        keywords = dict(
+            session.query(Keyword.keyword, func.count(KeywordOccurrence.id))
+            .join(KeywordOccurrence).group_by(Keyword.keyword)
+        )
+        # Job 0's new description only mentions Lead and Unity
+        assert keywords == {"C++": 6, "Git": 6, "Senior": 6, "Unity": 7, "Lead": 1}
+
+
+def test_ingest_refresh(tmp_path):
+    ingestor, Session = make_ingestor(tmp_path)
+    first = make_item(1)
+    first["scraped_date"] = datetime(2026, 1, 5)
+    ingestor.ingest([first])
+
+    # Re-parsed with a fixed selector: same description, new salary; keywords rebuilt
+    reparsed = make_item(1, description="Unity and Git.")
+    reparsed["salary"] = "£50,000"
+    reparsed["posting_date"] = datetime(2026, 3, 1, 9, 30)
+    counts = ingestor.ingest([reparsed], refresh=True)
+    assert without_timings(counts) == {"saved": 0, "updated": 1, "extracted": 1, "skipped_unchanged": 0, "near_duplicates": 0}
+
+    with Session() as session:
+        job = session.query(JobListing).one()
+        assert job.salary == "£50,000"
+        assert job.scraped_date == datetime(2026, 1, 5)
+        assert from_epoch_day(job.posting_day) == date(2026, 3, 1)
+        keywords = [k for (k,) in session.query(Keyword.keyword).join(KeywordOccurrence)]
+        assert sorted(keywords) == ["Git", "Unity"]
+
+
+def test_reextract_keywords(tmp_path, monkeypatch):
+    ingestor, Session = make_ingestor(tmp_path)
+    ingestor.ingest([make_item(1), make_item(2, description="Unity artist."), make_item(3)])
+    with Session() as session:
+        # Occurrences left over from an older config, and a job whose description is gone
+        session.query(KeywordOccurrence).update({"frequency": 9})
+        session.query(JobListing).filter_by(url=make_item(3)["url"]).update({"description": None})
+        session.commit()
+
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'ingest.db'}")
+    monkeypatch.setenv("KEYWORD_EXTRACTOR_ENGINE", "aho_corasick")
+    assert reextract_keywords.reextract(batch_size=2) == 3
+
+    with Session() as session:
+        keywords = (
+            session.query(JobListing.url, Keyword.keyword, KeywordOccurrence.frequency)
+            .join(KeywordOccurrence, KeywordOccurrence.job_id == JobListing.id).join(Keyword)
+        )
+        assert sorted(keywords) == [
+            (make_item(1)["url"], "C++", 2), (make_item(1)["url"], "Git", 1),
+            (make_item(1)["url"], "Senior", 1), (make_item(1)["url"], "Unity", 1),
+            (make_item(2)["url"], "Unity", 1),
+        ]
+
+
+CROSS_POSTED = (
+    "<p>Join our award-winning studio as a Senior Gameplay Programmer. You will build combat, "
+    "traversal and AI systems in C++ for an unannounced AAA action game on Unreal Engine 5, "
+    "working closely with design and animation. 5+ years of industry experience required.</p>"
+)
+
+
+def test_ingest_near_duplicates(tmp_path):
+    ingestor, Session = make_ingestor(tmp_path)
+    original = {**make_item(1, CROSS_POSTED), "title": "Senior Gameplay Programmer"}
+    ingestor.ingest([original])
+
+    # Same role on two other boards, differently formatted, plus an unrelated job
+    reposts = [
+        {**make_item(2, CROSS_POSTED.replace("<p>", "").replace("</p>", " Apply now!")),
+         "title": "Senior Gameplay Programmer (UE5)", "company": "Example Studio Ltd", "source_website": "other.com"},
+        {**make_item(3, CROSS_POSTED), "title": "Senior Gameplay Programmer",
+         "location": "London, UK", "source_website": "third.com"},
+        {**make_item(4, "Junior 2D artist for a mobile puzzle game. Photoshop and Spine."),
+         "title": "Junior Artist", "source_website": "other.com"},
+    ]
+    counts = ingestor.ingest(reposts)
+    assert counts["saved"] == 3
+    assert counts["near_duplicates"] == 2
+    assert counts["extracted"] == 1
+
+    with Session() as session:
+        canonical = dict(session.query(JobListing.url, JobListing.canonical_job_id))
+        original_id = session.query(JobListing.id).filter_by(url=original["url"]).scalar()
+        assert canonical == {
+            original["url"]: None,
+            reposts[0]["url"]: original_id,
+            reposts[1]["url"]: original_id,
+            reposts[2]["url"]: None,
+        }
+        # Duplicates get no keyword occurrences of their own
+        job_ids = {job_id for (job_id,) in session.query(KeywordOccurrence.job_id).distinct()}
+        assert original_id in job_ids and len(job_ids) == 2
+
+
+def test_backfill_signatures(tmp_path, monkeypatch):
+    ingestor, Session = make_ingestor(tmp_path)
+    with Session() as session:
+        # Stored before near-duplicate detection: no signatures
+        session.add_all([
+            JobListing(**{**make_item(1, CROSS_POSTED), "title": "Senior Gameplay Programmer"}),
+            JobListing(**make_item(2, "Junior 2D artist for a mobile puzzle game.")),
+        ])
+        session.commit()
+
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'ingest.db'}")
+    assert backfill_signatures.backfill(batch_size=1) == 2
+    assert backfill_signatures.backfill() == 0
+
+    repost = {**make_item(3, CROSS_POSTED), "title": "Senior Gameplay Programmer", "source_website": "other.com"}
+    assert ingestor.ingest([repost])["near_duplicates"] == 1
+    with Session() as session:
+        assert session.query(JobSignature).count() == 2
+
+
+def test_spool_loader(tmp_path):
+    ingestor, Session = make_ingestor(tmp_path)
+    spool = tmp_path / "spool"
+    writer = SpoolWriter(str(spool), "example")
+    for i in range(3):
+        writer.write(make_item(i))
+
+    # An open segment is tailed up to its last complete line
+    loader = SpoolLoader(ingestor, str(spool), batch_size=2)
+    totals = loader.run_once()
+    assert (totals["items"], totals["saved"]) == (3, 3)
+
+    writer.write(make_item(3))
+    writer.seal()
+    totals = loader.run_once()
+    assert (totals["items"], totals["saved"]) == (1, 1)
+    assert os.listdir(spool / "loaded") and not [name for name in os.listdir(spool) if name != "loaded"]
+
+    with Session() as session:
+        assert session.query(func.count(JobListing.id)).scalar() == 4
+        assert session.query(JobListing.posting_date).filter_by(url="https://example.com/job/1").scalar() == datetime(2026, 2, 2)
+
+
+def test_spool_loader_quarantine(tmp_path):
+    """Bad lines and items are set aside; database errors leave the spool untouched."""
+    ingestor, Session = make_ingestor(tmp_path)
+    spool = tmp_path / "spool"
+    writer = SpoolWriter(str(spool), "example")
+    writer.write(make_item(0))
+    writer.write({**make_item(1), "title": None})  # Rejected by the database (NOT NULL)
+    writer._file.write('{"url": "https://example.com/job/2", "title"\n')  # Truncated JSON
+    writer.write(make_item(3))
+    writer.seal()
+
+    class DatabaseDown:
+        def ingest(self, items):
+            raise OperationalError("INSERT", {}, Exception("connection refused"))
+
+    with pytest.raises(OperationalError):
+        SpoolLoader(DatabaseDown(), str(spool)).run_once()
+    assert [name for name in os.listdir(spool) if name.endswith(".jsonl")]
+
+    totals = SpoolLoader(ingestor, str(spool)).run_once()
+    assert (totals["items"], totals["saved"], totals["quarantined"]) == (3, 2, 2)
+    with open(spool / QUARANTINE_DIR / os.listdir(spool / QUARANTINE_DIR)[0], encoding="utf-8") as quarantine:
+        lines = quarantine.read().splitlines()
+    assert len(lines) == 2
+    assert {line.split(",")[0] for line in lines} == {'{"url": "https://example.com/job/2"', '{"url":"https://example.com/job/1"'}
+    with Session() as session:
+        assert session.query(func.count(JobListing.id)).scalar() == 2
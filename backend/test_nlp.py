@@ -1,4 +1,28 @@
+import importlib.util
+import random
+import sqlite3
+
+import pytest
+import spacy
+
+from app.nlp import create_extractor, keyword_extractor
+from app.nlp.aho_corasick import AhoCorasickMatcher
+from app.nlp.extraction_cache import ExtractionCache, CachedExtractor
 from app.nlp.keyword_extractor import KeywordExtractor
+from app.nlp.keywords_config import build_keyword_index, keyword_id
+
+SAMPLE_TEXTS = [
+    """
+    We are looking for a Senior Game Developer with 5+ years of experience.
+    You must be proficient in C++ and Python.
+    Experience with Unity or Unreal Engine is required.
+    Knowledge of Agile methodologies and Git is a plus.
+    """,
+    "Junior UI/UX Design role (Full-time, Remote). Tools: Photoshop, JIRA, perforce; c# a bonus.",
+    "Mid-level Technical Artist - Maya/ZBrush, Substance Painter. 3ds Max, VR/AR and AAA console games.",
+    "C++11 vs C++, unity's Unity-based tools; Photoshop/Illustrator, 15+ years of git-flow. UI/UX Designer, Lead.",
+    "",
+]
 
 def test_extraction():
     print("Initializing KeywordExtractor...")
@@ -51,5 +75,199 @@ def test_extraction():
     else:
         print("\n⚠️ Extraction issues found.")
 
+
+def test_blank_engine():
+    """The tokenizer-only engine finds the expected keywords without en_core_web_sm."""
+    extractor = KeywordExtractor(engine="blank")
+    keywords = extractor.extract(SAMPLE_TEXTS[0])
+
+    assert set(keywords["skills"]) >= {"C++", "Python", "Agile", "Git"}
+    assert set(keywords["software"]) >= {"Unity", "Unreal Engine"}
+    assert set(keywords["experience"]) >= {"Senior", "5+ years"}
+
+    batched = list(extractor.extract_many(SAMPLE_TEXTS, batch_size=2))
+    assert batched == [extractor.extract_with_counts(text) for text in SAMPLE_TEXTS]
+
+
+# Components of the en_core_web_sm pipeline
+MODEL_PIPE_NAMES = ("tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner")
+
+
+def model_stand_in(name):
+    """
+    en_core_web_sm's pipeline rebuilt from the English language defaults the
+    model's tokenizer is configured with, without its trained weights. Its
+    components fail if they ever run, so matching must only tokenize.
+    """
+    nlp = spacy.blank("en")
+    for pipe_name in MODEL_PIPE_NAMES:
+        nlp.add_pipe(pipe_name)
+    return nlp
+
+
+@pytest.fixture
+def model_engine(monkeypatch):
+    """The "model" engine: en_core_web_sm if installed, model_stand_in otherwise."""
+    if importlib.util.find_spec("en_core_web_sm") is None:
+        monkeypatch.setattr(keyword_extractor.spacy, "load", model_stand_in)
+    return KeywordExtractor(engine="model")
+
+
+def test_blank_engine_parity(model_engine):
+    """The blank and model-backed engines produce identical matches."""
+    blank = KeywordExtractor(engine="blank")
+    assert set(model_engine.nlp.pipe_names) >= set(MODEL_PIPE_NAMES)
+
+    vocabulary = [keyword for keyword, _ in blank.keyword_index.values()]
+    texts = SAMPLE_TEXTS + [
+        " ".join(f"({keyword}), {keyword}'s {keyword}-based {keyword}. {keyword.upper()}/{keyword.lower()}"
+                 for keyword in vocabulary)
+    ]
+    for text in texts:
+        assert blank.extract(text) == model_engine.extract(text)
+        assert blank.extract_with_counts(text) == model_engine.extract_with_counts(text)
+    assert list(blank.extract_ids_many(texts)) == list(model_engine.extract_ids_many(texts, batch_size=2))
+
+
+def test_aho_corasick_parity():
+    """The spaCy-free automaton backend matches the spaCy tokenizer engine."""
+    automaton = create_extractor(engine="aho_corasick")
+    blank = create_extractor(engine="blank")
+
+    for text in SAMPLE_TEXTS:
+        assert automaton.extract(text) == blank.extract(text)
+        assert automaton.extract_with_counts(text) == blank.extract_with_counts(text)
+
+    counts = automaton.extract_with_counts(SAMPLE_TEXTS[1])
+    assert counts["skills"] == {"UI/UX Design": 1, "C#": 1}
+
+
+def test_aho_corasick_vocabulary_parity():
+    """Every configured keyword, in punctuation-heavy contexts, matches like the spaCy tokenizer engine."""
+    automaton = create_extractor(engine="aho_corasick")
+    blank = create_extractor(engine="blank")
+    contexts = ["({k})", "[{k}]", "{k}-based", "{k}'s", "{k}’s", "x/{k}", "{k}/x", "{k}.", "{k}...", "#{k}",
+                "{k}++", "{k}#", "{k}.net", "{k}.Net", "pre-{k}", "{k}/{k}", "@{k}", "{k}%", "{k}:", "e.g.{k}",
+                "{k}—x", "{k},{k}", '"{k}"', "“{k}”", "${k}", "{k}!?", "unity.com/{k}", "{k}-{k}", "{k}3", "3{k}"]
+
+    for keyword, _ in automaton.keyword_index.values():
+        for variant in {keyword, keyword.lower(), keyword.upper()}:
+            text = " ".join(context.format(k=variant) for context in contexts)
+            assert automaton.extract_with_counts(text) == blank.extract_with_counts(text), text
+
+
+def test_aho_corasick_random_parity():
+    """Random keyword / punctuation soups match like the spaCy tokenizer engine."""
+    automaton = create_extractor(engine="aho_corasick")
+    blank = create_extractor(engine="blank")
+    vocabulary = [keyword for keyword, _ in automaton.keyword_index.values()]
+    fragments = list("()[]{}<>.,;:!?'\"-/+#&@%$*_~=|…—–’“”") + [
+        "'s", "...", "e.g.", "don't", "https://", "www.", ".com", "/careers", "İ", "ß", "°C", "5km", "10%", "US$",
+        "and", "with", "experience", "x", "3", "Senior", "C", "Net",
+    ]
+    # Tokenizer exceptions that are not reproduced (see app.nlp.token_boundaries)
+    emoticons = [rule for rule in blank.nlp.tokenizer.rules
+                 if any(char.isalnum() for char in rule) and not all(char.isalnum() or char in ".'’" for char in rule)]
+
+    rng = random.Random(11)
+    compared = 0
+    for _ in range(2000):
+        parts = [rng.choice(vocabulary) if rng.random() < 0.4 else rng.choice(fragments)
+                 for _ in range(rng.randint(3, 14))]
+        parts = [rng.choice([part, part.lower(), part.upper()]) for part in parts]
+        text = "".join(part + rng.choice(["", "", " ", "\n"]) for part in parts)
+        if any(emoticon in text for emoticon in emoticons):
+            continue
+        assert automaton.extract_with_counts(text) == blank.extract_with_counts(text), text
+        compared += 1
+    assert compared > 1000
+
+
+def test_aho_corasick_matcher_token_edges():
+    """Matches line up with token edges and offsets refer to the original text."""
+    matcher = AhoCorasickMatcher()
+    matcher.add("C", "c")
+    matcher.add("C++", "cpp")
+    matcher.add("Unreal Engine", "unreal")
+    matcher.build()
+
+    assert [payload for _, _, payload in matcher.find_all("C++ (C), c++11")] == ["cpp", "c"]
+    assert [payload for _, _, payload in matcher.find_all("CC, C.net, ABC")] == []
+
+    # "İ" lowercases to two characters; offsets must not drift past it
+    text = "İİ Unreal   engine and UNREAL ENGINE."
+    matches = list(matcher.find_all(text))
+    assert [text[start:end] for start, end, _ in matches] == ["UNREAL ENGINE"]
+
+
+def test_canonical_keywords():
+    """Matches are reported under the configured keyword, whatever their casing."""
+    for engine in ("blank", "aho_corasick"):
+        extractor = create_extractor(engine=engine)
+        counts = extractor.extract_with_counts("C++ and c++, UNITY and unity. git")
+
+        assert counts["skills"] == {"C++": 2, "Git": 1}
+        assert counts["software"] == {"Unity": 2, "Git": 1}
+        assert extractor.keyword_index[keyword_id("c++")] == ("C++", ("skills",))
+        # One ID per keyword, whichever categories list it
+        assert extractor.keyword_index[keyword_id("GIT")] == ("Git", ("skills", "software"))
+        assert next(extractor.extract_ids_many(["C++ and c++, git"])) == {keyword_id("C++"): 2, keyword_id("Git"): 1}
+
+
+def test_keyword_ids_are_stable():
+    """Keyword IDs depend on the keyword itself, not its position in the config."""
+    index = build_keyword_index({"skills": ["C++", "Git"], "software": ["Unity", "git"]})
+    reordered = build_keyword_index({"software": ["Blender", "Unity"], "skills": ["Python", "C++"]})
+
+    assert index[keyword_id("C++")] == reordered[keyword_id("C++")] == ("C++", ("skills",))
+    assert keyword_id("Unreal  Engine") == keyword_id("unreal engine")
+    assert index[keyword_id("Git")] == ("Git", ("skills", "software"))
+
+
+def test_extraction_cache(tmp_path):
+    """Cached results survive across cache instances via the SQLite tier."""
+    cache_path = str(tmp_path / "extraction_cache.sqlite3")
+    extractor = create_extractor(engine="aho_corasick")
+
+    cached = CachedExtractor(extractor, ExtractionCache(cache_path, max_entries=2))
+    first = list(cached.extract_many(SAMPLE_TEXTS))
+    assert first == [extractor.extract_with_counts(text) for text in SAMPLE_TEXTS]
+    assert cached.cache.misses == len(SAMPLE_TEXTS) - 1  # empty text is never cached
+    cached.cache.close()
+
+    # A fresh process (new cache instance) is served from disk
+    reopened = CachedExtractor(extractor, ExtractionCache(cache_path, max_entries=2))
+    assert reopened.extract_with_counts(SAMPLE_TEXTS[0]) == first[0]
+    assert reopened.extract_with_counts(SAMPLE_TEXTS[0]) == first[0]
+    assert reopened.cache.stats() == {"hits": 2, "memory_hits": 1, "disk_hits": 1, "misses": 0}
+    reopened.cache.close()
+
+
+def test_extraction_cache_call_stats_and_eviction(tmp_path):
+    """Each call reports its own hits, and the SQLite tier stays within max_disk_entries."""
+    cache_path = str(tmp_path / "extraction_cache.sqlite3")
+    extractor = create_extractor(engine="aho_corasick")
+    texts = [f"C++ job {i}" for i in range(10)]
+
+    # Another config version's results are evicted first
+    stale = ExtractionCache(cache_path)
+    stale.put_many({f"digest-{i}": [] for i in range(5)}, "old-version")
+    stale.close()
+
+    cached = CachedExtractor(extractor, ExtractionCache(cache_path, max_entries=100, max_disk_entries=10))
+    first, second = {}, {}
+    list(cached.extract_ids_many(texts[:6], cache_stats=first))
+    list(cached.extract_ids_many(texts[4:] + texts[4:], cache_stats=second))
+    assert first == {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 6}
+    assert second == {"hits": 2, "memory_hits": 2, "disk_hits": 0, "misses": 4}
+
+    conn = sqlite3.connect(cache_path)
+    versions = [version for (version,) in conn.execute("SELECT config_version FROM extraction_cache")]
+    conn.close()
+    assert len(versions) <= 10
+    assert set(versions) == {extractor.config_version}
+    cached.cache.close()
+
+
 if __name__ == "__main__":
     test_extraction()
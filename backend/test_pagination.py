@@ -0,0 +1,83 @@
+"""
+Tests for cursor pagination (app.pagination) of the job endpoints against a throwaway SQLite database.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app import pagination
+from app.api import jobs, keywords
+from app.models import Base, JobListing, Keyword, KeywordOccurrence
+from app.pagination import decode_cursor
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pagination.db'}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        session.add(Keyword(id=1, keyword="Unity", category="software"))
+        for i in range(1, 12):
+            # Pairs of jobs share a posting date; jobs 10 and 11 have none
+            posting_date = datetime(2026, 3, 1) + timedelta(days=i // 2) if i < 10 else None
+            session.add(JobListing(id=i, url=f"u{i}", title=f"Job {i}", company="S", source_website="a.com",
+                                   posting_date=posting_date, is_active=0 if i == 5 else 1))
+            session.add(KeywordOccurrence(job_id=i, keyword_id=1))
+        session.commit()
+        yield session
+
+
+def get_jobs(session, **params):
+    defaults = dict(page=1, page_size=3, location=None, company=None, keyword=None, start_date=None,
+                    end_date=None, sort="date", cursor=None, total="exact")
+    return asyncio.run(jobs.get_jobs(db=session, **{**defaults, **params}))
+
+
+def test_cursor_pagination(session):
+    pages, cursor = [], None
+    while True:
+        result = get_jobs(session, cursor=cursor, total="none")
+        assert result["total"] is None and result["total_pages"] is None
+        pages.append([job.id for job in result["items"]])
+        cursor = result["next_cursor"]
+        if not cursor:
+            break
+    assert pages == [[9, 8, 7], [6, 4, 3], [2, 1, 11], [10]]
+
+    # Same order as page numbers
+    assert [[job.id for job in get_jobs(session, page=page)["items"]] for page in range(1, 5)] == pages
+
+    first = get_jobs(session)
+    assert (first["total"], first["total_pages"]) == (10, 4)
+    assert decode_cursor(first["next_cursor"]) == (datetime(2026, 3, 4), 7)
+    assert get_jobs(session, total="estimate")["total"] == 10
+
+    with pytest.raises(HTTPException):
+        get_jobs(session, cursor="not-a-cursor")
+    with pytest.raises(HTTPException):
+        get_jobs(session, keyword="job", sort="relevance", cursor=first["next_cursor"])
+
+
+def test_keyword_jobs_cursor(session):
+    result = asyncio.run(keywords.get_jobs_by_keyword("unity", db=session, page=1, page_size=4, cursor=None,
+                                                      total="exact"))
+    assert [job.id for job in result["items"]] == [9, 8, 7, 6]
+    assert result["total"] == 10
+    result = asyncio.run(keywords.get_jobs_by_keyword("unity", db=session, page=1, page_size=4,
+                                                      cursor=result["next_cursor"], total="none"))
+    assert [job.id for job in result["items"]] == [4, 3, 2, 1]
+
+
+def test_keyset_queries_follow_the_index(session):
+    # Each phase is a backward range scan of a posting_date index: no temp B-tree sort, no OR
+    query = session.query(JobListing).filter(JobListing.is_active != 0)
+    for phase in (pagination._dated_after(query, (datetime(2026, 3, 4), 7)),
+                  pagination._undated_after(query, 11)):
+        statement = phase.limit(4).statement.compile(compile_kwargs={"literal_binds": True})
+        plan = " ".join(row[-1] for row in session.execute(text(f"EXPLAIN QUERY PLAN {statement}")))
+        assert "posting_date (posting_date" in plan and "TEMP B-TREE" not in plan, plan
@@ -0,0 +1,337 @@
+"""
+Tests for the scheduled maintenance jobs (app.services.scheduler) against a throwaway SQLite database.
+"""
+
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, literal, select
+from sqlalchemy.orm import sessionmaker
+
+from app.api import keywords, trends
+from app.dialects import (
+    bucket_start, epoch_bucket, epoch_month_start, from_epoch_day, to_epoch_day, to_epoch_month,
+)
+from app.models import (
+    Base, JobDailyFact, JobListing, Keyword, KeywordDailyFact, KeywordOccurrence, RegionalSummary, ScraperRun,
+    ScraperRunSpider, StaleFactDay, StaleSummaryPartition,
+)
+from app.nlp import create_extractor
+from app.services import scheduler
+from app.services.ingest import JobIngestor
+
+RUN_START = datetime(2026, 3, 10, 3, 0)
+
+
+@pytest.fixture
+def Session(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'scheduler.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(scheduler, "SessionLocal", Session)
+    return Session
+
+
+def add_job(session, i, source, scraped_days_ago):
+    session.add(JobListing(url=f"https://{source}/job/{i}", title=f"Job {i}", company="Example Studio",
+                           source_website=source, scraped_date=RUN_START - timedelta(days=scraped_days_ago),
+                           is_active=1))
+
+
+def test_expire_stale_listings(Session):
+    with Session() as session:
+        session.add(ScraperRun(id=1, source_website="scheduled_daily_uk", status="completed", start_time=RUN_START))
+        session.add_all([
+            # aswift.com: its only spider crawled fully
+            ScraperRunSpider(run_id=1, spider="aardvark_swift", source_website="aswift.com", full_crawl=1,
+                             start_time=RUN_START),
+            # gamesindustry.biz: one of its two spiders stopped early
+            ScraperRunSpider(run_id=1, spider="gamesindustry_uk", source_website="gamesindustry.biz", full_crawl=1,
+                             start_time=RUN_START),
+            ScraperRunSpider(run_id=1, spider="gamesindustry_london", source_website="gamesindustry.biz", full_crawl=0,
+                             start_time=RUN_START),
+        ])
+        add_job(session, 1, "aswift.com", 0)   # seen in this run
+        add_job(session, 2, "aswift.com", 1)   # within the grace period
+        add_job(session, 3, "aswift.com", 5)   # gone
+        add_job(session, 4, "gamesindustry.biz", 5)
+        session.commit()
+
+    assert scheduler.expire_stale_listings(1) == {"aswift.com": 1}
+
+    with Session() as session:
+        active = dict(session.query(JobListing.url, JobListing.is_active))
+        assert active == {
+            "https://aswift.com/job/1": 1,
+            "https://aswift.com/job/2": 1,
+            "https://aswift.com/job/3": 0,
+            "https://gamesindustry.biz/job/4": 1,
+        }
+
+
+def test_expire_stale_listings_promotes_duplicates(Session):
+    """An expired canonical job hands its keywords and signature to its oldest live duplicate."""
+    ingestor = JobIngestor(Session.kw["bind"], create_extractor(engine="aho_corasick"))
+    ingestor.load_keyword_rows()
+    description = ("Join our award-winning studio as a Senior Gameplay Programmer. You will build combat, "
+                   "traversal and AI systems in C++ for an unannounced AAA action game on Unreal Engine 5.")
+    postings = [
+        {"url": f"https://{source}/job/1", "title": "Senior Gameplay Programmer", "company": "Example Studio",
+         "location": "London", "description": description, "source_website": source,
+         "posting_date": datetime(2026, 3, 1), "scraped_date": RUN_START - timedelta(days=days_ago)}
+        for source, days_ago in (("aswift.com", 5), ("other.com", 0), ("third.com", 0))
+    ]
+    for posting in postings:
+        ingestor.ingest([posting])
+    with Session() as session:
+        session.add(ScraperRun(id=1, source_website="scheduled_daily_uk", status="completed", start_time=RUN_START))
+        session.add(ScraperRunSpider(run_id=1, spider="aardvark_swift", source_website="aswift.com", full_crawl=1,
+                                     start_time=RUN_START))
+        session.commit()
+
+    assert scheduler.expire_stale_listings(1) == {"aswift.com": 1}
+
+    with Session() as session:
+        ids = dict(session.query(JobListing.source_website, JobListing.id))
+        canonical = dict(session.query(JobListing.source_website, JobListing.canonical_job_id))
+        assert canonical == {"aswift.com": ids["other.com"], "other.com": None, "third.com": ids["other.com"]}
+        assert {job_id for (job_id,) in session.query(KeywordOccurrence.job_id)} == {ids["other.com"]}
+    scheduler.populate_regional_summary()
+    # Still counted once, through the live posting
+    rows = summary(Session)
+    assert rows and set(rows.values()) == {1}
+
+    # New cross-posts now match the promoted job
+    ingestor.ingest([{**postings[0], "url": "https://fourth.com/job/1", "source_website": "fourth.com"}])
+    with Session() as session:
+        assert session.query(JobListing.canonical_job_id).filter_by(source_website="fourth.com").scalar() == ids["other.com"]
+
+
+def test_expire_stale_listings_failed_run(Session):
+    with Session() as session:
+        session.add(ScraperRun(id=2, source_website="scheduled_daily_uk", status="failed", start_time=RUN_START))
+        session.add(ScraperRunSpider(run_id=2, spider="aardvark_swift", source_website="aswift.com", full_crawl=1,
+                                     start_time=RUN_START))
+        add_job(session, 1, "aswift.com", 5)
+        session.commit()
+
+    assert scheduler.expire_stale_listings(2) == {}
+
+
+def summary(Session):
+    with Session() as session:
+        return {
+            (row.region, row.date.strftime("%Y-%m"), row.keyword_id): row.count
+            for row in session.query(RegionalSummary)
+        }
+
+
+def test_populate_regional_summary_incremental(Session):
+    with Session() as session:
+        session.add_all([Keyword(id=1, keyword="C++", category="skills"), Keyword(id=2, keyword="Unity", category="skills")])
+        jobs = [
+            JobListing(id=1, url="u1", title="A", company="S", location="London", posting_date=datetime(2026, 1, 5),
+                       is_active=1, updated_at=datetime(2026, 1, 5)),
+            JobListing(id=2, url="u2", title="B", company="S", location="London", posting_date=datetime(2026, 1, 9),
+                       is_active=1, updated_at=datetime(2026, 1, 9)),
+            JobListing(id=3, url="u3", title="C", company="S", location="Leeds", posting_date=datetime(2026, 2, 1),
+                       is_active=1, updated_at=datetime(2026, 2, 1)),
+        ]
+        session.add_all(jobs)
+        session.add_all([
+            KeywordOccurrence(job_id=1, keyword_id=1, frequency=1),
+            KeywordOccurrence(job_id=2, keyword_id=1, frequency=1),
+            KeywordOccurrence(job_id=2, keyword_id=2, frequency=1),
+            KeywordOccurrence(job_id=3, keyword_id=2, frequency=1),
+        ])
+        session.commit()
+
+    scheduler.populate_regional_summary()
+    assert summary(Session) == {
+        ("London", "2026-01", 1): 2, ("London", "2026-01", 2): 1, ("Leeds", "2026-02", 2): 1,
+    }
+
+    # Job 2 expires; Leeds is not touched, so its (tampered) row must not be recomputed
+    with Session() as session:
+        job = session.get(JobListing, 2)
+        job.is_active, job.updated_at = 0, datetime.now()
+        session.query(RegionalSummary).filter_by(region="Leeds").update({"count": 99})
+        session.commit()
+
+    scheduler.populate_regional_summary()
+    assert summary(Session) == {("London", "2026-01", 1): 1, ("Leeds", "2026-02", 2): 99}
+
+    scheduler.populate_regional_summary(full=True)
+    assert summary(Session) == {("London", "2026-01", 1): 1, ("Leeds", "2026-02", 2): 1}
+
+
+def test_populate_regional_summary_moved_job(Session):
+    """A refresh that changes a job's location or posting month recomputes its old partition too."""
+    ingestor = JobIngestor(Session.kw["bind"], create_extractor(engine="aho_corasick"))
+    item = {"url": "https://a.com/job/1", "title": "Programmer", "company": "S", "location": "London",
+            "source_website": "a.com", "description": "Senior C++ programmer.",
+            "posting_date": datetime(2026, 1, 5, 12), "scraped_date": datetime(2026, 1, 6)}
+    ingestor.ingest([item])
+    scheduler.populate_regional_summary()
+    assert {(region, month) for region, month, _ in summary(Session)} == {("London", "2026-01")}
+
+    ingestor.ingest([{**item, "location": "Leeds", "posting_date": datetime(2026, 2, 2, 9)}], refresh=True)
+    with Session() as session:
+        assert [(row.region, row.month) for row in session.query(StaleSummaryPartition)] == [
+            ("London", to_epoch_month(date(2026, 1, 1))),
+        ]
+
+    scheduler.populate_regional_summary()
+    assert {(region, month) for region, month, _ in summary(Session)} == {("Leeds", "2026-02")}
+
+    with Session() as session:
+        session.query(StaleSummaryPartition).update({"marked_at": datetime.now() - timedelta(hours=1)})
+        session.commit()
+    scheduler.populate_regional_summary()
+    with Session() as session:
+        assert session.query(StaleSummaryPartition).count() == 0
+
+
+def keyword_facts(Session):
+    with Session() as session:
+        return {
+            (from_epoch_day(row.day).isoformat(), row.keyword_id, row.region, row.source): (row.job_count, row.occurrences)
+            for row in session.query(KeywordDailyFact)
+        }
+
+
+def test_populate_daily_facts(Session):
+    today = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
+    old = datetime(2026, 1, 5, 12)
+    with Session() as session:
+        session.add_all([
+            Keyword(id=1, keyword="C++", category="skills"),
+            Keyword(id=2, keyword="Senior", category="experience"),
+        ])
+        session.add_all([
+            JobListing(id=1, url="u1", title="A", company="S", region="london", source_website="a.com",
+                       posting_date=today, updated_at=old),
+            JobListing(id=2, url="u2", title="B", company="S", region="london", source_website="a.com",
+                       posting_date=today.replace(hour=17), updated_at=old),
+            # Expired jobs still count on their posting day; no posting date falls back to scraped_date
+            JobListing(id=3, url="u3", title="C", company="S", source_website="b.com", is_active=0,
+                       scraped_date=old, updated_at=old),
+            # Near-duplicate of job 1: not counted again
+            JobListing(id=4, url="u4", title="A", company="S", region="london", source_website="b.com",
+                       posting_date=today, canonical_job_id=1, updated_at=old),
+        ])
+        session.add_all([
+            KeywordOccurrence(job_id=1, keyword_id=1, frequency=2),
+            KeywordOccurrence(job_id=2, keyword_id=1, frequency=1),
+            KeywordOccurrence(job_id=2, keyword_id=2, frequency=1),
+            KeywordOccurrence(job_id=3, keyword_id=2, frequency=1),
+            KeywordOccurrence(job_id=4, keyword_id=1, frequency=1),
+        ])
+        session.commit()
+
+    scheduler.populate_daily_facts()
+    day = today.date().isoformat()
+    assert keyword_facts(Session) == {
+        (day, 1, "london", "a.com"): (2, 3),
+        (day, 2, "london", "a.com"): (1, 1),
+        ("2026-01-05", 2, "", "b.com"): (1, 1),
+    }
+
+    # Job 2 drops "C++"; only today's facts are recomputed
+    with Session() as session:
+        session.query(KeywordOccurrence).filter_by(job_id=2, keyword_id=1).delete()
+        session.get(JobListing, 2).updated_at = datetime.now()
+        session.query(KeywordDailyFact).filter_by(day=to_epoch_day(date(2026, 1, 5))).update({"job_count": 99})
+        session.commit()
+
+    scheduler.populate_daily_facts()
+    assert keyword_facts(Session) == {
+        (day, 1, "london", "a.com"): (1, 2),
+        (day, 2, "london", "a.com"): (1, 1),
+        ("2026-01-05", 2, "", "b.com"): (99, 1),
+    }
+
+    scheduler.populate_daily_facts(full=True)
+    with Session() as session:
+        assert {(from_epoch_day(row.day).isoformat(), row.region, row.source): row.job_count
+                for row in session.query(JobDailyFact)} == {(day, "london", "a.com"): 2, ("2026-01-05", "", "b.com"): 1}
+
+        # The endpoints read the facts
+        top = asyncio.run(keywords.get_top_keywords(db=session, limit=10, category=None, start_date=None, end_date=None))
+        assert {(k["keyword"], k["total_frequency"], k["job_count"]) for k in top["keywords"]} == {
+            ("C++", 2, 1), ("Senior", 2, 2),
+        }
+        top = asyncio.run(keywords.get_top_keywords(db=session, limit=10, category=None,
+                                                    start_date=today.date().isoformat(), end_date=None))
+        assert {k["keyword"]: k["job_count"] for k in top["keywords"]} == {"C++": 1, "Senior": 1}
+        # Full ISO datetimes select the whole day they fall on
+        top = asyncio.run(keywords.get_top_keywords(db=session, limit=10, category=None,
+                                                    start_date=today.replace(hour=23).isoformat(),
+                                                    end_date=today.strftime("%Y-%m-%dT00:00:00Z")))
+        assert {k["keyword"]: k["job_count"] for k in top["keywords"]} == {"C++": 1, "Senior": 1}
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(keywords.get_top_keywords(db=session, limit=10, category=None,
+                                                  start_date="last week", end_date=None))
+        assert error.value.status_code == 400
+
+        over_time = asyncio.run(trends.get_job_trends(db=session, days=30))
+        assert over_time == {"data": [{"date": day, "count": 2}]}
+
+        weekly = asyncio.run(trends.get_trends(db=session, keyword=None, category=None, days=30, interval="week"))
+        assert list(weekly["trends"].values()) == [[
+            {"keyword": "C++", "category": "skills", "count": 1},
+            {"keyword": "Senior", "category": "experience", "count": 1},
+        ]]
+        monthly = asyncio.run(trends.get_trends(db=session, keyword=None, category=None, days=30, interval="month"))
+        assert list(monthly["trends"]) == [today.strftime("%Y-%m")]
+
+        emerging = asyncio.run(trends.get_emerging_skills(db=session, category=None, limit=10))
+        assert {e["keyword"]: (e["this_week"], e["last_week"]) for e in emerging["emerging"]} == {
+            "C++": (1, 0), "Senior": (1, 0),
+        }
+
+        breakdown = asyncio.run(trends.get_experience_breakdown(db=session))
+        assert breakdown == {"breakdown": [{"level": "Senior", "job_count": 2}]}
+
+
+def test_populate_daily_facts_moved_posting_day(Session):
+    """A refresh that changes a job's posting date recomputes both its old and its new day."""
+    ingestor = JobIngestor(Session.kw["bind"], create_extractor(engine="aho_corasick"))
+    item = {"url": "https://a.com/job/1", "title": "Programmer", "company": "S", "region": "london",
+            "source_website": "a.com", "description": "Senior C++ programmer.",
+            "posting_date": datetime(2026, 1, 5, 12), "scraped_date": datetime(2026, 1, 6)}
+    ingestor.ingest([item])
+    scheduler.populate_daily_facts()
+    assert {key[0] for key in keyword_facts(Session)} == {"2026-01-05"}
+
+    ingestor.ingest([{**item, "posting_date": datetime(2026, 1, 7, 9)}], refresh=True)
+    with Session() as session:
+        assert [row.day for row in session.query(StaleFactDay)] == [to_epoch_day(datetime(2026, 1, 5))]
+
+    scheduler.populate_daily_facts()
+    assert {key[0] for key in keyword_facts(Session)} == {"2026-01-07"}
+    with Session() as session:
+        assert [from_epoch_day(row.day).isoformat() for row in session.query(JobDailyFact)] == ["2026-01-07"]
+        # Marked just now: kept until no ingest transaction from before the refresh can be open
+        assert session.query(StaleFactDay).count() == 1
+        session.query(StaleFactDay).update({"marked_at": datetime.now() - timedelta(hours=1)})
+        session.commit()
+
+    scheduler.populate_daily_facts()
+    with Session() as session:
+        assert session.query(StaleFactDay).count() == 0
+    assert {key[0] for key in keyword_facts(Session)} == {"2026-01-07"}
+
+
+def test_epoch_bucket(Session):
+    sunday = date(2026, 10, 18)
+    day, month = literal(to_epoch_day(sunday)), literal(to_epoch_month(sunday))
+    with Session() as session:
+        assert [bucket_start(session.execute(select(epoch_bucket(day, month, interval))).scalar(), interval)
+                for interval in ("day", "week", "month")] == [
+            date(2026, 10, 18), date(2026, 10, 12), date(2026, 10, 1),
+        ]
+        assert session.execute(select(epoch_month_start(session, month))).scalar() == datetime(2026, 10, 1)
+    assert [to_epoch_month(value) for value in (date(1970, 1, 1), date(1970, 12, 31), date(1971, 1, 1))] == [0, 11, 12]
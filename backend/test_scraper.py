@@ -0,0 +1,451 @@
+"""
+Tests for the scrapy middlewares in scraper/games_jobs_scraper, against a
+throwaway SQLite database.
+"""
+
+import os
+import sys
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from scrapy import Request, Spider
+from scrapy.http import HtmlResponse
+from scrapy.exceptions import IgnoreRequest
+from scrapy.utils.sitemap import Sitemap
+from scrapy.crawler import CrawlerRunner
+from scrapy.utils.test import get_crawler
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base, JobListing, ScraperRun, ScraperRunSpider
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scraper"))
+
+from games_jobs_scraper import resources  # noqa: E402
+from games_jobs_scraper.extensions import ScraperRunStatsExtension  # noqa: E402
+from games_jobs_scraper.fixtures import FixtureRecorderMiddleware, ReplayDownloadHandler  # noqa: E402
+from games_jobs_scraper.gazetteer import Location, normalize_location  # noqa: E402
+from games_jobs_scraper.items import JobItem  # noqa: E402
+from games_jobs_scraper.known_urls import KnownUrlIndex  # noqa: E402
+from games_jobs_scraper.histograms import LatencyHistogram  # noqa: E402
+from games_jobs_scraper.pipelines import DataCleaningPipeline, DatabasePipeline, TimedItemPipelineManager  # noqa: E402
+from games_jobs_scraper.page_archive import ArchiveDownloadHandler, PageArchive, PageArchiveMiddleware  # noqa: E402
+from games_jobs_scraper.middlewares import CallbackTimingMiddleware, KnownPaginationMiddleware, KnownUrlMiddleware  # noqa: E402
+from games_jobs_scraper.spiders.hitmarker_london_spider import HitmarkerLondonSpider  # noqa: E402
+from games_jobs_scraper.watermarks import WatermarkStore  # noqa: E402
+
+
+class ExampleSpider(Spider):
+    name = "example"
+
+    def parse(self, response):
+        pass
+
+    def parse_job(self, response):
+        pass
+
+
+@pytest.fixture
+def database_url(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'scraper.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        session.add_all(
+            JobListing(url=f"https://example.com/job/{i}", title=f"Job {i}", company="Example Studio",
+                       scraped_date=datetime(2026, 1, 1), is_active=0)
+            for i in range(3)
+        )
+        session.commit()
+    monkeypatch.setenv("DATABASE_URL", url)
+    yield url
+    resources._known_urls.pop(url, None)
+    resources._engines.pop(url, None)
+
+
+def test_known_url_index(database_url):
+    index = KnownUrlIndex.load(create_engine(database_url))
+    assert len(index) == 3
+    assert "https://example.com/job/1" in index
+    # Canonicalized: fragments are ignored
+    assert index.job_id("https://example.com/job/2#apply") == index.job_id("https://example.com/job/2")
+    assert "https://example.com/job/9" not in index
+    assert index.any_new(["https://example.com/job/0", "https://example.com/job/9"])
+    assert not index.any_new(["https://example.com/job/0", "https://example.com/job/1"])
+
+
+def test_known_url_middleware(database_url):
+    crawler = get_crawler(ExampleSpider, {"KNOWN_URL_FILTER_ENABLED": True})
+    spider = ExampleSpider()
+    crawler.stats.open_spider(spider)
+    middleware = KnownUrlMiddleware.from_crawler(crawler)
+    middleware.spider_opened(spider)
+
+    assert middleware.process_request(Request("https://example.com/job/9"), spider) is None
+    assert middleware.process_request(Request("https://example.com/job/0", meta={"known_url_filter": False}), spider) is None
+    with pytest.raises(IgnoreRequest):
+        middleware.process_request(Request("https://example.com/job/0"), spider)
+    assert crawler.stats.get_value("known_urls/skipped") == 1
+
+    middleware._touch_jobs(sorted(middleware.touched_ids))
+    with sessionmaker(bind=create_engine(database_url))() as session:
+        active = {job.url: job.is_active for job in session.query(JobListing)}
+    assert active == {
+        "https://example.com/job/0": 1,
+        "https://example.com/job/1": 0,
+        "https://example.com/job/2": 0,
+    }
+
+
+def listing_page(spider, job_ids, known_pages=0):
+    """A listing response and its output: job links, then a next-page link."""
+    request = Request("https://example.com/jobs", callback=spider.parse, meta={"known_pages": known_pages})
+    response = HtmlResponse(request.url, body=b"", request=request)
+    output = [Request(f"https://example.com/job/{i}", callback=spider.parse_job) for i in job_ids]
+    output.append(Request("https://example.com/jobs?page=2", callback=spider.parse))
+    return response, output
+
+
+def test_known_pagination_middleware(database_url):
+    crawler = get_crawler(ExampleSpider, {"KNOWN_URL_PAGINATION_STOP_PAGES": 2})
+    spider = ExampleSpider()
+    crawler.stats.open_spider(spider)
+    middleware = KnownPaginationMiddleware.from_crawler(crawler)
+    middleware.spider_opened(spider)
+
+    # A page with a new job keeps paginating and resets the run of known pages
+    output = list(middleware.process_spider_output(*listing_page(spider, [0, 9], known_pages=1), spider))
+    assert [request.meta.get("known_pages") for request in output] == [None, None, 0]
+
+    # First all-known page still paginates
+    output = list(middleware.process_spider_output(*listing_page(spider, [0, 1]), spider))
+    assert len(output) == 3
+    assert output[-1].meta["known_pages"] == 1
+
+    # Second consecutive all-known page drops the next-page link
+    output = list(middleware.process_spider_output(*listing_page(spider, [1, 2], known_pages=1), spider))
+    assert [request.url for request in output] == ["https://example.com/job/1", "https://example.com/job/2"]
+    assert crawler.stats.get_value("pagination/pages_skipped") == 1
+
+
+SITEMAP = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://hitmarker.net/jobs/old</loc><lastmod>2026-01-01T08:00:00Z</lastmod></url>
+  <url><loc>https://hitmarker.net/jobs/overlap</loc><lastmod>2026-01-09T20:00:00+00:00</lastmod></url>
+  <url><loc>https://hitmarker.net/jobs/new</loc><lastmod>2026-01-12</lastmod></url>
+  <url><loc>https://hitmarker.net/jobs/undated</loc></url>
+</urlset>"""
+
+
+def test_sitemap_watermark(tmp_path):
+    store_path = str(tmp_path / "watermarks.json")
+    WatermarkStore(store_path).set("hitmarker", datetime(2026, 1, 10, tzinfo=timezone.utc))
+    crawler = get_crawler(HitmarkerLondonSpider, {"WATERMARK_STORE_PATH": store_path,
+                                                  "SITEMAP_WATERMARK_OVERLAP_HOURS": 12})
+    spider = HitmarkerLondonSpider.from_crawler(crawler)
+
+    entries = [entry["loc"] for entry in spider.sitemap_filter(Sitemap(SITEMAP))]
+    assert entries == [
+        "https://hitmarker.net/jobs/overlap",
+        "https://hitmarker.net/jobs/new",
+        "https://hitmarker.net/jobs/undated",
+    ]
+    assert crawler.stats.get_value("sitemap/entries_skipped") == 1
+
+    # Interrupted crawls keep the old watermark
+    spider.spider_closed(spider, "shutdown")
+    assert WatermarkStore(store_path).get("hitmarker") == datetime(2026, 1, 10, tzinfo=timezone.utc)
+    spider.spider_closed(spider, "finished")
+    assert WatermarkStore(store_path).get("hitmarker") == datetime(2026, 1, 12, tzinfo=timezone.utc)
+
+
+def test_sitemap_full_crawl(tmp_path):
+    """SITEMAP_FULL_CRAWL requests every entry, so the crawl can count as full, and still advances the watermark."""
+    store_path = str(tmp_path / "watermarks.json")
+    WatermarkStore(store_path).set("hitmarker", datetime(2026, 1, 10, tzinfo=timezone.utc))
+    crawler = get_crawler(HitmarkerLondonSpider, {"WATERMARK_STORE_PATH": store_path,
+                                                  "SITEMAP_FULL_CRAWL": True})
+    spider = HitmarkerLondonSpider.from_crawler(crawler)
+
+    entries = [entry["loc"] for entry in spider.sitemap_filter(Sitemap(SITEMAP))]
+    assert len(entries) == 4
+    assert crawler.stats.get_value("sitemap/entries_skipped") is None
+
+    spider.spider_closed(spider, "finished")
+    assert WatermarkStore(store_path).get("hitmarker") == datetime(2026, 1, 12, tzinfo=timezone.utc)
+
+
+def test_sitemap_watermark_failed_batch(tmp_path):
+    """A finished crawl whose database writes failed keeps the old watermark."""
+    from twisted.python.failure import Failure
+
+    store_path = str(tmp_path / "watermarks.json")
+    WatermarkStore(store_path).set("hitmarker", datetime(2026, 1, 10, tzinfo=timezone.utc))
+    crawler = get_crawler(HitmarkerLondonSpider, {"WATERMARK_STORE_PATH": store_path,
+                                                  "SITEMAP_WATERMARK_OVERLAP_HOURS": 12})
+    spider = HitmarkerLondonSpider.from_crawler(crawler)
+    list(spider.sitemap_filter(Sitemap(SITEMAP)))
+
+    pipeline = DatabasePipeline()
+    pipeline.stats = crawler.stats
+    pipeline._batch_failed(Failure(RuntimeError("database is locked")), [{}] * 3, spider)
+
+    spider.spider_closed(spider, "finished")
+    assert WatermarkStore(store_path).get("hitmarker") == datetime(2026, 1, 10, tzinfo=timezone.utc)
+
+
+def test_extraction_cache_stats_per_spider(tmp_path, database_url):
+    """Spiders sharing one ingestor (scrapy crawlall) each report only their own cache hits."""
+    from app.nlp import create_extractor
+    from app.nlp.extraction_cache import CachedExtractor, ExtractionCache
+    from app.services.ingest import JobIngestor
+
+    extractor = CachedExtractor(create_extractor(engine="aho_corasick"), ExtractionCache(None))
+    ingestor = JobIngestor(create_engine(database_url), extractor)
+
+    def job(i, description):
+        return {"url": f"https://example.org/job/{i}", "title": f"Job {i}", "company": "Example Studio",
+                "description": description, "scraped_date": datetime(2026, 1, 2)}
+
+    crawlers = []
+    for i, batch in enumerate([[job(1, "C++ and Unity"), job(2, "Python")], [job(3, "C++ and Unity")]]):
+        crawler = get_crawler(ExampleSpider)
+        spider = ExampleSpider.from_crawler(crawler)
+        pipeline = DatabasePipeline()
+        pipeline.stats, pipeline.ingestor = crawler.stats, ingestor
+        pipeline._batch_written(pipeline._write_batch(batch), batch, spider)
+        crawlers.append(crawler)
+
+    first, second = (crawler.stats.get_stats() for crawler in crawlers)
+    assert (first["extraction_cache/misses"], first.get("extraction_cache/hits", 0)) == (2, 0)
+    assert (second.get("extraction_cache/misses", 0), second["extraction_cache/hits"]) == (0, 1)
+
+
+class JobPageHandler(BaseHTTPRequestHandler):
+    """Stand-in job site: one page with an ETag that answers 304 when it matches."""
+    etag = '"v1"'
+    requests_seen = []
+
+    def do_GET(self):
+        JobPageHandler.requests_seen.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = b"<html><h1>Gameplay Programmer</h1></html>"
+        self.send_response(200)
+        self.send_header("ETag", self.etag)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class JobPageSpider(Spider):
+    name = "job_page"
+
+    def parse(self, response):
+        yield {"url": response.url, "title": response.css("h1::text").get(), "company": "Example Studio"}
+
+
+def test_conditional_requests(tmp_path, database_url):
+    from twisted.internet import defer, reactor
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), JobPageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/job/1"
+    with sessionmaker(bind=create_engine(database_url))() as session:
+        session.add(JobListing(url=url, title="Gameplay Programmer", company="Example Studio", is_active=0))
+        session.commit()
+
+    runner = CrawlerRunner({
+        "TWISTED_REACTOR": None,
+        "REQUEST_FINGERPRINTER_IMPLEMENTATION": "2.7",
+        "ROBOTSTXT_OBEY": False,
+        "LOG_ENABLED": False,
+        "CONDITIONAL_REQUESTS_ENABLED": True,
+        "CONDITIONAL_REQUESTS_STORE_PATH": str(tmp_path / "validators.sqlite3"),
+        # Both enabled, as in settings.py: the known URL filter steps aside, otherwise
+        # the stored job would be dropped before it could be revalidated
+        "KNOWN_URL_FILTER_ENABLED": True,
+        "DOWNLOADER_MIDDLEWARES": {
+            "games_jobs_scraper.middlewares.KnownUrlMiddleware": 50,
+            "games_jobs_scraper.middlewares.ConditionalRequestMiddleware": 60,
+        },
+    })
+    crawlers = [runner.create_crawler(JobPageSpider) for _ in range(2)]
+
+    @defer.inlineCallbacks
+    def crawl_twice():
+        try:
+            for crawler in crawlers:
+                yield runner.crawl(crawler, start_urls=[url])
+        finally:
+            reactor.stop()
+
+    reactor.callWhenRunning(crawl_twice)
+    reactor.run()
+    server.shutdown()
+
+    first, second = (crawler.stats.get_stats() for crawler in crawlers)
+    assert JobPageHandler.requests_seen == [None, '"v1"']
+    assert first["item_scraped_count"] == 1
+    assert second.get("item_scraped_count", 0) == 0
+    assert second["conditional/not_modified"] == 1
+    assert "known_urls/skipped" not in first and "known_urls/skipped" not in second
+    with sessionmaker(bind=create_engine(database_url))() as session:
+        assert session.query(JobListing).filter_by(url=url).one().is_active == 1
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("London, UK", Location("London", "london", "england")),
+    ("New London Road, Bristol", Location("Bristol", "south-west", "england")),
+    ("Leamington Spa, Warwickshire", Location("Leamington Spa", "west-midlands", "england")),
+    ("Leicestershire", Location("Leicester", "east-midlands", "england")),
+    ("Remote - Newcastle-upon-Tyne", Location("Newcastle upon Tyne", "north-east", "england")),
+    ("Scotland (Hybrid)", Location(None, "scotland", "scotland")),
+    ("Remote", None),
+])
+def test_normalize_location(raw, expected):
+    assert normalize_location(raw) == expected
+
+
+def test_data_cleaning_location():
+    item = JobItem(url="https://example.com/job/1", title=" Level  Designer ", company="Example Studio",
+                   location="  Guildford,   Surrey ", description="Design levels.")
+    item = DataCleaningPipeline().process_item(item, ExampleSpider())
+    assert (item["location"], item["region"], item["nation"]) == ("Guildford", "south-east", "england")
+    assert item["title"] == "Level Designer"
+
+
+def test_scraper_run_stats(database_url):
+    with sessionmaker(bind=create_engine(database_url))() as session:
+        session.add(ScraperRun(id=7, source_website="manual_trigger_uk_all", jobs_scraped=5))
+        session.commit()
+
+    crawler = get_crawler(ExampleSpider, {"SCRAPER_RUN_ID": 7})
+    spider = ExampleSpider()
+    crawler.stats.open_spider(spider)
+    for key, value in {"start_time": datetime.now(timezone.utc), "item_scraped_count": 12, "item_dropped_count": 2,
+                       "db/items_saved": 9, "db/items_updated": 3, "db/near_duplicates": 1,
+                       "downloader/request_count": 20, "downloader/response_bytes": 50000,
+                       "db/write_seconds": 0.25, "extraction/seconds": 0.5, "log_count/ERROR": 1}.items():
+        crawler.stats.set_value(key, value)
+
+    extension = ScraperRunStatsExtension.from_crawler(crawler)
+    extension.save(database_url, extension.collect(spider, "finished"))
+
+    with sessionmaker(bind=create_engine(database_url))() as session:
+        row = session.query(ScraperRunSpider).one()
+        assert (row.run_id, row.spider, row.finish_reason) == (7, "example", "finished")
+        assert (row.items_scraped, row.items_saved, row.items_updated, row.requests) == (12, 9, 3, 20)
+        assert row.extraction_seconds == 0.5
+        assert row.full_crawl == 0  # an error was logged
+        run = session.get(ScraperRun, 7)
+        assert (run.jobs_scraped, run.duplicates_found, run.errors_count) == (17, 3, 1)
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram()
+    for seconds in [0.00005] * 90 + [0.03] * 9 + [120.0]:
+        histogram.observe(seconds)
+    summary = histogram.to_dict()
+    assert summary["count"] == 100
+    assert summary["p50_ms"] == 0.1
+    assert summary["p99_ms"] == 51.2
+    assert summary["max_ms"] == 120000.0
+    assert summary["buckets"] == {"<=0.1ms": 90, "<=51.2ms": 9, ">52.4s": 1}
+
+
+def test_timing_histograms():
+    crawler = get_crawler(ExampleSpider, {
+        "LATENCY_HISTOGRAMS_ENABLED": True,
+        "ITEM_PIPELINES": {"games_jobs_scraper.pipelines.DataCleaningPipeline": 300},
+    })
+    spider = ExampleSpider()
+
+    manager = TimedItemPipelineManager.from_crawler(crawler)
+    item = JobItem(url="https://example.com/job/1", title="Designer", company="Example Studio", description="")
+    results = []
+    manager.process_item(item, spider).addCallback(results.append)
+    assert results == [item]
+    assert manager.histograms.to_dict()["DataCleaningPipeline"]["count"] == 1
+
+    middleware = CallbackTimingMiddleware.from_crawler(crawler)
+    response, output = listing_page(spider, [1, 2])
+    assert list(middleware.process_spider_output(response, iter(output), spider)) == output
+    assert middleware.histograms.to_dict()["parse"]["count"] == 1
+
+
+def test_fixture_record_and_replay(tmp_path):
+    settings = {"FIXTURE_RECORD_ENABLED": True, "FIXTURE_DIR": str(tmp_path)}
+    crawler = get_crawler(ExampleSpider, settings)
+    spider = ExampleSpider()
+    recorder = FixtureRecorderMiddleware.from_crawler(crawler)
+    recorder.spider_opened(spider)
+    request = Request("https://example.com/job/1")
+    live = HtmlResponse(request.url, body=b"<h1>Designer</h1>", headers={"Content-Type": "text/html", "ETag": "v1"})
+    assert recorder.process_response(request, live, spider) is live
+    recorder.spider_closed(spider)
+    assert (tmp_path / "example.jsonl.gz").exists()
+
+    handler = ReplayDownloadHandler.from_crawler(get_crawler(ExampleSpider, settings))
+    responses = []
+    handler.download_request(Request("https://example.com/job/1"), spider).addCallback(responses.append)
+    handler.download_request(Request("https://example.com/job/2"), spider).addCallback(responses.append)
+    replayed, missing = responses
+    assert isinstance(replayed, HtmlResponse)
+    assert replayed.css("h1::text").get() == "Designer"
+    assert replayed.headers.get("ETag") == b"v1"
+    assert "replay" in replayed.flags
+    assert missing.status == 404 and "replay-missing" in missing.flags
+
+
+def test_page_archive(tmp_path):
+    archive = PageArchive(str(tmp_path), segment_bytes=32)
+    body = b"<h1>Designer</h1>" * 20
+    assert archive.put("example", "parse_job", "https://example.com/job/1", 200, {"Content-Type": ["text/html"]}, body)
+    # Same body under another URL is stored once
+    assert not archive.put("example", "parse_job", "https://example.com/job/2", 200, {}, body)
+    assert archive.put("example", "parse_job", "https://example.com/job/3", 200, {}, b"<h1>Artist</h1>")
+    archive.close()
+
+    archive = PageArchive(str(tmp_path))
+    assert archive.get("https://example.com/job/2")["body"] == body
+    assert archive.get("https://example.com/job/3")["body"] == b"<h1>Artist</h1>"
+    assert archive.get("https://example.com/job/4") is None
+    assert len(list(archive.pages("example"))) == 3
+    assert "segment-000002.z" in os.listdir(tmp_path)
+    archive.close()
+
+
+def test_page_archive_reparse(tmp_path):
+    settings = {"PAGE_ARCHIVE_ENABLED": True, "PAGE_ARCHIVE_DIR": str(tmp_path / "archive")}
+    spider = ExampleSpider()
+    middleware = PageArchiveMiddleware.from_crawler(get_crawler(ExampleSpider, settings))
+    middleware.spider_opened(spider)
+
+    # Listing pages (which yield requests) are not archived, job pages are
+    listing, output = listing_page(spider, [1])
+    assert list(middleware.process_spider_output(listing, iter(output), spider)) == output
+    job = HtmlResponse("https://example.com/job/1", body=b"<h1>Designer</h1>",
+                       request=Request("https://example.com/job/1", callback=spider.parse_job))
+    item = JobItem(url=job.url, title="Designer")
+    assert list(middleware.process_spider_output(job, iter([item]), spider)) == [item]
+    middleware.spider_closed(spider)
+
+    settings["PAGE_ARCHIVE_REPARSE"] = True
+    crawler = get_crawler(ExampleSpider, settings)
+    middleware = PageArchiveMiddleware.from_crawler(crawler)
+    start = Request("https://example.com/jobs")
+    requests = list(middleware.process_start_requests(iter([start]), spider))
+    assert [(r.url, r.callback) for r in requests] == [("https://example.com/job/1", spider.parse_job)]
+
+    responses = []
+    ArchiveDownloadHandler.from_crawler(crawler).download_request(requests[0], spider).addCallback(responses.append)
+    assert responses[0].css("h1::text").get() == "Designer"
@@ -0,0 +1,85 @@
+"""
+Tests for full-text job search (app.search) against a throwaway SQLite database.
+"""
+
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app import search
+from app.api import jobs
+from app.models import Base, JobListing
+
+
+def make_session(tmp_path, install=True):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as session:
+        session.add_all([
+            JobListing(id=1, url="u1", title="Gameplay Programmer", company="S", source_website="a.com",
+                       description="Unity and C#.", posting_date=datetime(2026, 3, 3)),
+            JobListing(id=2, url="u2", title="Technical Artist", company="S", source_website="a.com",
+                       description="Work with our programmers on C++ shaders.", posting_date=datetime(2026, 3, 2)),
+            JobListing(id=3, url="u3", title="Producer", company="S", source_website="a.com",
+                       description="Ship games written in C and Lua.", posting_date=datetime(2026, 3, 1)),
+        ])
+        session.commit()
+    if install:
+        assert search.install(engine)
+    return Session
+
+
+def search_ids(session, keyword, sort="date"):
+    result = asyncio.run(jobs.get_jobs(db=session, page=1, page_size=50, location=None, company=None,
+                                       keyword=keyword, start_date=None, end_date=None, sort=sort, cursor=None,
+                                       total="exact"))
+    return [job.id for job in result["items"]], result["total"]
+
+
+def test_full_text_search(tmp_path):
+    Session = make_session(tmp_path)
+    with Session() as session:
+        assert search.available(session)
+        # Substring match, as with ILIKE; title ranked above description
+        assert search_ids(session, "program", sort="relevance") == ([1, 2], 2)
+        assert search_ids(session, "PROGRAM") == ([1, 2], 2)
+        assert search_ids(session, "gram") == ([1, 2], 2)
+        assert search_ids(session, "ame") == ([1, 3], 2)
+        assert search_ids(session, "programmers on c") == ([2], 1)
+        assert search_ids(session, "our prog") == ([2], 1)
+        assert search_ids(session, "programmers shaders") == ([], 0)
+        # Punctuation is kept; shorter keywords and LIKE wildcards scan with ILIKE
+        assert search_ids(session, "C++") == ([2], 1)
+        assert search_ids(session, "c#") == ([1], 1)
+        assert search_ids(session, "#.") == ([1], 1)
+        assert search_ids(session, "un%y") == ([1], 1)
+
+        # Kept in sync by triggers
+        session.get(JobListing, 3).description = "Ship games with programmers."
+        session.add(JobListing(id=4, url="u4", title="Junior Programmer", company="S", source_website="a.com",
+                               posting_date=datetime(2026, 3, 4)))
+        session.delete(session.get(JobListing, 2))
+        session.commit()
+        assert search_ids(session, "programmer") == ([4, 1, 3], 3)
+
+
+def test_install_replaces_word_index(tmp_path):
+    """A word-tokenized index from before substring matching is rebuilt with trigrams."""
+    Session = make_session(tmp_path, install=False)
+    engine = Session.kw["bind"]
+    with engine.begin() as connection:
+        connection.execute(text(f"CREATE VIRTUAL TABLE {search.FTS_TABLE} USING fts5("
+                                "title, description, content='job_listings', content_rowid='id')"))
+    assert search.install(engine)
+    with Session() as session:
+        assert search_ids(session, "gram") == ([1, 2], 2)
+
+
+def test_search_fallback_without_index(tmp_path):
+    Session = make_session(tmp_path, install=False)
+    with Session() as session:
+        assert not search.available(session)
+        assert search_ids(session, "program", sort="relevance") == ([1, 2], 2)
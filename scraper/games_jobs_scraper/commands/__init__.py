@@ -0,0 +1 @@
+"""Custom scrapy commands (enabled through COMMANDS_MODULE in settings.py)."""
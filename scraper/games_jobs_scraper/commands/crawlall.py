@@ -0,0 +1,71 @@
+"""
+scrapy crawlall — run several spiders concurrently in one process.
+
+    scrapy crawlall [spider ...] [--max-spiders N]
+
+Every spider shares the same Python process, so Scrapy, the keyword extractor
+and the database engine are only set up once (see games_jobs_scraper.resources).
+At most CRAWLALL_MAX_CONCURRENT_SPIDERS spiders run at a time, and each gets an
+equal share of CRAWLALL_GLOBAL_CONCURRENT_REQUESTS, so the process never has more
+requests in flight than the global cap. CONCURRENT_REQUESTS_PER_DOMAIN and
+DOWNLOAD_DELAY still apply per site.
+
+Exit code: 0 if every spider finished, 3 if only some did, 1 if none did.
+"""
+
+from scrapy.commands import ScrapyCommand
+from scrapy.exceptions import UsageError
+from twisted.internet.defer import DeferredSemaphore
+
+
+class Command(ScrapyCommand):
+    requires_project = True
+
+    def syntax(self):
+        return "[options] [spider ...]"
+
+    def short_desc(self):
+        return "Run spiders concurrently in a single process"
+
+    def add_options(self, parser):
+        super().add_options(parser)
+        parser.add_argument(
+            "--max-spiders", dest="max_spiders", type=int, default=None,
+            help="maximum number of spiders crawling at the same time",
+        )
+
+    def run(self, args, opts):
+        spider_loader = self.crawler_process.spider_loader
+        excluded = set(self.settings.getlist("CRAWLALL_EXCLUDE"))
+        names = args or [name for name in spider_loader.list() if name not in excluded]
+        unknown = [name for name in names if name not in spider_loader.list()]
+        if unknown:
+            raise UsageError(f"Unknown spider(s): {', '.join(unknown)}")
+
+        max_spiders = max(1, min(len(names), opts.max_spiders or self.settings.getint("CRAWLALL_MAX_CONCURRENT_SPIDERS", 8)))
+        global_requests = self.settings.getint("CRAWLALL_GLOBAL_CONCURRENT_REQUESTS", 32)
+        requests_per_spider = max(1, global_requests // max_spiders)
+
+        self.crawlers = []
+        semaphore = DeferredSemaphore(max_spiders)
+        for name in names:
+            semaphore.run(self._crawl, name, requests_per_spider)
+
+        self.crawler_process.start()
+
+        finished = [crawler for crawler in self.crawlers
+                    if crawler.stats and crawler.stats.get_value("finish_reason") == "finished"]
+        if len(finished) == len(names):
+            self.exitcode = 0
+        elif finished:
+            self.exitcode = 3
+        else:
+            self.exitcode = 1
+
+    def _crawl(self, name, requests_per_spider):
+        crawler = self.crawler_process.create_crawler(name)
+        # Spider custom_settings may lower the share, never raise it above the global cap
+        concurrent = min(crawler.settings.getint("CONCURRENT_REQUESTS"), requests_per_spider)
+        crawler.settings.set("CONCURRENT_REQUESTS", concurrent, priority="cmdline")
+        self.crawlers.append(crawler)
+        return self.crawler_process.crawl(crawler)
@@ -0,0 +1,156 @@
+"""
+scrapy replaybench — benchmark spiders end-to-end against recorded fixtures.
+
+    scrapy replaybench [spider ...] [--fixtures DIR] [--with-database] [--output FILE]
+
+Record fixtures first with a normal crawl (see FIXTURE_RECORD_ENABLED):
+
+    scrapy crawl gamesindustry_uk -s FIXTURE_RECORD_ENABLED=True -s KNOWN_URL_FILTER_ENABLED=False
+
+Each spider then runs in turn with ReplayDownloadHandler serving its archive,
+no download delay or autothrottle, and the cleaning / duplicate pipelines
+(plus DatabasePipeline with --with-database). Spider callbacks, middlewares
+and pipelines run exactly as in a live crawl, so the numbers only measure our
+own code. Reported per spider: pages/sec, items/sec and the process peak RSS
+so far (spiders run one after another in one process, so it never goes down).
+
+Without spider names, every spider with an archive in the fixture directory runs.
+"""
+
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+from scrapy.commands import ScrapyCommand
+from scrapy.exceptions import UsageError
+from twisted.internet.defer import DeferredSemaphore
+
+from games_jobs_scraper.fixtures import FixtureArchive, fixture_path
+
+REPLAY_HANDLER = 'games_jobs_scraper.fixtures.ReplayDownloadHandler'
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process, in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class Command(ScrapyCommand):
+    requires_project = True
+
+    def syntax(self):
+        return "[options] [spider ...]"
+
+    def short_desc(self):
+        return "Benchmark spiders against recorded fixtures, without network access"
+
+    def add_options(self, parser):
+        super().add_options(parser)
+        parser.add_argument(
+            "--fixtures", dest="fixtures", default=None,
+            help="fixture directory (default: FIXTURE_DIR)",
+        )
+        parser.add_argument(
+            "--with-database", dest="with_database", action="store_true",
+            help="also run DatabasePipeline (writes to DATABASE_URL)",
+        )
+        parser.add_argument(
+            "--output", dest="output", default=None,
+            help="write the results as JSON to this file",
+        )
+
+    def run(self, args, opts):
+        directory = opts.fixtures or self.settings.get("FIXTURE_DIR")
+        spider_names = self.crawler_process.spider_loader.list()
+        names = args or [name for name in spider_names if os.path.exists(fixture_path(directory, name))]
+        missing = [name for name in names if not os.path.exists(fixture_path(directory, name))]
+        if missing:
+            raise UsageError(f"No fixtures in {directory} for: {', '.join(missing)}")
+        if not names:
+            raise UsageError(f"No fixtures in {directory}")
+
+        self.watermark_dir = tempfile.mkdtemp(prefix="replaybench-")
+        self.results = []
+        semaphore = DeferredSemaphore(1)
+        for name in names:
+            semaphore.run(self._crawl, name, directory, opts.with_database)
+        try:
+            self.crawler_process.start()
+        finally:
+            shutil.rmtree(self.watermark_dir, ignore_errors=True)
+
+        self._report(opts.output)
+        self.exitcode = 0 if all(result["finish_reason"] == "finished" for result in self.results) else 1
+
+    def _crawl(self, name, directory, with_database):
+        crawler = self.crawler_process.create_crawler(name)
+        settings = crawler.settings
+        replay_settings = {
+            "FIXTURE_DIR": directory,
+            "FIXTURE_RECORD_ENABLED": False,
+            "PAGE_ARCHIVE_ENABLED": False,
+            "DOWNLOAD_HANDLERS": {"http": REPLAY_HANDLER, "https": REPLAY_HANDLER},
+            "DOWNLOAD_DELAY": 0,
+            "AUTOTHROTTLE_ENABLED": False,
+            "RETRY_ENABLED": False,
+            "HTTPCACHE_ENABLED": False,
+            "KNOWN_URL_FILTER_ENABLED": False,
+            "CONDITIONAL_REQUESTS_ENABLED": False,
+            "SCRAPER_RUN_STATS_ENABLED": False,
+            # Sitemap spiders start from an empty watermark and look back to the recording
+            "WATERMARK_STORE_PATH": os.path.join(self.watermark_dir, f"{name}.json"),
+        }
+        recorded_at = FixtureArchive.recorded_at_of(fixture_path(directory, name))
+        if recorded_at:
+            age_days = (datetime.now(timezone.utc) - recorded_at).total_seconds() / 86400
+            replay_settings["SITEMAP_INITIAL_LOOKBACK_DAYS"] = settings.getfloat("SITEMAP_INITIAL_LOOKBACK_DAYS", 14) + age_days
+        if not with_database:
+            pipelines = settings.getdict("ITEM_PIPELINES")
+            pipelines["games_jobs_scraper.pipelines.DatabasePipeline"] = None
+            replay_settings["ITEM_PIPELINES"] = pipelines
+        settings.setdict(replay_settings, priority="cmdline")
+
+        dfd = self.crawler_process.crawl(crawler)
+        dfd.addBoth(self._crawled, name, crawler)
+        return dfd
+
+    def _crawled(self, result, name, crawler):
+        stats = crawler.stats.get_stats() if crawler.stats else {}
+        elapsed = stats.get("elapsed_time_seconds") or 0.0
+        pages = stats.get("response_received_count", 0)
+        items = stats.get("item_scraped_count", 0)
+        self.results.append({
+            "spider": name,
+            "finish_reason": stats.get("finish_reason"),
+            "seconds": round(elapsed, 3),
+            "pages": pages,
+            "items": items,
+            "missing_fixtures": stats.get("replay/missing", 0),
+            "pages_per_second": round(pages / elapsed, 1) if elapsed else None,
+            "items_per_second": round(items / elapsed, 1) if elapsed else None,
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        })
+
+    def _report(self, output):
+        header = f"{'spider':<28} {'pages':>7} {'items':>7} {'seconds':>9} {'pages/s':>9} {'items/s':>9} {'peak RSS MiB':>13}"
+        print(header)
+        print("-" * len(header))
+        for result in self.results:
+            print(
+                f"{result['spider']:<28} {result['pages']:>7} {result['items']:>7} {result['seconds']:>9.2f} "
+                f"{result['pages_per_second'] or 0:>9.1f} {result['items_per_second'] or 0:>9.1f} "
+                f"{result['peak_rss_mb']:>13.1f}"
+            )
+            if result["missing_fixtures"]:
+                print(f"  {result['missing_fixtures']} requests had no recorded response")
+            if result["finish_reason"] != "finished":
+                print(f"  finish reason: {result['finish_reason']}")
+        if output:
+            with open(output, "w", encoding="utf-8") as output_file:
+                json.dump(self.results, output_file, indent=2)
@@ -0,0 +1,128 @@
+"""
+Scrapy extensions.
+"""
+
+import os
+from datetime import datetime
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import threads
+
+from games_jobs_scraper.resources import ensure_backend_path, get_engine
+
+# ScraperRunSpider column -> Scrapy stats key
+STATS_COLUMNS = {
+    'items_scraped': 'item_scraped_count',
+    'items_dropped': 'item_dropped_count',
+    'items_saved': 'db/items_saved',
+    'items_updated': 'db/items_updated',
+    'near_duplicates': 'db/near_duplicates',
+    'requests': 'downloader/request_count',
+    'response_bytes': 'downloader/response_bytes',
+    'pipeline_seconds': 'db/write_seconds',
+    'extraction_seconds': 'extraction/seconds',
+}
+
+
+class ScraperRunStatsExtension:
+    """
+    Writes each spider's Scrapy stats to the scraper_run_spiders table when it
+    closes, and adds its totals to the parent ScraperRun (jobs_scraped,
+    duplicates_found, errors_count). The run is passed by the API as
+    `-s SCRAPER_RUN_ID=<id>`; ad-hoc crawls are recorded without a run.
+
+    The row also records the items' source_website and whether the crawl was
+    full: it finished cleanly and every live job of the source was either
+    saved or touched, which is what lets the API expire the jobs it didn't see
+    (app.services.scheduler.expire_stale_listings). Incremental crawls
+    (pagination stopped early, sitemap entries skipped), untouched known-URL
+    skips, spooled items and any error make it partial. With the default
+    settings the daily crawls are incremental, so the API schedules a weekly
+    full crawl (KNOWN_URL_PAGINATION_STOP_PAGES=0, SITEMAP_FULL_CRAWL).
+    """
+
+    def __init__(self, crawler, run_id=None):
+        self.stats = crawler.stats
+        self.settings = crawler.settings
+        self.run_id = run_id
+        self.source_website = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('SCRAPER_RUN_STATS_ENABLED', True):
+            raise NotConfigured
+        extension = cls(crawler, run_id=crawler.settings.getint('SCRAPER_RUN_ID') or None)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(extension.item_scraped, signal=signals.item_scraped)
+        return extension
+
+    def item_scraped(self, item, response, spider):
+        if self.source_website is None:
+            self.source_website = item.get('source_website')
+
+    def spider_closed(self, spider, reason):
+        database_url = os.getenv('DATABASE_URL')
+        if not database_url:
+            return None
+        row = self.collect(spider, reason)
+        dfd = threads.deferToThread(self.save, database_url, row)
+        dfd.addErrback(lambda failure: spider.logger.error(
+            f"Failed to save scraper run stats: {failure.getErrorMessage()}"))
+        return dfd
+
+    def collect(self, spider, reason):
+        """Build the scraper_run_spiders row from the crawl stats."""
+        stats = self.stats.get_stats()
+        row = {column: stats.get(key, 0) for column, key in STATS_COLUMNS.items()}
+        row.update({
+            'run_id': self.run_id,
+            'spider': spider.name,
+            'start_time': _local_time(stats.get('start_time')),
+            'end_time': datetime.now(),
+            'finish_reason': reason,
+            'errors_count': stats.get('log_count/ERROR', 0),
+            'source_website': self.source_website,
+            'full_crawl': int(self._full_crawl(stats, reason)),
+        })
+        return row
+
+    def _full_crawl(self, stats, reason):
+        untouched_skips = stats.get('known_urls/skipped') and not self.settings.getbool('KNOWN_URL_TOUCH_ENABLED')
+        return (
+            reason == 'finished'
+            and not stats.get('log_count/ERROR')
+            and not stats.get('pagination/stopped_early')
+            and not stats.get('sitemap/entries_skipped')
+            and not stats.get('db/batch_errors')
+            and not stats.get('spool/items')
+            and not untouched_skips
+        )
+
+    def save(self, database_url, row):
+        ensure_backend_path()
+        from sqlalchemy import func, insert, update
+        from app.models import ScraperRun, ScraperRunSpider
+
+        with get_engine(database_url).begin() as conn:
+            conn.execute(insert(ScraperRunSpider).values(row))
+            if self.run_id:
+                # Increment in SQL: spiders of the same run close concurrently
+                conn.execute(
+                    update(ScraperRun)
+                    .where(ScraperRun.id == self.run_id)
+                    .values(
+                        jobs_scraped=func.coalesce(ScraperRun.jobs_scraped, 0) + row['items_scraped'],
+                        duplicates_found=func.coalesce(ScraperRun.duplicates_found, 0) + row['items_dropped'] + row['near_duplicates'],
+                        errors_count=func.coalesce(ScraperRun.errors_count, 0) + row['errors_count'],
+                    )
+                )
+
+
+def _local_time(value):
+    """Scrapy stats times are aware UTC datetimes; the database stores naive local time."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
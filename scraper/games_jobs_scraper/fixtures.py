@@ -0,0 +1,195 @@
+"""
+Recorded HTTP fixtures for offline crawls and benchmarks.
+
+A fixture archive holds every raw response a spider received in one crawl, as
+gzip-compressed JSON lines in <FIXTURE_DIR>/<spider>.jsonl.gz. The first line
+is a header with the recording time; each further line is one exchange:
+
+    {"method": "GET", "url": "...", "request_body": "<base64>",
+     "status": 200, "headers": {"Content-Type": ["text/html"]}, "body": "<base64>"}
+
+FixtureRecorderMiddleware writes archives, ReplayDownloadHandler serves them
+back in place of the network (see `scrapy replaybench`).
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional, Tuple
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+from twisted.internet import defer
+
+
+def fixture_path(directory: str, spider_name: str) -> str:
+    return os.path.join(directory, f"{spider_name}.jsonl.gz")
+
+
+def fixture_key(method: str, url: str, body: bytes = b"") -> Tuple[str, str, str]:
+    """Lookup key of a request: method, URL and a digest of the body (POST forms)."""
+    digest = hashlib.sha1(body).hexdigest() if body else ""
+    return method.upper(), url, digest
+
+
+class FixtureWriter:
+    """Appends exchanges to an archive; the file only replaces the old one on close()."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.count = 0
+        self._temp_path = path + ".tmp"
+        self._file = gzip.open(self._temp_path, "wt", encoding="utf-8")
+        self._write({"recorded_at": datetime.now(timezone.utc).isoformat()})
+
+    def write(self, request, response) -> None:
+        self._write({
+            "method": request.method,
+            "url": request.url,
+            "request_body": base64.b64encode(request.body).decode("ascii"),
+            "status": response.status,
+            "headers": {
+                name.decode("latin-1"): [value.decode("latin-1") for value in values]
+                for name, values in response.headers.items()
+            },
+            "body": base64.b64encode(response.body).decode("ascii"),
+        })
+        self.count += 1
+
+    def close(self) -> None:
+        self._file.close()
+        os.replace(self._temp_path, self.path)
+
+    def _write(self, record: Dict) -> None:
+        self._file.write(json.dumps(record, separators=(",", ":")))
+        self._file.write("\n")
+
+
+class FixtureArchive:
+    """A recorded archive loaded into memory, keyed by fixture_key()."""
+
+    def __init__(self, recorded_at: Optional[datetime], exchanges: Dict[Tuple[str, str, str], Dict]):
+        self.recorded_at = recorded_at
+        self.exchanges = exchanges
+
+    @classmethod
+    def load(cls, path: str) -> "FixtureArchive":
+        recorded_at, exchanges = None, {}
+        for record in _read_records(path):
+            if "recorded_at" in record:
+                recorded_at = datetime.fromisoformat(record["recorded_at"])
+                continue
+            key = fixture_key(record["method"], record["url"], base64.b64decode(record["request_body"]))
+            exchanges[key] = {
+                "status": record["status"],
+                "headers": record["headers"],
+                "body": base64.b64decode(record["body"]),
+            }
+        return cls(recorded_at, exchanges)
+
+    @classmethod
+    def recorded_at_of(cls, path: str) -> Optional[datetime]:
+        """Recording time from the archive header, without loading the exchanges."""
+        for record in _read_records(path):
+            if "recorded_at" in record:
+                return datetime.fromisoformat(record["recorded_at"])
+            break
+        return None
+
+    def __len__(self) -> int:
+        return len(self.exchanges)
+
+    def get(self, request) -> Optional[Dict]:
+        return self.exchanges.get(fixture_key(request.method, request.url, request.body))
+
+
+def _read_records(path: str) -> Iterator[Dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as fixture_file:
+        for line in fixture_file:
+            if line.strip():
+                yield json.loads(line)
+
+
+class FixtureRecorderMiddleware:
+    """
+    Downloader middleware that records every raw response (including
+    redirects and robots.txt) into the spider's fixture archive. It sits next
+    to the downloader, so replayed responses pass through the same middleware
+    stack as live ones.
+    """
+
+    def __init__(self, crawler, directory):
+        self.stats = crawler.stats
+        self.directory = directory
+        self.writer = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('FIXTURE_RECORD_ENABLED'):
+            raise NotConfigured
+        middleware = cls(crawler, crawler.settings.get('FIXTURE_DIR'))
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def spider_opened(self, spider):
+        self.writer = FixtureWriter(fixture_path(self.directory, spider.name))
+
+    def process_response(self, request, response, spider):
+        self.writer.write(request, response)
+        self.stats.inc_value('fixtures/recorded')
+        return response
+
+    def spider_closed(self, spider):
+        self.writer.close()
+        spider.logger.info(f"Recorded {self.writer.count} responses to {self.writer.path}")
+
+
+class ReplayDownloadHandler:
+    """
+    Download handler (DOWNLOAD_HANDLERS for http/https) that answers requests
+    from the spider's fixture archive in FIXTURE_DIR instead of the network.
+    Requests that were not recorded get an empty 404 response flagged
+    'replay-missing'.
+    """
+
+    lazy = False
+
+    def __init__(self, settings, crawler=None):
+        self.directory = settings.get('FIXTURE_DIR')
+        self.stats = crawler.stats if crawler else None
+        self.archive = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.settings, crawler)
+
+    def download_request(self, request, spider):
+        if self.archive is None:
+            self.archive = FixtureArchive.load(fixture_path(self.directory, spider.name))
+            spider.logger.info(f"Replaying {len(self.archive)} recorded responses for {spider.name}")
+
+        exchange = self.archive.get(request)
+        if exchange is None:
+            self._inc_stat('replay/missing')
+            return defer.succeed(responsetypes.from_args(url=request.url)(
+                url=request.url, status=404, request=request, flags=['replay-missing'],
+            ))
+
+        self._inc_stat('replay/served')
+        headers = Headers(exchange['headers'])
+        response_class = responsetypes.from_args(headers=headers, url=request.url, body=exchange['body'])
+        return defer.succeed(response_class(
+            url=request.url, status=exchange['status'], headers=headers,
+            body=exchange['body'], request=request, flags=['replay'],
+        ))
+
+    def _inc_stat(self, key):
+        if self.stats:
+            self.stats.inc_value(key)
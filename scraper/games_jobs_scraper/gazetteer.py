@@ -0,0 +1,245 @@
+"""
+UK gazetteer for location normalization.
+
+Every place name and alias is compiled once, at import, into a token trie, so
+a raw location string is normalized in a single left-to-right pass over its
+words. Results are memoized per raw string since the same few spellings
+("London, UK", "Remote - London") repeat across thousands of listings.
+
+normalize_location() returns a canonical city plus region and nation IDs
+(slugs of the UK ITL1 regions and nations), which are the keys used by the
+regional aggregates.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Region slug -> nation slug
+REGIONS = {
+    "london": "england",
+    "south-east": "england",
+    "south-west": "england",
+    "east-of-england": "england",
+    "east-midlands": "england",
+    "west-midlands": "england",
+    "yorkshire-and-the-humber": "england",
+    "north-west": "england",
+    "north-east": "england",
+    "scotland": "scotland",
+    "wales": "wales",
+    "northern-ireland": "northern-ireland",
+}
+
+# Canonical city -> (region, aliases)
+CITIES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "London": ("london", ("city of london", "central london", "greater london")),
+    "Brighton": ("south-east", ("brighton and hove", "brighton & hove", "hove")),
+    "Guildford": ("south-east", ()),
+    "Oxford": ("south-east", ()),
+    "Reading": ("south-east", ()),
+    "Southampton": ("south-east", ()),
+    "Portsmouth": ("south-east", ()),
+    "Milton Keynes": ("south-east", ()),
+    "Farnborough": ("south-east", ()),
+    "Horsham": ("south-east", ()),
+    "Canterbury": ("south-east", ()),
+    "Maidstone": ("south-east", ()),
+    "Banbury": ("south-east", ()),
+    "Slough": ("south-east", ()),
+    "Bristol": ("south-west", ()),
+    "Bath": ("south-west", ()),
+    "Exeter": ("south-west", ()),
+    "Plymouth": ("south-west", ()),
+    "Bournemouth": ("south-west", ()),
+    "Swindon": ("south-west", ()),
+    "Gloucester": ("south-west", ()),
+    "Cheltenham": ("south-west", ()),
+    "Truro": ("south-west", ()),
+    "Cambridge": ("east-of-england", ()),
+    "Norwich": ("east-of-england", ()),
+    "Ipswich": ("east-of-england", ()),
+    "Chelmsford": ("east-of-england", ()),
+    "Stevenage": ("east-of-england", ()),
+    "Luton": ("east-of-england", ()),
+    "Watford": ("east-of-england", ()),
+    "Leicester": ("east-midlands", ("leicestershire",)),
+    "Nottingham": ("east-midlands", ("nottinghamshire",)),
+    "Derby": ("east-midlands", ("derbyshire",)),
+    "Lincoln": ("east-midlands", ()),
+    "Northampton": ("east-midlands", ()),
+    "Birmingham": ("west-midlands", ()),
+    "Leamington Spa": ("west-midlands", ("leamington", "royal leamington spa")),
+    "Coventry": ("west-midlands", ()),
+    "Warwick": ("west-midlands", ()),
+    "Solihull": ("west-midlands", ()),
+    "Wolverhampton": ("west-midlands", ()),
+    "Stoke-on-Trent": ("west-midlands", ("stoke", "stoke on trent")),
+    "Stafford": ("west-midlands", ()),
+    "Leeds": ("yorkshire-and-the-humber", ()),
+    "Sheffield": ("yorkshire-and-the-humber", ()),
+    "York": ("yorkshire-and-the-humber", ()),
+    "Hull": ("yorkshire-and-the-humber", ("kingston upon hull",)),
+    "Bradford": ("yorkshire-and-the-humber", ()),
+    "Wakefield": ("yorkshire-and-the-humber", ()),
+    "Huddersfield": ("yorkshire-and-the-humber", ()),
+    "Manchester": ("north-west", ("greater manchester",)),
+    "Salford": ("north-west", ("mediacityuk", "media city")),
+    "Liverpool": ("north-west", ("merseyside",)),
+    "Runcorn": ("north-west", ()),
+    "Warrington": ("north-west", ()),
+    "Preston": ("north-west", ()),
+    "Lancaster": ("north-west", ()),
+    "Chester": ("north-west", ()),
+    "Newcastle upon Tyne": ("north-east", ("newcastle", "newcastle-upon-tyne")),
+    "Sunderland": ("north-east", ()),
+    "Middlesbrough": ("north-east", ()),
+    "Durham": ("north-east", ()),
+    "Edinburgh": ("scotland", ()),
+    "Glasgow": ("scotland", ()),
+    "Dundee": ("scotland", ()),
+    "Aberdeen": ("scotland", ()),
+    "Stirling": ("scotland", ()),
+    "Inverness": ("scotland", ()),
+    "Cardiff": ("wales", ()),
+    "Swansea": ("wales", ()),
+    "Newport": ("wales", ()),
+    "Belfast": ("northern-ireland", ()),
+    "Derry": ("northern-ireland", ("londonderry",)),
+}
+
+# Counties, regions and nations that don't name a single city: alias -> region (or nation) slug
+AREAS: Dict[str, str] = {
+    "surrey": "south-east",
+    "kent": "south-east",
+    "sussex": "south-east",
+    "west sussex": "south-east",
+    "east sussex": "south-east",
+    "hampshire": "south-east",
+    "berkshire": "south-east",
+    "oxfordshire": "south-east",
+    "buckinghamshire": "south-east",
+    "south east": "south-east",
+    "south east england": "south-east",
+    "devon": "south-west",
+    "cornwall": "south-west",
+    "somerset": "south-west",
+    "dorset": "south-west",
+    "wiltshire": "south-west",
+    "gloucestershire": "south-west",
+    "south west": "south-west",
+    "south west england": "south-west",
+    "cambridgeshire": "east-of-england",
+    "norfolk": "east-of-england",
+    "suffolk": "east-of-england",
+    "essex": "east-of-england",
+    "hertfordshire": "east-of-england",
+    "east of england": "east-of-england",
+    "lincolnshire": "east-midlands",
+    "northamptonshire": "east-midlands",
+    "east midlands": "east-midlands",
+    "warwickshire": "west-midlands",
+    "staffordshire": "west-midlands",
+    "worcestershire": "west-midlands",
+    "west midlands": "west-midlands",
+    "yorkshire": "yorkshire-and-the-humber",
+    "west yorkshire": "yorkshire-and-the-humber",
+    "south yorkshire": "yorkshire-and-the-humber",
+    "north yorkshire": "yorkshire-and-the-humber",
+    "lancashire": "north-west",
+    "cheshire": "north-west",
+    "cumbria": "north-west",
+    "north west": "north-west",
+    "north west england": "north-west",
+    "tyne and wear": "north-east",
+    "county durham": "north-east",
+    "north east": "north-east",
+    "north east england": "north-east",
+    "scotland": "scotland",
+    "wales": "wales",
+    "northern ireland": "northern-ireland",
+    "england": "england",
+}
+
+# Match specificity; a city beats a county or region, which beats a nation
+_CITY, _AREA, _NATION = 2, 1, 0
+
+# Separators between the components of a location ("Remote - London, UK (Hybrid)")
+_COMPONENT_SPLIT_RE = re.compile(r"[,;/|()\[\]]|\s[-–—]\s")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class Location(NamedTuple):
+    """Normalized location; city is None when only the region or nation is known."""
+    city: Optional[str]
+    region: Optional[str]
+    nation: Optional[str]
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower().replace("'", ""))
+
+
+def _compile() -> Dict:
+    """Build the token trie; terminal nodes hold (specificity, Location) under the None key."""
+    trie: Dict = {}
+
+    def add(alias: str, entry: Tuple[int, Location]) -> None:
+        node = trie
+        for token in _tokens(alias):
+            node = node.setdefault(token, {})
+        node[None] = entry
+
+    for city, (region, aliases) in CITIES.items():
+        entry = (_CITY, Location(city, region, REGIONS[region]))
+        for alias in (city,) + aliases:
+            add(alias, entry)
+    for alias, slug in AREAS.items():
+        if slug in REGIONS:
+            add(alias, (_AREA, Location(None, slug, REGIONS[slug])))
+        else:
+            add(alias, (_NATION, Location(None, None, slug)))
+    return trie
+
+
+_TRIE = _compile()
+
+
+@lru_cache(maxsize=4096)
+def normalize_location(raw: Optional[str]) -> Optional[Location]:
+    """
+    Normalize a raw location string against the gazetteer.
+
+    Each comma/bracket/dash separated component is scanned for the longest
+    place name at every word position. A place that makes up a whole
+    component ("New London Road, Bristol" -> "Bristol") beats one embedded in
+    a longer component ("New London Road"); then cities beat counties and
+    regions, which beat nations; then the leftmost match wins.
+
+    Returns:
+        The best Location, or None if no known place is mentioned
+    """
+    if not raw:
+        return None
+
+    best_rank, best = None, None
+    position = 0
+    for component in _COMPONENT_SPLIT_RE.split(raw):
+        tokens = _tokens(component)
+        for start in range(len(tokens)):
+            node, match = _TRIE, None
+            for end in range(start, len(tokens)):
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                if None in node:
+                    match = (end + 1, node[None])
+            if match is None:
+                continue
+            end, (specificity, location) = match
+            whole_component = start == 0 and end == len(tokens)
+            rank = (whole_component, specificity, -(position + start))
+            if best_rank is None or rank > best_rank:
+                best_rank, best = rank, location
+        position += len(tokens)
+    return best
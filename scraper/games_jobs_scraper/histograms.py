@@ -0,0 +1,108 @@
+"""
+Fixed-bucket latency histograms for the scraper.
+
+Buckets are log-scale (powers of two from 0.1 ms to ~52 s, plus an overflow
+bucket), so a histogram takes constant memory however many observations it
+gets, and recording one is a perf_counter() pair and a bisect. That keeps the
+overhead low enough to leave on in production.
+"""
+
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+# Upper bounds (seconds) of the buckets; anything slower lands in the overflow bucket
+BUCKET_BOUNDS: List[float] = [0.0001 * 2 ** i for i in range(20)]
+
+PERCENTILES = (50, 90, 99)
+
+
+def _label(bound: Optional[float]) -> str:
+    if bound is None:
+        return f">{BUCKET_BOUNDS[-1]:.1f}s"
+    if bound < 1:
+        return f"<={bound * 1000:.1f}ms"
+    return f"<={bound:.1f}s"
+
+
+class LatencyHistogram:
+    """Counts of observed durations per log-scale bucket, plus count / total / max."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given percentile (the max for the overflow bucket)."""
+        if not self.count:
+            return None
+        rank = self.count * percent / 100
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict:
+        """Summary plus the non-empty buckets, in milliseconds."""
+        summary = {
+            "count": self.count,
+            "total_seconds": round(self.total, 3),
+            "mean_ms": round(self.total * 1000 / self.count, 3) if self.count else None,
+            "max_ms": round(self.max * 1000, 3),
+        }
+        for percent in PERCENTILES:
+            value = self.percentile(percent)
+            summary[f"p{percent}_ms"] = round(value * 1000, 3) if value is not None else None
+        summary["buckets"] = {
+            _label(BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else None): bucket_count
+            for index, bucket_count in enumerate(self.counts)
+            if bucket_count
+        }
+        return summary
+
+
+class HistogramSet:
+    """Named latency histograms (one per callback, or one per pipeline class)."""
+
+    def __init__(self):
+        self.histograms: Dict[str, LatencyHistogram] = {}
+
+    def get(self, name: str) -> LatencyHistogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        return histogram
+
+    def to_dict(self) -> Dict[str, Dict]:
+        """Non-empty histograms by name."""
+        return {
+            name: histogram.to_dict()
+            for name, histogram in sorted(self.histograms.items())
+            if histogram.count
+        }
+
+    def log(self, kind: str, spider) -> None:
+        """Dump the histograms as structured JSON through the "scraper" logger."""
+        histograms = self.to_dict()
+        if not histograms:
+            return
+        from games_jobs_scraper.resources import ensure_backend_path
+        ensure_backend_path()
+        from logging_config import get_logger
+
+        get_logger("scraper").info(
+            f"{kind} latency histograms for {spider.name}",
+            extra={"context": {"spider": spider.name, "kind": kind, "histograms": histograms}},
+        )
@@ -0,0 +1,69 @@
+"""
+Per-URL HTTP validators (ETag / Last-Modified), and whether the page yielded a job item.
+
+Unlike Scrapy's HTTP cache, no response bodies are stored: a page is only
+revalidated with If-None-Match / If-Modified-Since, and a 304 means the item
+already in the database is still current.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Dict, Optional
+
+
+class ValidatorStore:
+    """SQLite table of url -> (etag, last_modified, has_item)."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(http_validators)")}
+        if "item_fingerprint" in columns:
+            # Older layout; validators are cheap to collect again on the next crawl
+            self._conn.execute("DROP TABLE http_validators")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS http_validators ("
+            " url TEXT PRIMARY KEY,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " has_item INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.commit()
+
+    def get(self, url: str) -> Optional[Dict[str, Optional[str]]]:
+        """Return the stored validators for a URL, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, has_item FROM http_validators WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "has_item": bool(row[2])}
+
+    def put_validators(self, url: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        """
+        Store fresh validators for a URL. has_item is cleared until the page's
+        item has been scraped again (see set_has_item).
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO http_validators (url, etag, last_modified, has_item)"
+                " VALUES (?, ?, ?, 0)",
+                (url, etag, last_modified)
+            )
+            self._conn.commit()
+
+    def set_has_item(self, url: str) -> None:
+        """Record that a job item was parsed from a URL (and reached the pipelines' end)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE http_validators SET has_item = 1 WHERE url = ?", (url,)
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
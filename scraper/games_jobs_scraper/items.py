@@ -13,6 +13,8 @@ class JobItem(scrapy.Item):
     title = scrapy.Field()
     company = scrapy.Field()
     location = scrapy.Field()
+    region = scrapy.Field()  # Region slug from the gazetteer, e.g. "west-midlands"
+    nation = scrapy.Field()  # Nation slug from the gazetteer, e.g. "scotland"
     description = scrapy.Field()
     salary = scrapy.Field()
     posting_date = scrapy.Field()
@@ -20,3 +22,4 @@ class JobItem(scrapy.Item):
     scraped_date = scrapy.Field()
     content_hash = scrapy.Field()
     keywords = scrapy.Field()  # Dict of extracted keywords
+    canonical_job_id = scrapy.Field()  # Set by DatabasePipeline for near-duplicate postings
@@ -2,7 +2,40 @@
 Scrapy middlewares.
 """
 
-from scrapy import signals
+import os
+import time
+from datetime import datetime
+
+from scrapy import Request, signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from twisted.internet import threads
+
+from games_jobs_scraper.histograms import HistogramSet
+from games_jobs_scraper.http_validators import ValidatorStore
+from games_jobs_scraper.resources import get_engine, get_known_urls
+
+# Job ids / URLs per UPDATE when touching known jobs at spider close
+TOUCH_CHUNK_SIZE = 500
+
+
+def touch_jobs(database_url, column, values):
+    """Mark the jobs whose `column` is in `values` as still active (scraped_date, is_active)."""
+    from sqlalchemy import case, update
+    from app.models import JobListing
+
+    values = sorted(values)
+    now = datetime.now()
+    with get_engine(database_url).begin() as conn:
+        for start in range(0, len(values), TOUCH_CHUNK_SIZE):
+            conn.execute(
+                update(JobListing)
+                .where(getattr(JobListing, column).in_(values[start:start + TOUCH_CHUNK_SIZE]))
+                .values(
+                    scraped_date=now, is_active=1,
+                    # Only revived jobs change the aggregates (see JobListing.updated_at)
+                    updated_at=case((JobListing.is_active == 0, now), else_=JobListing.updated_at),
+                )
+            )
 
 
 class DuplicateFilterMiddleware:
@@ -23,3 +56,282 @@ class DuplicateFilterMiddleware:
     
     def spider_opened(self, spider):
         spider.logger.info(f"Spider opened: {spider.name}")
+
+
+class KnownUrlMiddleware:
+    """
+    Downloader middleware that skips requests for jobs already in job_listings.
+
+    The known URLs are loaded once per process into a KnownUrlIndex (see
+    known_urls.py). A request whose URL is a stored job is dropped before it is
+    downloaded; with KNOWN_URL_TOUCH_ENABLED the skipped jobs are marked as
+    still active (scraped_date, is_active) in bulk when the spider closes,
+    which is what DatabasePipeline would otherwise have done after a full
+    download and parse. Set request.meta['known_url_filter'] = False to force
+    a download.
+
+    Mutually exclusive with ConditionalRequestMiddleware: dropping every known
+    job would leave nothing to revalidate, so with CONDITIONAL_REQUESTS_ENABLED
+    this middleware disables itself and known jobs are revalidated instead.
+    """
+
+    def __init__(self, crawler, touch=True):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.touch = touch
+        self.database_url = None
+        self.index = None
+        self.touched_ids = set()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('KNOWN_URL_FILTER_ENABLED'):
+            raise NotConfigured
+        if crawler.settings.getbool('CONDITIONAL_REQUESTS_ENABLED'):
+            raise NotConfigured("known jobs are revalidated by ConditionalRequestMiddleware instead")
+        middleware = cls(crawler, touch=crawler.settings.getbool('KNOWN_URL_TOUCH_ENABLED', True))
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def spider_opened(self, spider):
+        self.database_url = os.getenv('DATABASE_URL')
+        if not self.database_url:
+            spider.logger.warning("DATABASE_URL not set, known URL filter disabled")
+            return
+        try:
+            self.index = get_known_urls(self.database_url, spider.logger)
+        except Exception as e:
+            spider.logger.error(f"Failed to load known job URLs, known URL filter disabled: {e}")
+            return
+        self.stats.set_value('known_urls/loaded', len(self.index))
+
+    def process_request(self, request, spider):
+        if self.index is None or request.meta.get('known_url_filter') is False:
+            return None
+
+        job_id = self.index.job_id(request.url)
+        if job_id is None:
+            return None
+
+        self.touched_ids.add(job_id)
+        self.stats.inc_value('known_urls/skipped')
+        raise IgnoreRequest(f"Known job URL: {request.url}")
+
+    def spider_closed(self, spider):
+        if not self.touch or not self.touched_ids:
+            return None
+        job_ids = sorted(self.touched_ids)
+        dfd = threads.deferToThread(self._touch_jobs, job_ids)
+        dfd.addCallbacks(
+            lambda _: spider.logger.info(f"Marked {len(job_ids)} known jobs as still active"),
+            lambda failure: spider.logger.error(f"Failed to mark known jobs as active: {failure.getErrorMessage()}"),
+        )
+        return dfd
+
+    def _touch_jobs(self, job_ids):
+        touch_jobs(self.database_url, 'id', job_ids)
+        self.stats.set_value('known_urls/touched', len(job_ids))
+
+
+class ConditionalRequestMiddleware:
+    """
+    Downloader middleware that revalidates job pages with HTTP conditional requests.
+
+    For every 200 response it stores the ETag / Last-Modified validators, and
+    marks the page once its job item has been scraped (ValidatorStore,
+    CONDITIONAL_REQUESTS_STORE_PATH). Pages that produced an item last time are
+    requested with If-None-Match / If-Modified-Since; a 304 is dropped before
+    the parse callback and the pipelines run, and the job is marked as still
+    active in bulk when the spider closes. Listing pages never yield items, so
+    they are always downloaded in full.
+    """
+
+    def __init__(self, crawler, store_path):
+        self.stats = crawler.stats
+        self.store_path = store_path
+        self.store = None
+        self.not_modified_urls = set()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('CONDITIONAL_REQUESTS_ENABLED'):
+            raise NotConfigured
+        middleware = cls(crawler, crawler.settings.get('CONDITIONAL_REQUESTS_STORE_PATH'))
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(middleware.item_scraped, signal=signals.item_scraped)
+        return middleware
+
+    def spider_opened(self, spider):
+        self.store = ValidatorStore(self.store_path)
+
+    def process_request(self, request, spider):
+        if request.meta.get('conditional_request') is False:
+            return None
+        validators = self.store.get(request.url)
+        if not validators or not validators['has_item']:
+            return None
+
+        if validators['etag']:
+            request.headers.setdefault('If-None-Match', validators['etag'])
+        if validators['last_modified']:
+            request.headers.setdefault('If-Modified-Since', validators['last_modified'])
+        request.meta['conditional_revalidation'] = True
+        return None
+
+    def process_response(self, request, response, spider):
+        if response.status == 304 and request.meta.get('conditional_revalidation'):
+            self.not_modified_urls.add(request.url)
+            self.stats.inc_value('conditional/not_modified')
+            raise IgnoreRequest(f"Not modified: {request.url}")
+
+        if response.status == 200:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                self.store.put_validators(
+                    response.url,
+                    etag.decode('latin-1') if etag else None,
+                    last_modified.decode('latin-1') if last_modified else None,
+                )
+                self.stats.inc_value('conditional/validators_stored')
+        return response
+
+    def item_scraped(self, item, response, spider):
+        # No-op unless the item's own page was downloaded with validators
+        if item.get('url'):
+            self.store.set_has_item(item['url'])
+
+    def spider_closed(self, spider):
+        self.store.close()
+        database_url = os.getenv('DATABASE_URL')
+        if not database_url or not self.not_modified_urls:
+            return None
+        dfd = threads.deferToThread(touch_jobs, database_url, 'url', self.not_modified_urls)
+        dfd.addCallbacks(
+            lambda _: spider.logger.info(f"Marked {len(self.not_modified_urls)} unmodified jobs as still active"),
+            lambda failure: spider.logger.error(f"Failed to mark unmodified jobs as active: {failure.getErrorMessage()}"),
+        )
+        return dfd
+
+
+class KnownPaginationMiddleware:
+    """
+    Spider middleware that stops following pagination once listing pages only
+    link to jobs we already have.
+
+    Listings are sorted newest-first, so after KNOWN_URL_PAGINATION_STOP_PAGES
+    consecutive pages whose job links are all in the KnownUrlIndex, later pages
+    cannot hold anything new. A request is treated as pagination when it uses
+    the same callback as the page that yielded it (e.g. parse -> parse), and as
+    a job link otherwise (parse -> parse_job). The run of all-known pages is
+    carried in request.meta['known_pages'], so spiders with several start URLs
+    track each listing separately. Skipped next-page links are counted in the
+    pagination/pages_skipped stat.
+    """
+
+    def __init__(self, crawler, stop_pages):
+        self.stats = crawler.stats
+        self.stop_pages = stop_pages
+        self.index = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        stop_pages = crawler.settings.getint('KNOWN_URL_PAGINATION_STOP_PAGES', 0)
+        if stop_pages <= 0:
+            raise NotConfigured
+        middleware = cls(crawler, stop_pages)
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def spider_opened(self, spider):
+        database_url = os.getenv('DATABASE_URL')
+        if not database_url:
+            return
+        try:
+            self.index = get_known_urls(database_url, spider.logger)
+        except Exception as e:
+            spider.logger.error(f"Failed to load known job URLs, early pagination stop disabled: {e}")
+
+    def spider_closed(self, spider):
+        skipped = self.stats.get_value('pagination/pages_skipped', 0)
+        if skipped:
+            spider.logger.info(f"Stopped pagination early, {skipped} next page(s) not followed")
+
+    def process_spider_output(self, response, result, spider):
+        if self.index is None:
+            yield from result
+            return
+
+        page_callback = _callback_name(response.request.callback)
+        job_urls = []
+        pagination = []
+        for output in result:
+            if isinstance(output, Request):
+                if _callback_name(output.callback) == page_callback:
+                    pagination.append(output)
+                    continue
+                job_urls.append(output.url)
+            yield output
+
+        known_pages = response.meta.get('known_pages', 0)
+        if job_urls:
+            known_pages = 0 if self.index.any_new(job_urls) else known_pages + 1
+
+        if known_pages >= self.stop_pages:
+            if pagination:
+                self.stats.inc_value('pagination/pages_skipped', len(pagination))
+                self.stats.set_value('pagination/stopped_early', True)
+            return
+
+        for request in pagination:
+            request.meta['known_pages'] = known_pages
+            yield request
+
+
+class CallbackTimingMiddleware:
+    """
+    Spider middleware that records a latency histogram per spider callback
+    (parse, parse_job, ...). Callbacks are generators that run as their output
+    is consumed, so only the time spent inside the callback is counted, not
+    the time later middlewares spend on what it yielded. Install it closest to
+    the spider (highest order). Histograms are logged at spider close.
+    """
+
+    def __init__(self):
+        self.histograms = HistogramSet()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('LATENCY_HISTOGRAMS_ENABLED'):
+            raise NotConfigured
+        middleware = cls()
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def process_spider_output(self, response, result, spider):
+        histogram = self.histograms.get(_callback_name(response.request.callback))
+        elapsed = 0.0
+        iterator = iter(result)
+        while True:
+            started = time.perf_counter()
+            try:
+                output = next(iterator)
+            except StopIteration:
+                elapsed += time.perf_counter() - started
+                break
+            elapsed += time.perf_counter() - started
+            yield output
+        histogram.observe(elapsed)
+
+    def spider_closed(self, spider):
+        self.histograms.log("callback", spider)
+
+
+def _callback_name(callback):
+    """Name of a request callback; None means the spider's default parse()."""
+    if callback is None:
+        return 'parse'
+    return getattr(callback, '__name__', repr(callback))
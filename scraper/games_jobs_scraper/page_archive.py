@@ -0,0 +1,288 @@
+"""
+Compressed archive of fetched job pages, so jobs can be re-parsed without
+re-fetching them (see `scrapy reparse`).
+
+Page bodies are content-addressed: each distinct body is zlib-compressed once
+and appended to the current segment file (segment-NNNNNN.z), and an SQLite
+index maps its sha256 to (segment, offset, length). A second table maps each
+URL to the digest of its latest body plus the spider callback that parsed it,
+the HTTP status and headers. Unchanged pages fetched again cost one index row,
+not another copy of the body.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional
+
+from scrapy import Request, signals
+from scrapy.exceptions import NotConfigured
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+from twisted.internet import defer
+
+# Index commits are batched; pages archived since the last commit are lost on a crash
+COMMIT_EVERY = 100
+
+
+class PageArchive:
+    """Segment files plus index for one archive directory."""
+
+    def __init__(self, directory: str, segment_bytes: int = 256 * 1024 * 1024):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._conn = sqlite3.connect(os.path.join(directory, "index.sqlite3"), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            " digest TEXT PRIMARY KEY,"
+            " segment INTEGER NOT NULL,"
+            " offset INTEGER NOT NULL,"
+            " length INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY,"
+            " spider TEXT NOT NULL,"
+            " callback TEXT NOT NULL,"
+            " digest TEXT NOT NULL,"
+            " status INTEGER NOT NULL,"
+            " headers TEXT NOT NULL,"
+            " fetched_at TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_pages_spider ON pages (spider, fetched_at)")
+        self._conn.commit()
+        self._segment = self._conn.execute("SELECT COALESCE(MAX(segment), 1) FROM blobs").fetchone()[0]
+        self._segment_file = None
+        self._read_files: Dict[int, object] = {}
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"segment-{segment:06d}.z")
+
+    def put(self, spider: str, callback: str, url: str, status: int, headers: Dict, body: bytes) -> bool:
+        """
+        Archive a page body under its URL.
+
+        Returns:
+            True if the body was new, False if an identical body was already stored
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            stored = self._conn.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone()
+            if not stored:
+                self._append_blob(digest, zlib.compress(body, 6))
+            self._conn.execute(
+                "INSERT INTO pages (url, spider, callback, digest, status, headers, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(url) DO UPDATE SET spider = excluded.spider, callback = excluded.callback,"
+                " digest = excluded.digest, status = excluded.status, headers = excluded.headers,"
+                " fetched_at = excluded.fetched_at",
+                (url, spider, callback, digest, status, json.dumps(headers),
+                 datetime.now(timezone.utc).isoformat()),
+            )
+            self._pending += 1
+            if self._pending >= COMMIT_EVERY:
+                self._commit()
+        return not stored
+
+    def _append_blob(self, digest: str, data: bytes) -> None:
+        if self._segment_file is None:
+            self._segment_file = open(self._segment_path(self._segment), "ab")
+        offset = self._segment_file.tell()
+        if offset and offset + len(data) > self.segment_bytes:
+            self._segment_file.close()
+            self._segment += 1
+            self._segment_file = open(self._segment_path(self._segment), "ab")
+            offset = 0
+        self._segment_file.write(data)
+        self._conn.execute(
+            "INSERT INTO blobs (digest, segment, offset, length) VALUES (?, ?, ?, ?)",
+            (digest, self._segment, offset, len(data)),
+        )
+
+    def flush(self) -> None:
+        """Commit everything archived so far."""
+        with self._lock:
+            self._commit()
+
+    def _commit(self) -> None:
+        # Segment data first, so the index never points past the end of a file
+        if self._segment_file is not None:
+            self._segment_file.flush()
+        self._conn.commit()
+        self._pending = 0
+
+    def get(self, url: str) -> Optional[Dict]:
+        """The archived page for a URL: status, headers, body, spider and callback."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT p.spider, p.callback, p.status, p.headers, b.segment, b.offset, b.length"
+                " FROM pages p JOIN blobs b ON b.digest = p.digest WHERE p.url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            spider, callback, status, headers, segment, offset, length = row
+            body = zlib.decompress(self._read(segment, offset, length))
+        return {"spider": spider, "callback": callback, "status": status,
+                "headers": json.loads(headers), "body": body}
+
+    def _read(self, segment: int, offset: int, length: int) -> bytes:
+        if self._segment_file is not None and segment == self._segment:
+            self._segment_file.flush()
+        segment_file = self._read_files.get(segment)
+        if segment_file is None:
+            segment_file = self._read_files[segment] = open(self._segment_path(segment), "rb")
+        segment_file.seek(offset)
+        return segment_file.read(length)
+
+    def pages(self, spider: str, since: Optional[str] = None) -> Iterator[Dict]:
+        """URL and callback of every page archived for a spider (optionally fetched since an ISO date)."""
+        query = "SELECT url, callback FROM pages WHERE spider = ?"
+        params = [spider]
+        if since:
+            query += " AND fetched_at >= ?"
+            params.append(since)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY fetched_at", params).fetchall()
+        for url, callback in rows:
+            yield {"url": url, "callback": callback}
+
+    def close(self) -> None:
+        with self._lock:
+            self._commit()
+            if self._segment_file is not None:
+                self._segment_file.close()
+                self._segment_file = None
+            for segment_file in self._read_files.values():
+                segment_file.close()
+            self._read_files = {}
+            self._conn.close()
+
+
+class PageArchiveMiddleware:
+    """
+    Spider middleware that archives job pages (PAGE_ARCHIVE_ENABLED).
+
+    Only pages whose callback yields no further requests are archived; those
+    are the job detail pages, while listing and sitemap pages are cheap to
+    fetch again and go stale anyway. With PAGE_ARCHIVE_REPARSE set (by
+    `scrapy reparse`), the spider's start requests are replaced by one request
+    per archived page, to the callback that parsed it, and nothing is archived.
+    """
+
+    def __init__(self, crawler, directory, segment_bytes, reparse=False, since=None):
+        self.stats = crawler.stats
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.reparse = reparse
+        self.since = since
+        self.archive = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        reparse = settings.getbool('PAGE_ARCHIVE_REPARSE')
+        if not (settings.getbool('PAGE_ARCHIVE_ENABLED') or reparse):
+            raise NotConfigured
+        middleware = cls(
+            crawler, settings.get('PAGE_ARCHIVE_DIR'),
+            settings.getint('PAGE_ARCHIVE_SEGMENT_BYTES', 256 * 1024 * 1024),
+            reparse=reparse, since=settings.get('PAGE_ARCHIVE_REPARSE_SINCE'),
+        )
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def spider_opened(self, spider):
+        self.archive = get_archive(self.directory, self.segment_bytes)
+
+    def spider_closed(self, spider):
+        # The archive is shared by every spider of the process (scrapy crawlall); just commit
+        self.archive.flush()
+
+    def process_start_requests(self, start_requests, spider):
+        if not self.reparse:
+            yield from start_requests
+            return
+        archive = get_archive(self.directory, self.segment_bytes)
+        for page in archive.pages(spider.name, self.since):
+            callback = getattr(spider, page['callback'], None)
+            if callback is None:
+                self.stats.inc_value('page_archive/unknown_callback')
+                continue
+            yield Request(page['url'], callback=callback, dont_filter=True,
+                          meta={'page_archive': True, 'conditional_request': False})
+
+    def process_spider_output(self, response, result, spider):
+        if self.reparse or response.status != 200 or response.meta.get('page_archive'):
+            yield from result
+            return
+        follows = False
+        for entry in result:
+            if isinstance(entry, Request):
+                follows = True
+            yield entry
+        if follows:
+            return
+        callback = response.request.callback if response.request else None
+        headers = {
+            name.decode('latin-1'): [value.decode('latin-1') for value in values]
+            for name, values in response.headers.items()
+        }
+        new = self.archive.put(spider.name, callback.__name__ if callback else 'parse', response.url, response.status, headers, response.body)
+        self.stats.inc_value('page_archive/pages')
+        if new:
+            self.stats.inc_value('page_archive/bytes', len(response.body))
+
+
+class ArchiveDownloadHandler:
+    """
+    Download handler that serves pages from the page archive instead of the
+    network (used by `scrapy reparse`). Pages not in the archive get an empty
+    404 flagged 'archive-missing'.
+    """
+
+    lazy = False
+
+    def __init__(self, settings, crawler=None):
+        self.directory = settings.get('PAGE_ARCHIVE_DIR')
+        self.segment_bytes = settings.getint('PAGE_ARCHIVE_SEGMENT_BYTES', 256 * 1024 * 1024)
+        self.stats = crawler.stats if crawler else None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.settings, crawler)
+
+    def download_request(self, request, spider):
+        page = get_archive(self.directory, self.segment_bytes).get(request.url)
+        if page is None:
+            if self.stats:
+                self.stats.inc_value('page_archive/missing')
+            return defer.succeed(responsetypes.from_args(url=request.url)(
+                url=request.url, status=404, request=request, flags=['archive-missing'],
+            ))
+        headers = Headers(page['headers'])
+        response_class = responsetypes.from_args(headers=headers, url=request.url, body=page['body'])
+        return defer.succeed(response_class(
+            url=request.url, status=page['status'], headers=headers,
+            body=page['body'], request=request, flags=['archive'],
+        ))
+
+
+_archives: Dict[str, PageArchive] = {}
+_archives_lock = threading.Lock()
+
+
+def get_archive(directory: str, segment_bytes: int) -> PageArchive:
+    """The PageArchive for a directory, shared by the middleware and handler of a process."""
+    with _archives_lock:
+        if directory not in _archives:
+            _archives[directory] = PageArchive(directory, segment_bytes)
+        return _archives[directory]
@@ -5,54 +5,35 @@ Handles data cleaning, duplicate detection, and database storage.
 
 import hashlib
 import re
+import time
 from datetime import datetime
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine, func
 import os
-from dotenv import load_dotenv
-import Levenshtein
+from scrapy.exceptions import NotConfigured
+from scrapy.pipelines import ItemPipelineManager
+from twisted.internet import defer, task, threads
+from twisted.python.threadpool import ThreadPool
 
-# Explicitly load from project root .env (scraper runs from scraper/ subfolder)
-_env_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '.env'))
-load_dotenv(dotenv_path=_env_path)
+# Importing resources also loads the project root .env (DATABASE_URL)
+from games_jobs_scraper.resources import ensure_backend_path, get_ingestor
+from games_jobs_scraper.gazetteer import normalize_location
+from games_jobs_scraper.histograms import HistogramSet
 
 
 class DataCleaningPipeline:
     """Clean and standardize scraped data."""
     
     def process_item(self, item, spider):
-        # Clean and standardize location
+        # Clean and standardize location against the UK gazetteer
         if item.get('location'):
-            location = item['location']
             # Remove extra whitespace
-            location = ' '.join(location.split())
-            # Standardize common UK location variations
-            location_mapping = {
-                'leicester': 'Leicester',
-                'leicestershire': 'Leicester',
-                'london': 'London',
-                'greater london': 'London',
-                'nottingham': 'Nottingham',
-                'nottinghamshire': 'Nottingham',
-                'leamington spa': 'Leamington Spa',
-                'leamington': 'Leamington Spa',
-                'birmingham': 'Birmingham',
-                'manchester': 'Manchester',
-                'liverpool': 'Liverpool',
-                'glasgow': 'Glasgow',
-                'edinburgh': 'Edinburgh',
-                'bristol': 'Bristol',
-                'cambridge': 'Cambridge',
-                'oxford': 'Oxford',
-            }
-            
-            location_lower = location.lower()
-            for key, value in location_mapping.items():
-                if key in location_lower:
-                    location = value
-                    break
-            
-            item['location'] = location
+            location = ' '.join(item['location'].split())
+            match = normalize_location(location)
+            if match:
+                item['location'] = match.city or location
+                item['region'] = match.region
+                item['nation'] = match.nation
+            else:
+                item['location'] = location
         
         # Clean title
         if item.get('title'):
@@ -97,152 +78,252 @@ class DuplicateDetectionPipeline:
 
 
 class DatabasePipeline:
-    """Store scraped items in PostgreSQL database."""
+    """
+    Store scraped items in the database.
+
+    Items are buffered and written in bulk by app.services.ingest.JobIngestor,
+    one transaction per batch. A batch is flushed when it reaches
+    DATABASE_PIPELINE_BATCH_SIZE items, when DATABASE_PIPELINE_FLUSH_INTERVAL
+    seconds have passed since the last flush, and when the spider closes.
+
+    Keyword extraction and DB writes run on a bounded thread pool
+    (DATABASE_PIPELINE_THREADS) so they never block the Twisted reactor.
+    The item that fills a batch is only released once its batch is written,
+    and at most DATABASE_PIPELINE_THREADS batches are written at a time, so a
+    slow database throttles the crawl through CONCURRENT_ITEMS.
+
+    With DATABASE_PIPELINE_REFRESH (set by `scrapy reparse`), items overwrite
+    the parsed fields and keywords of existing jobs.
+    """
     
-    def __init__(self):
-        self.engine = None
-        self.Session = None
-        self.extractor = None
+    def __init__(self, batch_size=100, flush_interval=30.0, threads=2, refresh=False):
+        self.ingestor = None
+        self.stats = None
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.threads = max(1, threads)
+        self.refresh = refresh
+        self.buffer = []
+        self.last_flush = time.monotonic()
+        self.flush_loop = None
+        self.thread_pool = None
+        self.write_slots = None
+        self.pending_writes = set()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if crawler.settings.getbool('SPOOL_ENABLED'):
+            # Items go to the spool instead (SpoolPipeline), loaded by backend/load_spool.py
+            raise NotConfigured
+        pipeline = cls(
+            batch_size=crawler.settings.getint('DATABASE_PIPELINE_BATCH_SIZE', 100),
+            flush_interval=crawler.settings.getfloat('DATABASE_PIPELINE_FLUSH_INTERVAL', 30.0),
+            threads=crawler.settings.getint('DATABASE_PIPELINE_THREADS', 2),
+            refresh=crawler.settings.getbool('DATABASE_PIPELINE_REFRESH'),
+        )
+        pipeline.stats = crawler.stats
+        return pipeline
     
     def open_spider(self, spider):
-        """Initialize database connection and keyword extractor."""
+        """Attach to the shared ingestor (database engine + keyword extractor)."""
         database_url = os.getenv('DATABASE_URL')
         if not database_url:
             spider.logger.error("DATABASE_URL not found in environment variables")
             return
         
-        self.engine = create_engine(database_url)
-        self.Session = sessionmaker(bind=self.engine)
-        
-        # Initialize Keyword Extractor
-        try:
-            # Add backend path to sys.path to import extractor
-            import sys
-            backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
-            spider.logger.info(f"Calculated backend path: {backend_path}")
-            
-            if backend_path not in sys.path:
-                sys.path.append(backend_path)
-            
-            # Verify we can find the path
-            if not os.path.exists(backend_path):
-                 spider.logger.error(f"Backend path does not exist: {backend_path}")
-            else:
-                 spider.logger.info(f"Backend path exists. Contents: {os.listdir(backend_path)}")
-
-            from app.nlp.keyword_extractor import KeywordExtractor
-            # Path to keywords.yaml relative to scraper
-            config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../config/keywords.yaml'))
-            self.extractor = KeywordExtractor(config_path)
-            spider.logger.info(f"Keyword Extractor initialized with config: {config_path}")
-        except Exception as e:
-            spider.logger.error(f"Failed to initialize Keyword Extractor: {e}")
+        # Engine, extractor and cache are shared by every spider in the process (see resources.py)
+        self.ingestor = get_ingestor(database_url, spider.settings, spider.logger)
+        
+        # Worker threads for extraction + DB writes, off the reactor thread
+        self.thread_pool = ThreadPool(minthreads=1, maxthreads=self.threads, name="DatabasePipeline")
+        self.thread_pool.start()
+        self.write_slots = defer.DeferredSemaphore(self.threads)
+        
+        # Time-based flush so slow crawls don't hold items in memory indefinitely
+        if self.flush_interval > 0:
+            self.flush_loop = task.LoopingCall(self._flush_if_due, spider)
+            self.flush_loop.start(min(self.flush_interval, 5.0), now=False)
         
         spider.logger.info("Database connection established")
     
     def close_spider(self, spider):
-        """Close database connection when spider closes."""
-        if self.engine:
-            self.engine.dispose()
-            spider.logger.info("Database connection closed")
+        """Flush buffered items and wait for pending writes."""
+        if self.flush_loop and self.flush_loop.running:
+            self.flush_loop.stop()
+        
+        self.flush(spider)
+        
+        dfd = defer.DeferredList(list(self.pending_writes))
+        dfd.addBoth(lambda _: self._close(spider))
+        return dfd
+
+    def _close(self, spider):
+        if self.thread_pool:
+            self.thread_pool.stop()
     
     def process_item(self, item, spider):
-        """Save item to database."""
-        if not self.Session:
+        """Buffer item for the next bulk write."""
+        if not self.ingestor:
             spider.logger.warning("Database session not initialized, skipping item")
+            self.stats.inc_value('db/items_failed')
             return item
         
-        session = self.Session()
-        
-        try:
-            # Import models here to avoid circular imports
-            # Ensure backend is in path (should be from open_spider)
-            from app.models import JobListing, Keyword, KeywordOccurrence
-            
-            # 1. Save Job Listing
-            existing_job = session.query(JobListing).filter(
-                (JobListing.url == item['url']) |
-                (JobListing.content_hash == item['content_hash'])
-            ).first()
-            
-            job = None
-            if existing_job:
-                # Update scraped_date to mark as still active
-                existing_job.scraped_date = item['scraped_date']
-                spider.logger.info(f"Updated existing job: {item['title']}")
-                job = existing_job
-            else:
-                # Create new job listing
-                job = JobListing(
-                    url=item['url'],
-                    title=item['title'],
-                    company=item['company'],
-                    location=item.get('location'),
-                    description=item.get('description'),
-                    salary=item.get('salary'),
-                    posting_date=item.get('posting_date'),
-                    source_website=item['source_website'],
-                    scraped_date=item['scraped_date'],
-                    content_hash=item['content_hash'],
-                    is_active=1
-                )
-                session.add(job)
-                session.flush()  # Get ID without committing yet
-                spider.logger.info(f"Added new job: {item['title']}")
-            
-            # 2. Extract and Save Keywords (only if we have an extractor and description)
-            if self.extractor and item.get('description'):
-                # Extract keywords
-                extracted_data = self.extractor.extract_with_counts(item['description'])
-                
-                # Flatten detected keywords
-                for category, keywords_dict in extracted_data.items():
-                    for keyword_text, count in keywords_dict.items():
-                        # Find or create keyword
-                        keyword_obj = session.query(Keyword).filter(
-                            func.lower(Keyword.keyword) == keyword_text.lower()
-                        ).first()
-                        
-                        if not keyword_obj:
-                            keyword_obj = Keyword(
-                                keyword=keyword_text,
-                                category=category,
-                                client_provided=1 # Assuming all matches are from our client list
-                            )
-                            session.add(keyword_obj)
-                            session.flush()
-                        
-                        # Check if occurrence exists
-                        occurrence = session.query(KeywordOccurrence).filter_by(
-                            job_id=job.id,
-                            keyword_id=keyword_obj.id
-                        ).first()
-                        
-                        if occurrence:
-                            occurrence.frequency = count
-                        else:
-                            occurrence = KeywordOccurrence(
-                                job_id=job.id,
-                                keyword_id=keyword_obj.id,
-                                frequency=count
-                            )
-                            session.add(occurrence)
-                
-                # Store extracted keywords in item for debugging
-                item['keywords'] = extracted_data
-
-            session.commit()
-            
-        except Exception as e:
-            session.rollback()
-            spider.logger.error(f"Error saving to database: {str(e)}")
-            # Don't raise here to allow pipeline to continue, but log error
-            # raise
-        
-        finally:
-            session.close()
+        self.buffer.append(item)
+        if len(self.buffer) >= self.batch_size:
+            # Hold this item until its batch is written (backpressure)
+            dfd = self.flush(spider)
+            dfd.addCallback(lambda _: item)
+            return dfd
+        
+        return item
+
+    def _flush_if_due(self, spider):
+        if self.buffer and time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush(spider)
+
+    def flush(self, spider):
+        """
+        Write all buffered items in one transaction on the worker pool.
+        Returns a Deferred that fires once the batch is written (or has failed).
+        """
+        self.last_flush = time.monotonic()
+        if not self.buffer or not self.ingestor:
+            return defer.succeed(None)
         
+        from twisted.internet import reactor
+        batch, self.buffer = self.buffer, []
+        dfd = self.write_slots.run(threads.deferToThreadPool, reactor, self.thread_pool, self._write_batch, batch)
+        dfd.addCallbacks(self._batch_written, self._batch_failed,
+                         callbackArgs=(batch, spider), errbackArgs=(batch, spider))
+        self.pending_writes.add(dfd)
+        dfd.addBoth(self._write_done, dfd)
+        return dfd
+
+    def _write_batch(self, batch):
+        """Runs on a worker thread: ingest one batch and time it."""
+        started = time.perf_counter()
+        counts = self.ingestor.ingest(batch, refresh=self.refresh)
+        counts['write_seconds'] = time.perf_counter() - started
+        return counts
+
+    def _write_done(self, result, dfd):
+        self.pending_writes.discard(dfd)
+        return result
+
+    def _batch_failed(self, failure, batch, spider):
+        spider.logger.error(f"Error saving batch of {len(batch)} items to database: {failure.getErrorMessage()}")
+        self.stats.inc_value('db/batch_errors')
+        self.stats.inc_value('db/items_failed', len(batch))
+        # Don't propagate, to allow pipeline to continue, but log error
+
+    def _batch_written(self, counts, batch, spider):
+        self.stats.inc_value('db/batches')
+        self.stats.inc_value('db/items_saved', counts['saved'])
+        self.stats.inc_value('db/items_updated', counts['updated'])
+        self.stats.inc_value('extraction/skipped_unchanged', counts['skipped_unchanged'])
+        self.stats.inc_value('db/near_duplicates', counts['near_duplicates'])
+        self.stats.inc_value('db/write_seconds', counts['write_seconds'])
+        self.stats.inc_value('extraction/seconds', counts['extraction_seconds'])
+        # Counted per batch: the cache is shared with the other spiders of the process
+        for key, value in counts.get('extraction_cache', {}).items():
+            self.stats.inc_value(f'extraction_cache/{key}', value)
+        spider.logger.info(
+            f"Saved batch of {len(batch)} items: {counts['saved']} new, {counts['updated']} updated"
+        )
+
+
+class SpoolPipeline:
+    """
+    Append cleaned items to the local spool (SPOOL_DIR) instead of writing them
+    to the database, so the crawl runs at network speed and survives a
+    database outage. backend/load_spool.py ingests the spool in large batches.
+    Enabled by SPOOL_ENABLED, which also disables DatabasePipeline.
+    """
+
+    def __init__(self, directory, segment_bytes):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.writer = None
+        self.stats = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('SPOOL_ENABLED'):
+            raise NotConfigured
+        pipeline = cls(crawler.settings.get('SPOOL_DIR'), crawler.settings.getint('SPOOL_SEGMENT_BYTES', 64 * 1024 * 1024))
+        pipeline.stats = crawler.stats
+        return pipeline
+
+    def open_spider(self, spider):
+        ensure_backend_path()
+        from app.services.spool import SpoolWriter
+        self.writer = SpoolWriter(self.directory, spider.name, self.segment_bytes)
+
+    def process_item(self, item, spider):
+        self.writer.write(item)
+        self.stats.inc_value('spool/items')
         return item
 
+    def close_spider(self, spider):
+        self.writer.seal()
+        spider.logger.info(f"Spooled {self.writer.count} items to {self.directory}")
+
+
+class TimedItemPipelineManager(ItemPipelineManager):
+    """
+    Item pipeline manager (ITEM_PROCESSOR) that records a latency histogram
+    per pipeline class when LATENCY_HISTOGRAMS_ENABLED is set. For a pipeline
+    that returns a Deferred (DatabasePipeline holding the item that fills a
+    batch) the time until the Deferred fires is recorded. Histograms are
+    logged when the pipelines close.
+    """
+
+    def __init__(self, *middlewares):
+        self.histograms = HistogramSet()
+        self.enabled = False
+        super().__init__(*middlewares)
+
+    @classmethod
+    def from_settings(cls, settings, crawler=None):
+        manager = super().from_settings(settings, crawler)
+        if settings.getbool('LATENCY_HISTOGRAMS_ENABLED'):
+            manager.enable_timing()
+        return manager
+
+    def enable_timing(self):
+        """Wrap every pipeline's process_item with a timer."""
+        self.enabled = True
+        methods = self.methods['process_item']
+        pipes = [pipe for pipe in self.middlewares if hasattr(pipe, 'process_item')]
+        for index, (pipe, method) in enumerate(zip(pipes, list(methods))):
+            methods[index] = self._timed(method, self.histograms.get(type(pipe).__name__))
+
+    @staticmethod
+    def _timed(method, histogram):
+        def timed_process_item(item, spider):
+            started = time.perf_counter()
+            try:
+                result = method(item, spider)
+            except Exception:
+                histogram.observe(time.perf_counter() - started)
+                raise
+            if isinstance(result, defer.Deferred):
+                def record(outcome):
+                    histogram.observe(time.perf_counter() - started)
+                    return outcome
+                return result.addBoth(record)
+            histogram.observe(time.perf_counter() - started)
+            return result
+        return timed_process_item
+
+    def close_spider(self, spider):
+        dfd = super().close_spider(spider)
+        if self.enabled:
+            def log_histograms(result):
+                self.histograms.log("pipeline", spider)
+                return result
+            dfd.addBoth(log_histograms)
+        return dfd
+
 
 from scrapy.exceptions import DropItem
@@ -0,0 +1,95 @@
+"""
+Process-wide shared resources for the item pipelines and middlewares.
+
+When several spiders run in one process (scrapy crawlall), every
+DatabasePipeline reuses the same database engine, keyword extractor,
+extraction cache and JobIngestor, and the known-URL middlewares share one
+KnownUrlIndex, instead of each spider building its own.
+"""
+
+import os
+import sys
+import threading
+
+from dotenv import load_dotenv
+
+# Explicitly load from project root .env (scraper runs from scraper/ subfolder)
+_env_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '.env'))
+load_dotenv(dotenv_path=_env_path)
+
+_lock = threading.Lock()
+_engines = {}
+_ingestors = {}
+_known_urls = {}
+
+BACKEND_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+CONFIG_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'config', 'keywords.yaml'))
+
+
+def ensure_backend_path():
+    """Make the backend `app` package importable from the scraper."""
+    if BACKEND_PATH not in sys.path:
+        sys.path.append(BACKEND_PATH)
+
+
+def get_engine(database_url):
+    """Return the shared SQLAlchemy engine for a database URL."""
+    with _lock:
+        if database_url not in _engines:
+            from sqlalchemy import create_engine
+            _engines[database_url] = create_engine(database_url)
+        return _engines[database_url]
+
+
+def get_known_urls(database_url, logger):
+    """
+    Return the KnownUrlIndex of job URLs already in the database, loaded once
+    per process (spiders started later in the same run reuse it).
+    """
+    with _lock:
+        if database_url in _known_urls:
+            return _known_urls[database_url]
+
+    ensure_backend_path()
+    from games_jobs_scraper.known_urls import KnownUrlIndex
+
+    index = KnownUrlIndex.load(get_engine(database_url))
+    logger.info(f"Loaded {len(index)} known job URLs")
+    with _lock:
+        return _known_urls.setdefault(database_url, index)
+
+
+def get_ingestor(database_url, settings, logger):
+    """
+    Return the shared JobIngestor (with its engine, extractor and cache) for a
+    database URL, building it on first use.
+    """
+    engine = get_engine(database_url)
+    with _lock:
+        if database_url in _ingestors:
+            return _ingestors[database_url]
+
+        ensure_backend_path()
+        from app.services.ingest import JobIngestor
+
+        extractor = None
+        try:
+            from app.nlp import create_extractor
+            from app.nlp.extraction_cache import ExtractionCache, CachedExtractor
+            engine_name = settings.get('KEYWORD_EXTRACTOR_ENGINE', 'blank')
+            cache = ExtractionCache(
+                settings.get('EXTRACTION_CACHE_PATH'),
+                max_entries=settings.getint('EXTRACTION_CACHE_SIZE', 10000),
+                max_disk_entries=settings.getint('EXTRACTION_CACHE_DISK_ENTRIES', 500000),
+            )
+            extractor = CachedExtractor(create_extractor(CONFIG_PATH, engine=engine_name), cache)
+            logger.info(f"Keyword Extractor initialized with config: {CONFIG_PATH} (engine: {engine_name})")
+        except Exception as e:
+            logger.error(f"Failed to initialize Keyword Extractor: {e}")
+
+        ingestor = JobIngestor(engine, extractor)
+        # Resolve keyword rows in memory instead of one lookup per keyword per job
+        logger.info(f"Loaded {ingestor.load_keyword_rows()} keyword rows")
+
+        _ingestors[database_url] = ingestor
+        return ingestor
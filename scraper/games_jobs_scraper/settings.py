@@ -1,15 +1,25 @@
 # Scrapy settings for games_jobs_scraper project
 
+import os
+
 BOT_NAME = "games_jobs_scraper"
 
 SPIDER_MODULES = ["games_jobs_scraper.spiders"]
 NEWSPIDER_MODULE = "games_jobs_scraper.spiders"
+COMMANDS_MODULE = "games_jobs_scraper.commands"
 
 # Obey robots.txt rules
 ROBOTSTXT_OBEY = True
 
 # Configure maximum concurrent requests
 CONCURRENT_REQUESTS = 16
+CONCURRENT_REQUESTS_PER_DOMAIN = 8
+
+# `scrapy crawlall` runs several spiders in one process. At most MAX_CONCURRENT_SPIDERS
+# crawl at once, and GLOBAL_CONCURRENT_REQUESTS is split evenly between them.
+CRAWLALL_MAX_CONCURRENT_SPIDERS = 8
+CRAWLALL_GLOBAL_CONCURRENT_REQUESTS = 32
+CRAWLALL_EXCLUDE = ["mock_spider"]
 
 # Configure a delay for requests
 DOWNLOAD_DELAY = 2
@@ -18,20 +28,127 @@ DOWNLOAD_DELAY = 2
 DOWNLOADER_MIDDLEWARES = {
     'scrapy.downloadermiddlewares.useragent.UserAgentMiddleware': None,
     'scrapy_user_agents.middlewares.RandomUserAgentMiddleware': 400,
+    'games_jobs_scraper.middlewares.KnownUrlMiddleware': 50,
+    'games_jobs_scraper.middlewares.ConditionalRequestMiddleware': 60,
+    'games_jobs_scraper.fixtures.FixtureRecorderMiddleware': 950,  # next to the downloader
 }
 
+# Offline fixtures: with RECORD enabled, every raw response is saved to
+# FIXTURE_DIR/<spider>.jsonl.gz (gzip JSON lines). `scrapy replaybench` replays the
+# archives through ReplayDownloadHandler and reports pages/sec, items/sec and peak RSS.
+# Record full crawls: scrapy crawl <spider> -s FIXTURE_RECORD_ENABLED=True -s KNOWN_URL_FILTER_ENABLED=False
+FIXTURE_RECORD_ENABLED = False
+FIXTURE_DIR = os.getenv("FIXTURE_DIR", "fixtures")
+
+# Page archive: job detail pages (callbacks that yield no further requests) are
+# stored zlib-compressed and content-addressed in segment files under PAGE_ARCHIVE_DIR,
+# indexed by URL. `scrapy reparse <spider>` re-runs the callbacks over the archive
+# and refreshes the stored jobs (DATABASE_PIPELINE_REFRESH) without fetching anything.
+PAGE_ARCHIVE_ENABLED = False
+PAGE_ARCHIVE_DIR = os.getenv("PAGE_ARCHIVE_DIR", ".cache/page_archive")
+PAGE_ARCHIVE_SEGMENT_BYTES = 256 * 1024 * 1024
+PAGE_ARCHIVE_REPARSE = False  # set by scrapy reparse
+PAGE_ARCHIVE_REPARSE_SINCE = None
+DATABASE_PIPELINE_REFRESH = False  # set by scrapy reparse
+
+# Skip detail requests for jobs already in job_listings (cross-run seen-URL filter).
+# Known URLs are held as a sorted array of 64-bit hashes (16 bytes per job).
+# With TOUCH enabled, skipped jobs get scraped_date / is_active updated in bulk at
+# spider close. Disable the filter to re-download every job (e.g. to pick up
+# edited descriptions): scrapy crawl <spider> -s KNOWN_URL_FILTER_ENABLED=False
+# The filter and CONDITIONAL_REQUESTS_ENABLED are mutually exclusive: with conditional
+# requests on, KnownUrlMiddleware disables itself so known jobs are revalidated instead.
+KNOWN_URL_FILTER_ENABLED = True
+KNOWN_URL_TOUCH_ENABLED = True
+# Stop following "next page" links after this many consecutive listing pages whose
+# job links are all known (listings are newest-first). 0 always paginates to the end.
+# A crawl that stopped early is not a full crawl, so its source's jobs can't be expired:
+# the API's weekly full crawl runs with -s KNOWN_URL_PAGINATION_STOP_PAGES=0.
+KNOWN_URL_PAGINATION_STOP_PAGES = 2
+
 # Enable or disable spider middlewares
 SPIDER_MIDDLEWARES = {
     'games_jobs_scraper.middlewares.DuplicateFilterMiddleware': 543,
+    'games_jobs_scraper.middlewares.KnownPaginationMiddleware': 550,
+    'games_jobs_scraper.page_archive.PageArchiveMiddleware': 980,
+    'games_jobs_scraper.middlewares.CallbackTimingMiddleware': 990,  # closest to the spider
+}
+
+# Enable or disable extensions
+# ScraperRunStatsExtension saves per-spider stats to scraper_run_spiders at spider close
+# and adds them to the ScraperRun given by SCRAPER_RUN_ID (set by the API's scraper service).
+EXTENSIONS = {
+    'games_jobs_scraper.extensions.ScraperRunStatsExtension': 500,
 }
+SCRAPER_RUN_ID = None
 
 # Enable or disable item pipelines
 ITEM_PIPELINES = {
     'games_jobs_scraper.pipelines.DataCleaningPipeline': 300,
     'games_jobs_scraper.pipelines.DuplicateDetectionPipeline': 400,
     'games_jobs_scraper.pipelines.DatabasePipeline': 500,
+    'games_jobs_scraper.pipelines.SpoolPipeline': 500,
 }
 
+# Spool instead of writing to the database: with SPOOL_ENABLED, SpoolPipeline
+# appends items to JSON-lines segments in SPOOL_DIR and DatabasePipeline is off.
+# Load them with backend/load_spool.py (once, or --follow alongside the crawl).
+SPOOL_ENABLED = False
+SPOOL_DIR = os.getenv("SPOOL_DIR", ".cache/spool")
+SPOOL_SEGMENT_BYTES = 64 * 1024 * 1024
+
+# Latency histograms per spider callback (CallbackTimingMiddleware) and per pipeline
+# class (TimedItemPipelineManager), logged as JSON through the "scraper" logger at
+# spider close. Fixed log-scale buckets, cheap enough to leave on.
+LATENCY_HISTOGRAMS_ENABLED = True
+ITEM_PROCESSOR = 'games_jobs_scraper.pipelines.TimedItemPipelineManager'
+
+# Keyword extraction engine used by DatabasePipeline.
+# "blank" only builds spaCy's English tokenizer (fast start-up, low memory) and
+# matches exactly the same keywords as "model", which loads en_core_web_sm.
+# "aho_corasick" is a pure-Python automaton that does not import spaCy at all. It
+# reproduces the tokenizer's prefix/suffix/infix and URL rules (backend
+# app/nlp/token_boundaries.py), so it matches like "blank" with one known exception:
+# spaCy's tokenizer exceptions are not applied, so an emoticon glued to a keyword
+# (":3+ years", "<3D Modeling") still matches here but not with spaCy.
+KEYWORD_EXTRACTOR_ENGINE = os.getenv("KEYWORD_EXTRACTOR_ENGINE", "blank")
+
+# Extraction result cache keyed by (description hash, keyword-config version).
+# The SQLite file persists results across spider processes; set the path to None
+# to keep only the in-process LRU tier.
+EXTRACTION_CACHE_PATH = os.getenv("EXTRACTION_CACHE_PATH", ".cache/extraction_cache.sqlite3")
+EXTRACTION_CACHE_SIZE = 10000  # Max entries in the in-process LRU tier
+EXTRACTION_CACHE_DISK_ENTRIES = 500000  # Max entries in the SQLite tier (other config versions, then oldest, evicted)
+
+# Incremental sitemap crawls (hitmarker_london): per-source lastmod high-water marks
+# from the last successful run. Entries older than the watermark minus the overlap
+# are skipped; without a watermark, only the last INITIAL_LOOKBACK_DAYS are crawled.
+WATERMARK_STORE_PATH = os.getenv("WATERMARK_STORE_PATH", ".cache/watermarks.json")
+SITEMAP_WATERMARK_OVERLAP_HOURS = 24
+SITEMAP_INITIAL_LOOKBACK_DAYS = 14
+# Request every sitemap entry (the watermark still advances). Skipped entries make a
+# crawl partial, so this is set by the API's weekly full crawl for listing expiry.
+SITEMAP_FULL_CRAWL = False
+
+# DatabasePipeline buffers items and writes them in one transaction per batch
+# (bulk INSERT ... ON CONFLICT). Batches flush at BATCH_SIZE items, after
+# FLUSH_INTERVAL seconds, and when the spider closes. BATCH_SIZE = 1 writes per item.
+DATABASE_PIPELINE_BATCH_SIZE = 100
+DATABASE_PIPELINE_FLUSH_INTERVAL = 30  # seconds
+# Extraction + DB writes run on this many worker threads, off the reactor thread.
+# At most this many batches are written at once; the item that fills a batch waits
+# for its write, so a slow database backs the crawl off via CONCURRENT_ITEMS.
+DATABASE_PIPELINE_THREADS = 2
+CONCURRENT_ITEMS = 100  # Max items processed in parallel per response (Scrapy default)
+
+# Conditional requests: store ETag / Last-Modified per job page and revalidate with
+# If-None-Match / If-Modified-Since. A 304 skips parsing and the pipelines, and the
+# job is marked as still active. Unlike HTTPCACHE, no response bodies are stored.
+# Replaces the known URL filter (KnownUrlMiddleware is disabled while this is on):
+# known jobs cost a 304 round trip, but edited job pages are picked up.
+CONDITIONAL_REQUESTS_ENABLED = False
+CONDITIONAL_REQUESTS_STORE_PATH = os.getenv("CONDITIONAL_REQUESTS_STORE_PATH", ".cache/http_validators.sqlite3")
+
 # HTTP Cache — disabled by default so the spider always fetches live data.
 # Re-enable during development to avoid repeat hits: scrapy crawl hitmarker -s HTTPCACHE_ENABLED=True
 HTTPCACHE_ENABLED = False
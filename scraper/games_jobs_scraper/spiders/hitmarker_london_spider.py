@@ -4,9 +4,11 @@ Hitmarker has a lot of global jobs, so we only scrape pages that explicitly ment
 in the sitemap or job details.
 """
 import scrapy
-from datetime import datetime
+from scrapy import signals
+from datetime import datetime, timedelta, timezone
 import hashlib
 from games_jobs_scraper.items import JobItem
+from games_jobs_scraper.watermarks import WatermarkStore, parse_w3c_datetime
 
 
 class HitmarkerLondonSpider(scrapy.spiders.SitemapSpider):
@@ -18,30 +20,72 @@ class HitmarkerLondonSpider(scrapy.spiders.SitemapSpider):
     sitemap_urls = ["https://hitmarker.net/sitemap-jobs.xml"]
     
     # We only want London jobs
-    # Hitmarker sitemaps don't always have location in URL, so we might check all and filter fast
-    # But to be polite, we can try to guess from URL if possible, or just crawl all recent and filter.
-    # Given Hitmarker's volume, we'll crawl recent ones and check location text.
+    # Hitmarker sitemaps don't always have location in URL, so we crawl recent ones
+    # and filter strictly in parse().
     
-    # Limit to recent jobs to avoid scraping 50k old pages
-    # SitemapSpider doesn't easily limit by date without parsing lastmod.
-    # We'll use a custom sitemap rule or just rely on the middleware to stop if we see old dates?
-    # For now, we'll filter by a simple keyword in priority if possible, but sitemap doesn't allow that easily.
-    # We will rely on the parse method to strictly filter.
+    # Incremental crawl: only request sitemap entries whose <lastmod> is newer than
+    # the newest lastmod seen in the last successful run (minus a safety overlap).
+    # The first run, with no watermark yet, looks back SITEMAP_INITIAL_LOOKBACK_DAYS.
+    # SITEMAP_FULL_CRAWL requests every entry (cutoff None).
+    watermark_source = "hitmarker"
+    # Stats counting scraped items that never reached the database; any of them holds the watermark back
+    unstored_item_stats = ('db/batch_errors', 'db/items_failed')
     
     custom_settings = {
-        'CLOSESPIDER_ITEMCOUNT': 100, # Safety limit for testing
         'CONCURRENT_REQUESTS': 8,
         'DOWNLOAD_DELAY': 1.0,
     }
 
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        settings = crawler.settings
+        spider.watermarks = WatermarkStore(settings.get('WATERMARK_STORE_PATH'))
+        watermark = spider.watermarks.get(spider.watermark_source)
+        if settings.getbool('SITEMAP_FULL_CRAWL'):
+            spider.cutoff = None
+        elif watermark:
+            spider.cutoff = watermark - timedelta(hours=settings.getfloat('SITEMAP_WATERMARK_OVERLAP_HOURS', 24))
+        else:
+            spider.cutoff = datetime.now(timezone.utc) - timedelta(days=settings.getfloat('SITEMAP_INITIAL_LOOKBACK_DAYS', 14))
+        spider.newest_lastmod = watermark
+        crawler.signals.connect(spider.spider_closed, signal=signals.spider_closed)
+        return spider
+
     def sitemap_filter(self, entries):
-        """Filter sitemap entries to only recent ones."""
+        """Filter sitemap entries to those modified since the last successful run."""
+        is_urlset = entries.type == 'urlset'
         for entry in entries:
-            # We can't easily filter by location here without fetching, 
-            # so we yield all recent ones and filter in parse().
-            # Optional: check if 'london' is in URL (rare for Hitmarker)
+            lastmod = parse_w3c_datetime(entry.get('lastmod'))
+            if lastmod is None:
+                # No usable lastmod: we can't tell, so fetch it
+                yield entry
+                continue
+            if is_urlset and (self.newest_lastmod is None or lastmod > self.newest_lastmod):
+                self.newest_lastmod = lastmod
+            if self.cutoff is not None and lastmod < self.cutoff:
+                self.crawler.stats.inc_value('sitemap/entries_skipped')
+                continue
+            self.crawler.stats.inc_value('sitemap/entries_new')
             yield entry
 
+    def spider_closed(self, spider, reason):
+        """
+        Advance the watermark, but only after a complete crawl whose items were
+        all stored. Jobs in a batch DatabasePipeline failed to write would
+        otherwise fall behind the watermark and never be requested again.
+        Pipelines have closed (pending batches written) when this signal fires.
+        """
+        if reason != 'finished' or self.newest_lastmod is None:
+            return
+        stats = self.crawler.stats
+        unstored = {key: stats.get_value(key) for key in self.unstored_item_stats if stats.get_value(key)}
+        if unstored:
+            self.logger.warning(f"Sitemap watermark for {self.watermark_source} kept at its previous value: {unstored}")
+            return
+        self.watermarks.set(self.watermark_source, self.newest_lastmod)
+        self.logger.info(f"Sitemap watermark for {self.watermark_source} set to {self.newest_lastmod.isoformat()}")
+
     def parse(self, response):
         """Parse job page and strict filtering for London."""
         
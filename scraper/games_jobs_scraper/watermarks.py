@@ -0,0 +1,63 @@
+"""
+Per-source high-water marks for incremental crawls.
+
+A small JSON file maps a source name to the newest timestamp seen in its last
+successful crawl, so the next run only requests entries changed since then.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def parse_w3c_datetime(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parse a sitemap <lastmod> value (W3C datetime: 2026-01-31, 2026-01-31T10:00:00Z,
+    2026-01-31T10:00:00+01:00, ...) into an aware UTC datetime, or None if invalid.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+class WatermarkStore:
+    """JSON file of {source: ISO-8601 UTC timestamp}."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def get(self, source: str) -> Optional[datetime]:
+        """Return the stored watermark for a source, if any."""
+        with self._lock:
+            return parse_w3c_datetime(self._read().get(source))
+
+    def set(self, source: str, watermark: datetime) -> None:
+        """Store a source's watermark (atomically replaces the file)."""
+        with self._lock:
+            data = self._read()
+            data[source] = watermark.astimezone(timezone.utc).isoformat()
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)